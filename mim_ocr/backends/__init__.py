@@ -1,4 +1,10 @@
-from .backend import OCRBackend, OCRBackendException
+from .backend import OCRBackend, CloudOCRBackend, OCRBackendException
+from .encoding import UploadEncoding
 from .tesseract import TesseractBackend
 from .aws_textract import AwsTextractBackend
 from .google_vision import GCPBackend
+from .cache import CachingBackend, OCRCacheStore, DirectoryCacheStore, SQLiteCacheStore
+from .cascade import CascadingBackend
+from .skew import SkewCorrectingBackend
+from .multi_resolution import MultiResolutionBackend
+from .tiling import TilingBackend
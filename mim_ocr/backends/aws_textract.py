@@ -1,45 +1,65 @@
-from typing import Tuple
+from typing import Tuple, Optional, Any, Dict, Iterator
 
 import boto3
-import numpy as np
-import cv2
+from botocore.config import Config
 
-from mim_ocr.backends import OCRBackend
+from mim_ocr.backends import CloudOCRBackend
+from mim_ocr.backends.encoding import UploadEncoding
 from mim_ocr.data_model import Box
 from mim_ocr.data_model.box import BoxType
 
 
-class AwsTextractBackend(OCRBackend):
+class AwsTextractBackend(CloudOCRBackend):
 
-    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
-        client = boto3.client('textract')
-        img_height, img_width = img.shape[0], img.shape[1]
-        img2 = cv2.imencode('.png', img)[1]
-        response = client.detect_document_text(Document={'Bytes': img2.tobytes()})
+    def __init__(self,
+                 max_pool_connections: int = 10,
+                 tcp_keepalive: bool = True,
+                 region_name: Optional[str] = None,
+                 endpoint_url: Optional[str] = None,
+                 encoding: Optional[UploadEncoding] = None) -> None:
+        """
+        Args:
+            max_pool_connections (int): maximum number of connections kept in the client connection pool.
+                                        Should not be lower than the number of threads sharing the backend.
+            tcp_keepalive (bool): whether to use TCP keep-alive on pooled connections
+            region_name (Optional[str]): AWS region, by default taken from the environment/AWS config
+            endpoint_url (Optional[str]): custom endpoint, e.g. a local mock of the Textract API
+            encoding (Optional[UploadEncoding]): how images are encoded before upload (PNG by default)
+        """
+        super().__init__(encoding)
+        self.max_pool_connections = max_pool_connections
+        self.tcp_keepalive = tcp_keepalive
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+
+    def _create_client(self) -> Any:
+        config = Config(max_pool_connections=self.max_pool_connections, tcp_keepalive=self.tcp_keepalive)
+        return boto3.session.Session().client('textract', config=config, region_name=self.region_name,
+                                              endpoint_url=self.endpoint_url)
+
+    def _run_ocr_on_encoded_image(self, content: bytes, img_height: int, img_width: int) -> Box:
+        response = self.client.detect_document_text(Document={'Bytes': content})
         return self.response_to_box(response, img_height, img_width)
 
     def response_to_box(self, response: dict, img_height: int, img_width: int) -> Box:
         root_box = Box.create_root_box()
         root_box.additional_data = {'DocumentMetadata': response['DocumentMetadata']}
 
+        blocks_by_id = {block['Id']: block for block in response['Blocks']}
         pages = [b for b in response['Blocks'] if b['BlockType'] == 'PAGE']
-        lines = [b for b in response['Blocks'] if b['BlockType'] == 'LINE']
-        words = [b for b in response['Blocks'] if b['BlockType'] == 'WORD']
 
         for page in pages:
             page_box = Box(conf=None, text=None, box_type=BoxType.AWS_BLOCK_PAGE)
             Box.add_child(root_box, page_box)
 
-            child_lines = [line for line in lines if line['Id'] in page['Relationships'][0]['Ids']]
-            for line in child_lines:
+            for line in self._get_child_blocks(page, blocks_by_id, 'LINE'):
                 left, top, right, bottom = self.geometry_to_boundingbox(line, img_height, img_width)
                 confidence = line['Confidence']
                 line_box = Box(left=left, top=top, right=right, bottom=bottom,
                                conf=confidence, text=None, box_type=BoxType.AWS_BLOCK_LINE)
                 Box.add_child(page_box, line_box)
 
-                child_words = [word for word in words if word['Id'] in line['Relationships'][0]['Ids']]
-                for word in child_words:
+                for word in self._get_child_blocks(line, blocks_by_id, 'WORD'):
                     confidence = word['Confidence']
                     text = word['Text']
                     left, top, right, bottom = self.geometry_to_boundingbox(word, img_height, img_width)
@@ -48,6 +68,17 @@ class AwsTextractBackend(OCRBackend):
                     Box.add_child(line_box, word_box)
         return root_box
 
+    @staticmethod
+    def _get_child_blocks(block: dict, blocks_by_id: Dict[str, dict], block_type: str) -> Iterator[dict]:
+        """Yields children of the block with given BlockType, following all CHILD relationships in order."""
+        for relationship in block.get('Relationships', []):
+            if relationship['Type'] != 'CHILD':
+                continue
+            for child_id in relationship['Ids']:
+                child = blocks_by_id.get(child_id)
+                if child is not None and child['BlockType'] == block_type:
+                    yield child
+
     @staticmethod
     def geometry_to_boundingbox(block: dict, img_height: int, img_width: int) -> Tuple[int, int, int, int]:
         top = img_height * block['Geometry']['BoundingBox']['Top']
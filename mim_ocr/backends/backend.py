@@ -1,9 +1,15 @@
+import dataclasses
+import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional, Dict, List, Tuple
 
 import numpy as np
 import pandas as pd
 
 from mim_ocr.data_model import Box
+from .encoding import UploadEncoding, IMAGE_FORMAT_FILE_SUFFIXES
 from mim_ocr.utils.class_utils import get_subclass_by_name
 
 
@@ -19,10 +25,112 @@ class OCRBackend(ABC):
 
         return self.run_ocr_to_box(img, *args, **kwargs).to_dataframe()
 
+    def run_ocr_to_boxes(self, imgs: List[np.ndarray], *args, n_workers: int = 1, **kwargs) -> List[Box]:
+        """Runs OCR on many images, results are returned in the order of images.
+
+        By default images are processed by a pool of n_workers threads, which is efficient for backends spending
+        time outside of Python interpreter (external processes like tesseract, network calls). Backends with
+        native batch processing should override this method.
+        """
+        if n_workers <= 1 or len(imgs) <= 1:
+            return [self.run_ocr_to_box(img, *args, **kwargs) for img in imgs]
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            return list(executor.map(lambda img: self.run_ocr_to_box(img, *args, **kwargs), imgs))
+
+    def init_worker(self) -> None:
+        """Called once in every worker process before processing images, e.g. to load models."""
+        pass
+
+    def get_config(self) -> Dict[str, Any]:
+        """Returns parameters of the backend that influence OCR results (e.g. used for caching the results)."""
+        return {}
+
     @staticmethod
     def get_by_name(backend_name: str) -> 'OCRBackend':
         return get_subclass_by_name(OCRBackend, backend_name)()
 
 
+class CloudOCRBackend(OCRBackend, ABC):
+    """Base class for backends calling a cloud OCR service.
+
+    The service client is created lazily on first use and then reused for all the following calls, so credential
+    resolution, TLS handshakes and client construction are paid once per backend instance. Clients are not shared
+    between processes: the client is recreated after fork and dropped when the backend is pickled (e.g. when it is
+    sent to a multiprocessing worker).
+
+    Images are encoded before upload according to UploadEncoding. Results are always returned in coordinates
+    of the input image, also when the image was downscaled for upload.
+    """
+    supported_formats: Tuple[str, ...] = ('png', 'jpeg')
+
+    def __init__(self, encoding: Optional[UploadEncoding] = None) -> None:
+        self._client: Optional[Any] = None
+        self._client_pid: Optional[int] = None
+        self.encoding = encoding if encoding is not None else UploadEncoding()
+        self.encoding.validate(self.supported_formats)
+
+    @abstractmethod
+    def _create_client(self) -> Any:
+        pass
+
+    @abstractmethod
+    def _run_ocr_on_encoded_image(self, content: bytes, img_height: int, img_width: int) -> Box:
+        """Sends encoded image to the service and returns results in coordinates of the encoded image."""
+        pass
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, source_path: Optional[Path] = None, **kwargs) -> Box:
+        """
+        Args:
+            img (np.ndarray): image
+            source_path (Optional[Path]): file img was read from. If given (img has to be unchanged),
+                                          the file is uploaded as it is when the encoding and its format allow it
+                                          (see get_source_file_content).
+        """
+        if img is None:
+            raise ValueError("Input image cannot be None")
+
+        if source_path is not None and self.can_upload_source_file(source_path, img):
+            content, (height, width) = self.get_source_file_content(source_path, img)
+        else:
+            content, (height, width) = self.encoding.encode(img)
+
+        box = self._run_ocr_on_encoded_image(content, height, width)
+        if (height, width) != img.shape[:2]:
+            box.scale(img.shape[1] / width, img.shape[0] / height)
+        return box
+
+    def can_upload_source_file(self, source_path: Path, img: np.ndarray) -> bool:
+        suffixes = [suffix for image_format in self.supported_formats
+                    for suffix in IMAGE_FORMAT_FILE_SUFFIXES[image_format]]
+        return self.encoding.allows_source_file_upload(img) and Path(source_path).suffix.lower() in suffixes
+
+    def get_source_file_content(self, source_path: Path, img: np.ndarray) -> Tuple[bytes, Tuple[int, int]]:
+        """Returns content of the source file if it is in the image format of the encoding. Otherwise img is
+        encoded and the smaller of the two is returned, so that configured lossy formats are not bypassed."""
+        content = Path(source_path).read_bytes()
+        if self.encoding.is_in_image_format(source_path):
+            return content, img.shape[:2]
+        encoded_content, size = self.encoding.encode(img)
+        if len(content) <= len(encoded_content):
+            return content, img.shape[:2]
+        return encoded_content, size
+
+    def get_config(self) -> Dict[str, Any]:
+        return {'encoding': dataclasses.asdict(self.encoding)}
+
+    @property
+    def client(self) -> Any:
+        if self._client is None or self._client_pid != os.getpid():
+            self._client = self._create_client()
+            self._client_pid = os.getpid()
+        return self._client
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_client'] = None
+        state['_client_pid'] = None
+        return state
+
+
 class OCRBackendException(Exception):
     pass
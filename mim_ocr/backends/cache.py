@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional, Union, Dict, Any, List, Tuple
+
+import jsonpickle
+import numpy as np
+from loguru import logger
+
+from .backend import OCRBackend
+from mim_ocr.data_model import Box
+
+TMP_FILE_PREFIX = '.tmp'
+# Minimal interval (in seconds) between removals of expired entries from DirectoryCacheStore.
+EXPIRED_ENTRIES_CHECK_INTERVAL = 60
+
+
+class OCRCacheStore(ABC):
+    """Local key-value storage for serialized OCR results (or other cached data, e.g. preprocessed images)
+    with size-based LRU eviction and age-based expiration."""
+
+    def __init__(self, max_size_bytes: Optional[int] = None, max_age_seconds: Optional[float] = None) -> None:
+        """
+        Args:
+            max_size_bytes (Optional[int]): when total size of stored entries exceeds this value,
+                                            least recently used entries are removed. If None, the store is unbounded.
+            max_age_seconds (Optional[float]): entries not used for longer than this are not returned and are removed.
+                                               If None, entries do not expire.
+        """
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+
+    def is_expired(self, last_access: float) -> bool:
+        return self.max_age_seconds is not None and time.time() - last_access > self.max_age_seconds
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def put(self, key: str, value: bytes) -> None:
+        pass
+
+    @staticmethod
+    def from_path(path: Union[str, os.PathLike], max_size_bytes: Optional[int] = None,
+                  max_age_seconds: Optional[float] = None) -> 'OCRCacheStore':
+        """Creates SQLite store for paths with .sqlite or .db suffix and directory store otherwise."""
+        if Path(path).suffix in ('.sqlite', '.db'):
+            return SQLiteCacheStore(path, max_size_bytes, max_age_seconds)
+        return DirectoryCacheStore(path, max_size_bytes, max_age_seconds)
+
+
+class DirectoryCacheStore(OCRCacheStore):
+    """Stores every entry in a separate file. File modification time is used as the last access time."""
+
+    def __init__(self, directory: Union[str, os.PathLike], max_size_bytes: Optional[int] = None,
+                 max_age_seconds: Optional[float] = None) -> None:
+        super().__init__(max_size_bytes, max_age_seconds)
+        self.directory = Path(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        # Size is tracked approximately (other processes may write to the same directory)
+        # and recalculated from disk only when the limit seems to be exceeded.
+        self._approximate_size: Optional[int] = None
+        self._last_expired_entries_check = 0.0
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._entry_path(key)
+        try:
+            if self.is_expired(os.stat(path).st_mtime):
+                return None
+            with open(path, 'rb') as entry_file:
+                value = entry_file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        path = self._entry_path(key)
+        os.makedirs(path.parent, exist_ok=True)
+        # write to temporary file first, so concurrent readers never see partially written entries
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=TMP_FILE_PREFIX, delete=False) as tmp_file:
+            tmp_file.write(value)
+        os.replace(tmp_file.name, path)
+
+        if (self.max_age_seconds is not None
+                and time.time() - self._last_expired_entries_check > EXPIRED_ENTRIES_CHECK_INTERVAL):
+            self._remove_expired()
+        if self.max_size_bytes is None:
+            return
+        if self._approximate_size is None:
+            self._approximate_size = sum(size for _, _, size in self._list_entries())
+        else:
+            self._approximate_size += len(value)
+        if self._approximate_size > self.max_size_bytes:
+            self._evict()
+
+    def _list_entries(self) -> List[Tuple[Path, float, int]]:
+        entries = []
+        for subdirectory in os.scandir(self.directory):
+            if not subdirectory.is_dir():
+                continue
+            for entry in os.scandir(subdirectory.path):
+                if entry.name.startswith(TMP_FILE_PREFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # removed by another process
+                    continue
+                entries.append((Path(entry.path), stat.st_mtime, stat.st_size))
+        return entries
+
+    def _remove_expired(self) -> None:
+        self._last_expired_entries_check = time.time()
+        for path, last_access, _ in self._list_entries():
+            if self.is_expired(last_access):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        self._approximate_size = None
+
+    def _evict(self) -> None:
+        entries = sorted(self._list_entries(), key=lambda entry: entry[1])
+        total_size = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+        self._approximate_size = total_size
+
+
+class SQLiteCacheStore(OCRCacheStore):
+    """Stores all entries in a single SQLite database file. Safe to use from multiple processes and threads."""
+
+    def __init__(self, path: Union[str, os.PathLike], max_size_bytes: Optional[int] = None,
+                 max_age_seconds: Optional[float] = None) -> None:
+        super().__init__(max_size_bytes, max_age_seconds)
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None or self._connection_pid != os.getpid():
+            self._connection = sqlite3.connect(str(self.path), timeout=60, isolation_level=None,
+                                               check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS ocr_cache_last_access ON ocr_cache (last_access)")
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        state['_connection_pid'] = None
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self.connection.execute("SELECT value, last_access FROM ocr_cache WHERE key = ?",
+                                          (key,)).fetchone()
+            if row is None or self.is_expired(row[1]):
+                return None
+            self.connection.execute("UPDATE ocr_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()))
+            if self.max_age_seconds is not None:
+                self.connection.execute("DELETE FROM ocr_cache WHERE last_access < ?",
+                                        (time.time() - self.max_age_seconds,))
+            if self.max_size_bytes is not None:
+                self._evict()
+
+    def _evict(self) -> None:
+        total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+        keys_to_remove = []
+        for key, size in self.connection.execute("SELECT key, size FROM ocr_cache ORDER BY last_access"):
+            if total_size <= self.max_size_bytes:
+                break
+            keys_to_remove.append((key,))
+            total_size -= size
+        self.connection.executemany("DELETE FROM ocr_cache WHERE key = ?", keys_to_remove)
+
+
+class CachingBackend(OCRBackend):
+    """Wrapper returning stored results for images already processed by the wrapped backend.
+
+    Results are keyed by a hash of image pixels, class and config of the wrapped backend (see OCRBackend.get_config)
+    and arguments of the call. Counters of cache hits and misses are kept per process.
+    """
+
+    def __init__(self, backend: OCRBackend, store: OCRCacheStore) -> None:
+        self.backend = backend
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    def init_worker(self) -> None:
+        self.backend.init_worker()
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.backend.get_config()
+
+    def get_cache_key(self, img: np.ndarray, *args, **kwargs) -> str:
+        img = np.ascontiguousarray(img)
+        key_data = {
+            'backend': f"{type(self.backend).__module__}.{type(self.backend).__qualname__}",
+            'config': self.backend.get_config(),
+            'args': args,
+            'kwargs': kwargs,
+            'shape': img.shape,
+            'dtype': str(img.dtype),
+        }
+        key_hash = hashlib.sha256(json.dumps(key_data, sort_keys=True, default=repr).encode())
+        key_hash.update(img.data)
+        return key_hash.hexdigest()
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        if img is None:
+            raise ValueError("Input image cannot be None")
+
+        key = self.get_cache_key(img, *args, **kwargs)
+        cached_value = self.store.get(key)
+        if cached_value is not None:
+            self.hits += 1
+            logger.debug(f"OCR cache hit for key {key}.")
+            return Box.from_json_str(cached_value.decode())
+
+        self.misses += 1
+        box = self.backend.run_ocr_to_box(img, *args, **kwargs)
+        self.store.put(key, jsonpickle.encode(box).encode())
+        return box
+
+    def run_ocr_to_boxes(self, imgs: List[np.ndarray], *args, n_workers: int = 1, **kwargs) -> List[Box]:
+        """Only images missing in cache are passed to the wrapped backend (in one batch)."""
+        keys = [self.get_cache_key(img, *args, **kwargs) for img in imgs]
+        boxes: List[Optional[Box]] = []
+        for key in keys:
+            cached_value = self.store.get(key)
+            boxes.append(None if cached_value is None else Box.from_json_str(cached_value.decode()))
+
+        missing_indices = [i for i, box in enumerate(boxes) if box is None]
+        self.hits += len(imgs) - len(missing_indices)
+        self.misses += len(missing_indices)
+        new_boxes = self.backend.run_ocr_to_boxes([imgs[i] for i in missing_indices],
+                                                  *args, n_workers=n_workers, **kwargs)
+        for i, box in zip(missing_indices, new_boxes):
+            self.store.put(keys[i], jsonpickle.encode(box).encode())
+            boxes[i] = box
+        return boxes
@@ -0,0 +1,67 @@
+from typing import Dict, Any
+
+import numpy as np
+from loguru import logger
+
+from .backend import OCRBackend
+from mim_ocr.data_model import Box, box_functions
+from mim_ocr.data_model.box import BoxType
+
+
+class CascadingBackend(OCRBackend):
+    """Runs a cheap (e.g. local) backend on the whole image and a secondary (e.g. cloud) backend
+    only on the regions recognized with low confidence.
+
+    Low confidence boxes are cropped from the image and their children are replaced by results
+    of the secondary backend (like in run_ocr_on_single_box).
+    """
+
+    def __init__(self, primary_backend: OCRBackend, secondary_backend: OCRBackend,
+                 confidence_threshold: float = 80.0, box_type: BoxType = BoxType.TESSERACT_LINE,
+                 n_workers: int = 1) -> None:
+        """
+        Args:
+            primary_backend (OCRBackend): backend run on the whole image, e.g. TesseractBackend
+            secondary_backend (OCRBackend): backend run on low confidence regions, e.g. AwsTextractBackend
+            confidence_threshold (float): boxes with average confidence (see Box.calc_confidence) below
+                                          this value are recomputed with secondary backend
+            box_type (BoxType): type of boxes (regions) checked, e.g. lines or paragraphs
+            n_workers (int): number of parallel calls of the secondary backend
+        """
+        self.primary_backend = primary_backend
+        self.secondary_backend = secondary_backend
+        self.confidence_threshold = confidence_threshold
+        self.box_type = box_type
+        self.n_workers = n_workers
+
+    def init_worker(self) -> None:
+        self.primary_backend.init_worker()
+        self.secondary_backend.init_worker()
+
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            'primary_backend': type(self.primary_backend).__name__,
+            'primary_config': self.primary_backend.get_config(),
+            'secondary_backend': type(self.secondary_backend).__name__,
+            'secondary_config': self.secondary_backend.get_config(),
+            'confidence_threshold': self.confidence_threshold,
+            'box_type': self.box_type.value,
+        }
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        """Args and kwargs are passed to the primary backend."""
+        box = self.primary_backend.run_ocr_to_box(img, *args, **kwargs)
+
+        low_confidence_boxes = [b for b in box.get_subboxes(self.box_type) if self._has_low_confidence(b)]
+        new_boxes = self.secondary_backend.run_ocr_to_boxes(
+            [box_functions.crop_box_image(img, b) for b in low_confidence_boxes], n_workers=self.n_workers)
+        for b, new_b in zip(low_confidence_boxes, new_boxes):
+            box_functions.update_box_with_ocr_result(self.secondary_backend, b, new_b)
+
+        logger.debug(f"{len(low_confidence_boxes)} boxes recomputed with {type(self.secondary_backend).__name__}.")
+        return box
+
+    def _has_low_confidence(self, box: Box) -> bool:
+        if not box.has_any_text():
+            return False
+        return box.calc_confidence()['avg_confidence'] < self.confidence_threshold
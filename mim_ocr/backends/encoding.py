@@ -0,0 +1,76 @@
+import dataclasses
+from pathlib import Path
+from typing import Optional, Tuple, List
+
+import cv2
+import numpy as np
+
+IMAGE_FORMAT_EXTENSIONS = {
+    'png': '.png',
+    'jpeg': '.jpg',
+    'webp': '.webp',
+}
+
+# Suffixes of source files which can be uploaded as they are, for every image format.
+IMAGE_FORMAT_FILE_SUFFIXES = {
+    'png': ('.png',),
+    'jpeg': ('.jpg', '.jpeg'),
+    'webp': ('.webp',),
+}
+
+
+@dataclasses.dataclass
+class UploadEncoding:
+    """Describes how images are encoded before being sent to a cloud OCR service.
+
+    The default values reproduce lossless PNG encoding of the full image. Grayscale conversion, lossy formats
+    and downscaling make both encoding and upload much faster at the cost of (usually small) OCR quality loss.
+    """
+    image_format: str = 'png'
+    quality: int = 90
+    png_compression: Optional[int] = None
+    grayscale: bool = False
+    max_dimension: Optional[int] = None
+    reuse_source_bytes: bool = True
+
+    def validate(self, supported_formats: Tuple[str, ...]) -> None:
+        if self.image_format not in supported_formats:
+            raise ValueError(f"Unsupported image format: {self.image_format}. Use one of: {supported_formats}.")
+        if self.max_dimension is not None and self.max_dimension <= 0:
+            raise ValueError("max_dimension has to be positive.")
+
+    def get_scale(self, img: np.ndarray) -> float:
+        """Returns scale of the image after downscaling to max_dimension."""
+        if self.max_dimension is None or max(img.shape[:2]) <= self.max_dimension:
+            return 1.0
+        return self.max_dimension / max(img.shape[:2])
+
+    def encode(self, img: np.ndarray) -> Tuple[bytes, Tuple[int, int]]:
+        """Returns encoded image and its size (height, width)."""
+        if self.grayscale and len(img.shape) == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+        scale = self.get_scale(img)
+        if scale != 1.0:
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        params: List[int] = []
+        if self.image_format == 'jpeg':
+            params = [int(cv2.IMWRITE_JPEG_QUALITY), self.quality]
+        elif self.image_format == 'webp':
+            params = [int(cv2.IMWRITE_WEBP_QUALITY), self.quality]
+        elif self.png_compression is not None:
+            params = [int(cv2.IMWRITE_PNG_COMPRESSION), self.png_compression]
+
+        is_success, buffer = cv2.imencode(IMAGE_FORMAT_EXTENSIONS[self.image_format], img, params)
+        if not is_success:
+            raise ValueError(f"Unable to encode image as {self.image_format}.")
+        return buffer.tobytes(), img.shape[:2]
+
+    def allows_source_file_upload(self, img: np.ndarray) -> bool:
+        """Whether the source file of img can be sent instead of encoding img."""
+        return self.reuse_source_bytes and not self.grayscale and self.get_scale(img) == 1.0
+
+    def is_in_image_format(self, path: Path) -> bool:
+        """Whether the file (judging by its suffix) is in image_format."""
+        return Path(path).suffix.lower() in IMAGE_FORMAT_FILE_SUFFIXES[self.image_format]
@@ -1,26 +1,46 @@
-from typing import Tuple
+from typing import Tuple, Any, Optional, List
 
-import cv2
-import numpy as np
 from google.cloud import vision
 from google.cloud.vision_v1 import Word, BoundingPoly
+from google.cloud.vision_v1.services.image_annotator.transports import ImageAnnotatorGrpcTransport
 
-from mim_ocr.backends import OCRBackend
+from mim_ocr.backends import CloudOCRBackend
+from mim_ocr.backends.encoding import UploadEncoding
 from mim_ocr.data_model import Box
 from mim_ocr.data_model.box import BoxType
 
 
-class GCPBackend(OCRBackend):
+class GCPBackend(CloudOCRBackend):
     """based on https://github.com/SoloSynth1/gcp-vision-ocr/blob/master/vision.py"""
-
-    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
-
-        img_str = cv2.imencode('.png', img)[1].tostring()
-
-        client = vision.ImageAnnotatorClient()
-
-        image = vision.Image(content=img_str)
-        response = client.document_text_detection(image=image)
+    supported_formats = ('png', 'jpeg', 'webp')
+
+    def __init__(self,
+                 keepalive_time_ms: Optional[int] = 30000,
+                 grpc_options: Optional[List[Tuple[str, Any]]] = None,
+                 encoding: Optional[UploadEncoding] = None) -> None:
+        """
+        Args:
+            keepalive_time_ms (Optional[int]): interval of gRPC keep-alive pings on the reused channel.
+                                               If None, gRPC defaults are used.
+            grpc_options (Optional[List[Tuple[str, Any]]]): additional gRPC channel options,
+                                                            e.g. [('grpc.max_send_message_length', 20 * 1024 ** 2)]
+            encoding (Optional[UploadEncoding]): how images are encoded before upload (PNG by default)
+        """
+        super().__init__(encoding)
+        self.keepalive_time_ms = keepalive_time_ms
+        self.grpc_options = grpc_options or []
+
+    def _create_client(self) -> Any:
+        options = list(self.grpc_options)
+        if self.keepalive_time_ms is not None:
+            options += [('grpc.keepalive_time_ms', self.keepalive_time_ms),
+                        ('grpc.keepalive_permit_without_calls', 1)]
+        channel = ImageAnnotatorGrpcTransport.create_channel(options=options)
+        return vision.ImageAnnotatorClient(transport=ImageAnnotatorGrpcTransport(channel=channel))
+
+    def _run_ocr_on_encoded_image(self, content: bytes, img_height: int, img_width: int) -> Box:
+        image = vision.Image(content=content)
+        response = self.client.document_text_detection(image=image)
         document = response.full_text_annotation
 
         # https://cloud.google.com/vision/docs/fulltext-annotations
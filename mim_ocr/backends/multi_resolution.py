@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from .backend import OCRBackend
+from mim_ocr.data_model import Box, box_functions
+from mim_ocr.data_model.box import BoxType
+from mim_ocr.heuristics import Feature, NUMBER_FEATURE, DATE_FEATURE
+
+# Key of additional_data of the root box with the number of lines recognized again in full resolution.
+REOCR_LINES_KEY = 'reocr_lines'
+# Letters which are often recognized instead of digits in low resolution images.
+DIGIT_CONFUSIONS = str.maketrans({'O': '0', 'o': '0', 'D': '0', 'Q': '0', 'l': '1', 'I': '1', 'i': '1', '|': '1',
+                                  'Z': '2', 'z': '2', 'S': '5', 's': '5', 'B': '8', 'g': '9', 'q': '9'})
+DEFAULT_SANITY_CHECK_FEATURES = (NUMBER_FEATURE, DATE_FEATURE)
+
+
+class MultiResolutionBackend(OCRBackend):
+    """Runs OCR on the image downscaled by scale and again in full resolution only on weak lines.
+
+    Lines with low confidence or failing the feature sanity check (see fails_feature_sanity_check) are cropped
+    from the full resolution image and their children are replaced by new results (like in run_ocr_on_single_box).
+    Returned boxes are in coordinates of the full resolution image. Clean pages are recognized at a fraction
+    of the cost, as OCR time is roughly proportional to the number of pixels.
+    """
+
+    def __init__(self, backend: OCRBackend, scale: float = 0.5, confidence_threshold: float = 80.0,
+                 features: Sequence[Feature] = DEFAULT_SANITY_CHECK_FEATURES,
+                 box_type: BoxType = BoxType.TESSERACT_LINE, line_backend: Optional[OCRBackend] = None,
+                 n_workers: int = 1) -> None:
+        """
+        Args:
+            backend (OCRBackend): backend run on the downscaled image, e.g. TesseractBackend
+            scale (float): scale of the first pass image
+            confidence_threshold (float): lines with average confidence (see Box.calc_confidence) below
+                                          this value are recognized again in full resolution
+            features (Sequence[Feature]): features used by the sanity check of the text of lines
+            box_type (BoxType): type of boxes (lines) checked
+            line_backend (Optional[OCRBackend]): backend run on crops of weak lines (e.g. tesseract with config
+                                                 for a single line), backend is used if None
+            n_workers (int): number of parallel calls of the backend on lines
+        """
+        if not 0.0 < scale <= 1.0:
+            raise ValueError(f"Scale must be in (0, 1], got {scale}")
+        self.backend = backend
+        self.scale = scale
+        self.confidence_threshold = confidence_threshold
+        self.features = list(features)
+        self.box_type = box_type
+        self.line_backend = line_backend
+        self.n_workers = n_workers
+
+    def init_worker(self) -> None:
+        self.backend.init_worker()
+        if self.line_backend is not None:
+            self.line_backend.init_worker()
+
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            'backend': type(self.backend).__name__,
+            'config': self.backend.get_config(),
+            'line_backend': type(self.line_backend).__name__ if self.line_backend is not None else None,
+            'line_config': self.line_backend.get_config() if self.line_backend is not None else None,
+            'scale': self.scale,
+            'confidence_threshold': self.confidence_threshold,
+            'features': [feature.name for feature in self.features],
+            'box_type': self.box_type.value,
+        }
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        """Args and kwargs are passed to the backend run on the downscaled image."""
+        if self.scale == 1.0:
+            return self.backend.run_ocr_to_box(img, *args, **kwargs)
+
+        small_img = cv2.resize(img, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        box = self.backend.run_ocr_to_box(small_img, *args, **kwargs)
+        box.scale(img.shape[1] / small_img.shape[1], img.shape[0] / small_img.shape[0])
+
+        weak_lines = [b for b in box.get_subboxes(self.box_type) if self._is_weak(b)]
+        # coordinates scaled up are accurate only up to the size of a pixel of the small image
+        padding = int(np.ceil(1 / self.scale))
+        crop_origins = [(max(b.left - padding, 0), max(b.top - padding, 0)) for b in weak_lines]
+        crops = [img[top:b.bottom + padding, left:b.right + padding]
+                 for b, (left, top) in zip(weak_lines, crop_origins)]
+        line_backend = self.line_backend or self.backend
+        new_boxes = line_backend.run_ocr_to_boxes(crops, n_workers=self.n_workers)
+
+        for b, (left, top), new_b in zip(weak_lines, crop_origins, new_boxes):
+            # update_box_with_ocr_result translates results by the origin of the box, not of the padded crop
+            new_b.translate(left - max(b.left, 0), top - max(b.top, 0))
+            box_functions.update_box_with_ocr_result(line_backend, b, new_b)
+
+        box.additional_data[REOCR_LINES_KEY] = len(weak_lines)
+        logger.debug(f"{len(weak_lines)} lines recognized again in full resolution.")
+        return box
+
+    def _is_weak(self, box: Box) -> bool:
+        if not box.has_any_text():
+            return False
+        if box.calc_confidence()['avg_confidence'] < self.confidence_threshold:
+            return True
+        return fails_feature_sanity_check(box.get_full_text(), self.features)
+
+
+def fails_feature_sanity_check(text: str, features: List[Feature]) -> bool:
+    """Returns whether some feature (e.g. number or date) is found in the text only after replacing letters
+    often confused with digits in words containing digits, e.g. "12.O3.2O21". Such text was probably misread."""
+    words = text.split(" ")
+    corrected_text = " ".join(word.translate(DIGIT_CONFUSIONS) if any(c.isdigit() for c in word) else word
+                              for word in words)
+    if corrected_text == text:
+        return False
+    return any(len(feature.find_occurrences(corrected_text)) > len(feature.find_occurrences(text))
+               for feature in features)
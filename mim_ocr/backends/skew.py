@@ -0,0 +1,72 @@
+from typing import Dict, Any
+
+import numpy as np
+from loguru import logger
+
+from .backend import OCRBackend
+from mim_ocr.data_model import Box, box_functions
+from mim_ocr.preprocessing import rotate_cv2
+
+# Key of additional_data of the root box with the angle by which results were deskewed.
+SKEW_ANGLE_KEY = 'skew_angle'
+SKEW_CORRECTION_BACKGROUND = (255, 255, 255)
+# Maximal reocr_threshold. Sizes of boxes rotated analytically (see box_functions.rotate_box_coordinates)
+# are undefined at 45 degrees and inaccurate close to it, so larger skew is always corrected by OCR.
+MAX_REOCR_THRESHOLD = 30.0
+
+
+class SkewCorrectingBackend(OCRBackend):
+    """Deskews OCR results using skew estimated from coordinates of recognized words
+    (see box_functions.estimate_skew_angle), so that the pixel-based deskew is not needed before OCR.
+
+    If the skew is above reocr_threshold, OCR is run again on the rotated image. Otherwise
+    the coordinates of boxes are rotated analytically (see box_functions.rotate_box_coordinates).
+    In both cases the results are in coordinates of the image rotated with
+    rotate_cv2(img, angle, SKEW_CORRECTION_BACKGROUND), and the angle is stored in additional_data
+    of the root box under SKEW_ANGLE_KEY (the pipeline rotates the returned image accordingly). When
+    preprocessing changed the geometry of the image (e.g. crop_margins), the pipeline moves the results
+    to the rotated reference image (see add_box_mapping).
+    """
+
+    def __init__(self, backend: OCRBackend, reocr_threshold: float = 2.0, min_angle: float = 0.1,
+                 min_lines: int = 3) -> None:
+        """
+        Args:
+            backend (OCRBackend): backend returning word boxes, e.g. TesseractBackend
+            reocr_threshold (float): minimal skew (in degrees) for which OCR is run again on rotated image,
+                                     at most MAX_REOCR_THRESHOLD
+            min_angle (float): smaller skew is ignored
+            min_lines (int): minimal number of text lines needed to estimate the skew
+        """
+        if not 0 <= reocr_threshold <= MAX_REOCR_THRESHOLD:
+            raise ValueError(f"reocr_threshold must be in [0, {MAX_REOCR_THRESHOLD}], got {reocr_threshold}")
+        self.backend = backend
+        self.reocr_threshold = reocr_threshold
+        self.min_angle = min_angle
+        self.min_lines = min_lines
+
+    def init_worker(self) -> None:
+        self.backend.init_worker()
+
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            'backend': type(self.backend).__name__,
+            'config': self.backend.get_config(),
+            'reocr_threshold': self.reocr_threshold,
+            'min_angle': self.min_angle,
+            'min_lines': self.min_lines,
+        }
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        box = self.backend.run_ocr_to_box(img, *args, **kwargs)
+        angle = box_functions.estimate_skew_angle(box, min_lines=self.min_lines)
+        if angle is None or abs(angle) < self.min_angle:
+            return box
+
+        if abs(angle) > self.reocr_threshold:
+            logger.debug(f"Skew {angle:.2f} estimated from OCR results, running OCR on rotated image.")
+            box = self.backend.run_ocr_to_box(rotate_cv2(img, angle, SKEW_CORRECTION_BACKGROUND), *args, **kwargs)
+        else:
+            box_functions.rotate_box_coordinates(box, angle, img)
+        box.additional_data[SKEW_ANGLE_KEY] = angle
+        return box
@@ -1,5 +1,5 @@
 
-from typing import Optional
+from typing import Optional, Dict, Any
 
 import numpy as np
 import pandas as pd
@@ -22,6 +22,9 @@ class TesseractBackend(OCRBackend):
         df = self.run_ocr_to_dataframe(img, config)
         return self.dataframe_to_box(df)
 
+    def get_config(self) -> Dict[str, Any]:
+        return {'config': self.config}
+
     def run_ocr_to_dataframe(self, img: np.ndarray, config: Optional[str]) -> pd.DataFrame:
         if config is None:
             config = self.config
@@ -0,0 +1,228 @@
+import difflib
+import math
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .backend import OCRBackend
+from mim_ocr.data_model import Box
+
+# Key of additional_data of the root box with the number of tiles the image was split into.
+TILES_KEY = 'tiles'
+# Longer side of tiles. A4 pages scanned with 300 DPI fit into a single tile, so they are not split.
+DEFAULT_TILE_SIZE = 3500
+# Overlap of neighbouring tiles, should be larger than lines of text and most words, so that every word
+# is whole in some tile.
+DEFAULT_TILE_OVERLAP = 300
+# Words found in overlapping tiles are duplicates when their boxes have at least this IoU
+# and their texts at least this similarity (see text_similarity).
+DEFAULT_DUPLICATE_IOU = 0.5
+DEFAULT_DUPLICATE_TEXT_SIMILARITY = 0.5
+# Words closer than this (in pixels) to an edge of the tile inside the image are cut by it.
+CUT_WORD_MARGIN = 2
+
+# left, top, right, bottom
+Tile = Tuple[int, int, int, int]
+
+
+class TilingBackend(OCRBackend):
+    """Runs the backend on overlapping tiles of large images (e.g. engineering drawings, large-format scans),
+    which would take too much memory and time of tesseract or exceed payload limits of cloud backends.
+
+    Results of tiles are translated to coordinates of the image and merged into one tree. Words found twice
+    in overlaps of tiles (similar boxes and texts) are deduplicated, keeping the one farther from the edge
+    of its tile, as words cut by the edge are recognized partially. Parts of words cut by the edge of a tile
+    are removed when a word of the neighbouring tile covers them. Boxes left without text are removed.
+    Lines and blocks crossing edges of tiles may be split into parts coming from different tiles.
+    """
+
+    def __init__(self, backend: OCRBackend, tile_size: int = DEFAULT_TILE_SIZE,
+                 overlap: int = DEFAULT_TILE_OVERLAP, iou_threshold: float = DEFAULT_DUPLICATE_IOU,
+                 text_similarity_threshold: float = DEFAULT_DUPLICATE_TEXT_SIMILARITY, n_workers: int = 1) -> None:
+        """
+        Args:
+            backend (OCRBackend): backend run on tiles
+            tile_size (int): maximal width and height of tiles, smaller images are passed to backend unchanged
+            overlap (int): overlap (in pixels) of neighbouring tiles
+            iou_threshold (float): minimal IoU of boxes of duplicated words
+            text_similarity_threshold (float): minimal similarity of texts of duplicated words
+            n_workers (int): number of parallel calls of the backend on tiles
+        """
+        if not 0 <= overlap < tile_size // 2:
+            raise ValueError(f"Overlap must be in [0, tile_size / 2), got {overlap} for tile size {tile_size}")
+        self.backend = backend
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.iou_threshold = iou_threshold
+        self.text_similarity_threshold = text_similarity_threshold
+        self.n_workers = n_workers
+
+    def init_worker(self) -> None:
+        self.backend.init_worker()
+
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            'backend': type(self.backend).__name__,
+            'config': self.backend.get_config(),
+            'tile_size': self.tile_size,
+            'overlap': self.overlap,
+            'iou_threshold': self.iou_threshold,
+            'text_similarity_threshold': self.text_similarity_threshold,
+        }
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        """Args and kwargs are passed to the backend."""
+        height, width = img.shape[:2]
+        if width <= self.tile_size and height <= self.tile_size:
+            return self.backend.run_ocr_to_box(img, *args, **kwargs)
+
+        tiles = get_tiles(width, height, self.tile_size, self.overlap)
+        tile_boxes = self.backend.run_ocr_to_boxes([img[top:bottom, left:right] for left, top, right, bottom in tiles],
+                                                   *args, n_workers=self.n_workers, **kwargs)
+        for (left, top, _, _), tile_box in zip(tiles, tile_boxes):
+            tile_box.translate(left, top)
+
+        n_duplicates = remove_duplicated_words(tiles, tile_boxes, (width, height), self.iou_threshold,
+                                               self.text_similarity_threshold)
+        logger.debug(f"Image split into {len(tiles)} tiles, {n_duplicates} duplicated words removed.")
+
+        box = Box.create_root_box()
+        for tile_box in tile_boxes:
+            for child in list(tile_box.children):
+                Box.add_child(box, child)
+        box.additional_data[TILES_KEY] = len(tiles)
+        return box
+
+
+def get_tiles(width: int, height: int, tile_size: int, overlap: int) -> List[Tile]:
+    """Returns grid of tiles (row by row) of equal size, not larger than tile_size, covering the image,
+    with neighbouring tiles overlapping by at least overlap pixels."""
+    xs = _get_tile_ranges(width, tile_size, overlap)
+    ys = _get_tile_ranges(height, tile_size, overlap)
+    return [(left, top, right, bottom) for top, bottom in ys for left, right in xs]
+
+
+def _get_tile_ranges(length: int, tile_size: int, overlap: int) -> List[Tuple[int, int]]:
+    if length <= tile_size:
+        return [(0, length)]
+    n_tiles = math.ceil((length - overlap) / (tile_size - overlap))
+    size = math.ceil((length + (n_tiles - 1) * overlap) / n_tiles)
+    starts = np.linspace(0, length - size, n_tiles).round().astype(int)
+    return [(int(start), int(start) + size) for start in starts]
+
+
+def text_similarity(text: str, other_text: str) -> float:
+    """Returns similarity of texts from 0 to 1, e.g. of a word and its part cut by the edge of a tile."""
+    return difflib.SequenceMatcher(None, text, other_text, autojunk=False).ratio()
+
+
+def remove_duplicated_words(tiles: List[Tile], tile_boxes: List[Box], image_size: Tuple[int, int],
+                            iou_threshold: float = DEFAULT_DUPLICATE_IOU,
+                            text_similarity_threshold: float = DEFAULT_DUPLICATE_TEXT_SIMILARITY) -> int:
+    """Removes words (boxes with text and without children) found in more than one tile from results
+    of tiles (in coordinates of the image), keeping the one farther from the edge of its tile, and parts
+    of words cut by the edge of a tile covered (at least iou_threshold of their area) by a word of another tile.
+    Ancestors of removed words left without text are removed too. Returns the number of removed words."""
+    words = [[b for b in tile_box.preorder_traversal() if not b.children and b.text.strip()]
+             for tile_box in tile_boxes]
+    edge_distances = [_get_edge_distances(tile, tile_words, image_size) for tile, tile_words in zip(tiles, words)]
+
+    removed: Set[int] = set()
+    for i in range(len(tiles)):
+        for j in range(i + 1, len(tiles)):
+            overlap = _intersect(tiles[i], tiles[j])
+            if overlap is None:
+                continue
+            words_i = [k for k, w in enumerate(words[i]) if _intersect(_coordinates(w), overlap) is not None]
+            words_j = [k for k, w in enumerate(words[j]) if _intersect(_coordinates(w), overlap) is not None]
+            if not words_i or not words_j:
+                continue
+            intersection, area_i, area_j = _intersection_matrix([_coordinates(words[i][k]) for k in words_i],
+                                                                [_coordinates(words[j][k]) for k in words_j])
+            union = area_i + area_j - intersection
+            ious = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+            # the best matching pairs first
+            for a, b in zip(*np.unravel_index(np.argsort(-ious, axis=None), ious.shape)):
+                if ious[a, b] < iou_threshold:
+                    break
+                word_i, word_j = words[i][words_i[a]], words[j][words_j[b]]
+                if id(word_i) in removed or id(word_j) in removed:
+                    continue
+                if text_similarity(word_i.text, word_j.text) < text_similarity_threshold:
+                    continue
+                keep_i = edge_distances[i][words_i[a]] >= edge_distances[j][words_j[b]]
+                removed.add(id(word_j) if keep_i else id(word_i))
+
+            coverage_i = np.divide(intersection, area_i, out=np.zeros_like(intersection), where=area_i > 0)
+            coverage_j = np.divide(intersection, area_j, out=np.zeros_like(intersection), where=area_j > 0)
+            for a, k in enumerate(words_i):
+                if edge_distances[i][k] <= CUT_WORD_MARGIN and _is_covered(coverage_i[a, :], words[j], words_j,
+                                                                           removed, iou_threshold):
+                    removed.add(id(words[i][k]))
+            for b, k in enumerate(words_j):
+                if edge_distances[j][k] <= CUT_WORD_MARGIN and _is_covered(coverage_j[:, b], words[i], words_i,
+                                                                           removed, iou_threshold):
+                    removed.add(id(words[j][k]))
+
+    for tile_box, tile_words in zip(tile_boxes, words):
+        for word in tile_words:
+            if id(word) in removed:
+                _remove_with_empty_ancestors(word, tile_box)
+    return len(removed)
+
+
+def _is_covered(coverage: np.ndarray, words: List[Box], indices: List[int], removed: Set[int],
+                threshold: float) -> bool:
+    return any(c >= threshold and id(words[k]) not in removed for c, k in zip(coverage, indices))
+
+
+def _remove_with_empty_ancestors(box: Box, root_box: Box) -> None:
+    parent = box.parent
+    parent.children.remove(box)
+    if root_box.box_dict is not None:
+        root_box.box_dict.pop(box.box_id, None)
+    if parent is not root_box and not parent.has_any_text():
+        _remove_with_empty_ancestors(parent, root_box)
+
+
+def _get_edge_distances(tile: Tile, words: List[Box], image_size: Tuple[int, int]) -> List[float]:
+    """Returns distances of words to edges of the tile inside the image (edges of the image do not cut words)."""
+    left, top, right, bottom = tile
+    width, height = image_size
+    distances = []
+    for w in words:
+        distance = math.inf
+        if left > 0:
+            distance = min(distance, w.left - left)
+        if top > 0:
+            distance = min(distance, w.top - top)
+        if right < width:
+            distance = min(distance, right - w.right)
+        if bottom < height:
+            distance = min(distance, bottom - w.bottom)
+        distances.append(distance)
+    return distances
+
+
+def _coordinates(box: Box) -> Tile:
+    return box.left, box.top, box.right, box.bottom
+
+
+def _intersect(a: Tile, b: Tile) -> Optional[Tile]:
+    left, top = max(a[0], b[0]), max(a[1], b[1])
+    right, bottom = min(a[2], b[2]), min(a[3], b[3])
+    if left >= right or top >= bottom:
+        return None
+    return left, top, right, bottom
+
+
+def _intersection_matrix(boxes: List[Tile], other_boxes: List[Tile]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns areas of intersections of every pair of boxes and areas of boxes (broadcastable to the former)."""
+    a = np.array(boxes, dtype=np.float64)[:, None, :]
+    b = np.array(other_boxes, dtype=np.float64)[None, :, :]
+    intersection = (np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+                    * np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None))
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return intersection, area_a, area_b
@@ -35,6 +35,8 @@ class BoxType(Enum):
     AWS_BLOCK_PAGE = 100
     AWS_BLOCK_LINE = 101
     AWS_BLOCK_WORD = 102
+    PDF_TEXT_LINE = 111
+    PDF_TEXT_WORD = 112
 
 
 PRECEDING_BOX_TYPES: Dict[BoxType, Optional[BoxType]] = {
@@ -49,8 +51,13 @@ PRECEDING_BOX_TYPES: Dict[BoxType, Optional[BoxType]] = {
     BoxType.GCP_BLOCK_TEXT: BoxType.GCP_DOCUMENT,
     BoxType.GCP_BLOCK_PARAGRAPH: BoxType.GCP_BLOCK_TEXT,
     BoxType.GCP_BLOCK_WORD: BoxType.GCP_BLOCK_PARAGRAPH,
+    BoxType.PDF_TEXT_LINE: BoxType.PREDICTED_PAGE,
+    BoxType.PDF_TEXT_WORD: BoxType.PDF_TEXT_LINE,
 }
 
+# Box types of technical boxes which do not have meaningful coordinates (set to -1).
+BOX_TYPES_WITHOUT_COORDINATES = (BoxType.ROOT_BOX, BoxType.PREDICTED_PAGE)
+
 
 class Box:
     def __init__(self,
@@ -258,6 +265,35 @@ class Box:
                 raise ValueError("You cannot have two root boxes in one tree")
             root_box.box_dict[box.box_id] = box
 
+    def replace_children(self, children: List['Box']) -> None:
+        """Replaces children of the box with given boxes (e.g. children of a root box of OCR results)."""
+        root_box = self.get_root()
+        if root_box.box_dict is not None:
+            for child in self.children:
+                for box in child.preorder_traversal():
+                    root_box.box_dict.pop(box.box_id, None)
+        self.children = []
+        for child in children:
+            Box.add_child(self, child)
+
+    def translate(self, dx: float, dy: float) -> None:
+        """Moves the box and all its subboxes by (dx, dy)."""
+        for b in self.preorder_traversal():
+            if b.box_type in BOX_TYPES_WITHOUT_COORDINATES:
+                continue
+            b.left, b.right = int(round(b.left + dx)), int(round(b.right + dx))
+            b.top, b.bottom = int(round(b.top + dy)), int(round(b.bottom + dy))
+
+    def scale(self, fx: float, fy: Optional[float] = None) -> None:
+        """Multiplies coordinates of the box and all its subboxes by fx (horizontally) and fy (vertically)."""
+        if fy is None:
+            fy = fx
+        for b in self.preorder_traversal():
+            if b.box_type in BOX_TYPES_WITHOUT_COORDINATES:
+                continue
+            b.left, b.right = int(round(b.left * fx)), int(round(b.right * fx))
+            b.top, b.bottom = int(round(b.top * fy)), int(round(b.bottom * fy))
+
     @staticmethod
     def from_dataframe(df: pd.DataFrame) -> 'Box':
         """
@@ -1,39 +1,60 @@
-from typing import Optional
+import math
+from typing import Optional, List
+import cv2
 import numpy as np
 
 from mim_ocr.backends import OCRBackend
 from mim_ocr.data_model import Box
-from mim_ocr.data_model.box import BoxType
+from mim_ocr.data_model.box import BoxType, BOX_TYPES_WITHOUT_COORDINATES
+from mim_ocr.preprocessing.deskew import get_rotation_matrix_cv2
+
+# Word boxes used to estimate the skew of text lines (see estimate_skew_angle).
+SKEW_ESTIMATION_WORD_TYPES = (BoxType.TESSERACT_WORD, BoxType.AWS_BLOCK_WORD, BoxType.GCP_BLOCK_WORD)
 
 
 def run_ocr_on_box(backend: OCRBackend, img: np.ndarray,
                    box: Box, box_type: Optional[BoxType] = None,
-                   *args, **kwargs) -> Box:
+                   *args, n_workers: int = 1, **kwargs) -> Box:
     """
         Run OCR algorithm on the whole box structure.
 
-        For each of subboxes we run OCR algorithm.
+        For each of subboxes we run OCR algorithm. All crops are collected first and passed to
+        the backend at once (see OCRBackend.run_ocr_to_boxes), then the results are put back into the tree.
+        When subboxes of a recomputed box are also matching, only the outermost box is recomputed
+        (its children are replaced anyway).
 
         Args:
             backend (OCRBackend)
-            img (np.ndarray): An original image.
+            img (np.ndarray): An original image (with one or three channels).
             box (Box): Root box computed on img.
             box_type (Optional[BoxType]): Run OCR only on boxes with this type.
+            n_workers (int): Number of parallel backend calls.
     """
     assert box.box_type == BoxType.ROOT_BOX
 
-    # reverse order is necessary, because we modify the children
-    for b in box.reverse_order_traversal():
+    target_boxes = [b for b in _find_outermost_boxes(box, box_type) if crop_box_image(img, b).size > 0]
+    new_boxes = backend.run_ocr_to_boxes([crop_box_image(img, b) for b in target_boxes],
+                                         *args, n_workers=n_workers, **kwargs)
 
-        if (box_type is not None) and (b.box_type != box_type):
-            continue
+    for b, new_b in zip(target_boxes, new_boxes):
+        update_box_with_ocr_result(backend, b, new_b)
 
-        if b.box_type == BoxType.ROOT_BOX:
-            continue
+    return box
 
-        run_ocr_on_single_box(backend, img, b, *args, **kwargs)
 
-    return box
+def _find_outermost_boxes(box: Box, box_type: Optional[BoxType]) -> List[Box]:
+    found_boxes = []
+    for child in box.children:
+        if box_type is None or child.box_type == box_type:
+            found_boxes.append(child)
+        else:
+            found_boxes.extend(_find_outermost_boxes(child, box_type))
+    return found_boxes
+
+
+def crop_box_image(img: np.ndarray, box: Box) -> np.ndarray:
+    """Returns part of the image covered by the box. Works both for single- and multi-channel images."""
+    return img[max(box.top, 0):max(box.bottom, 0), max(box.left, 0):max(box.right, 0)]
 
 
 # In OCR-37 move as a method of OCRBackend class.
@@ -44,19 +65,161 @@ def run_ocr_on_single_box(backend: OCRBackend, img: np.ndarray,
         When the new structure is identified on the box, we replace
         the children of the box by the newly identified children and reset the old text.
     """
-    new_b = backend.run_ocr_to_box(img[box.top:box.bottom, box.left:box.right, :], *args, **kwargs)
+    new_b = backend.run_ocr_to_box(crop_box_image(img, box), *args, **kwargs)
+    return update_box_with_ocr_result(backend, box, new_b)
 
+
+def update_box_with_ocr_result(backend: OCRBackend, box: Box, new_b: Box) -> Box:
     # We have to update the identified coordinates
-    for b_elem in new_b.preorder_traversal():
-        b_elem.top = box.top + b_elem.top
-        b_elem.bottom = box.top + b_elem.bottom
-        b_elem.left = box.left + b_elem.left
-        b_elem.right = box.left + b_elem.right
+    new_b.translate(max(box.left, 0), max(box.top, 0))
 
     if len(new_b.children) > 0:
-        box.children = new_b.children
+        box.replace_children(new_b.children)
         box.text = ''
         info_dict = {"recomputed_ocr": backend.__class__.__name__}
         box.additional_data.update(info_dict)
 
     return box
+
+
+def run_ocr_on_boxes_mosaic(backend: OCRBackend, img: np.ndarray, boxes: List[Box], *args,
+                            separator_height: int = 20, padding: int = 10, max_mosaic_height: int = 10000,
+                            background: int = 255, **kwargs) -> List[Box]:
+    """ Run OCR algorithm on many (small) boxes at once.
+
+        Crops of the boxes are stacked one under another (separated by background stripes) into a tall mosaic
+        image, so the backend is called once per mosaic instead of once per box. Recognized words (leaves
+        of the result tree) are assigned to the boxes by their vertical position and replace children of
+        the boxes like in run_ocr_on_single_box.
+
+        Useful for re-running tesseract on many lines - use a config treating the mosaic as
+        a block of text, e.g. '--oem 1 --psm 6 -l pol'.
+
+        Args:
+            backend (OCRBackend)
+            img (np.ndarray): An original image (with one or three channels).
+            boxes (List[Box]): boxes from the tree computed on img.
+            separator_height (int): height of stripes of background between crops.
+            padding (int): margin of background on the left and right side of crops.
+            max_mosaic_height (int): boxes are split into many mosaics not higher than this value.
+            background (int): color of separators (should match background of the image).
+    """
+    boxes = [b for b in boxes if crop_box_image(img, b).size > 0]
+
+    chunk: List[Box] = []
+    chunk_height = separator_height
+    for b in boxes:
+        box_height = crop_box_image(img, b).shape[0] + separator_height
+        if chunk and chunk_height + box_height > max_mosaic_height:
+            _run_ocr_on_mosaic(backend, img, chunk, separator_height, padding, background, *args, **kwargs)
+            chunk, chunk_height = [], separator_height
+        chunk.append(b)
+        chunk_height += box_height
+    if chunk:
+        _run_ocr_on_mosaic(backend, img, chunk, separator_height, padding, background, *args, **kwargs)
+
+    return boxes
+
+
+def _run_ocr_on_mosaic(backend: OCRBackend, img: np.ndarray, boxes: List[Box],
+                       separator_height: int, padding: int, background: int, *args, **kwargs) -> None:
+    crops = [crop_box_image(img, b) for b in boxes]
+    mosaic_height = sum(crop.shape[0] for crop in crops) + separator_height * (len(crops) + 1)
+    mosaic_width = max(crop.shape[1] for crop in crops) + 2 * padding
+    mosaic = np.full((mosaic_height, mosaic_width) + img.shape[2:], background, dtype=img.dtype)
+
+    crop_tops = []
+    y = separator_height
+    for crop in crops:
+        mosaic[y:y + crop.shape[0], padding:padding + crop.shape[1]] = crop
+        crop_tops.append(y)
+        y += crop.shape[0] + separator_height
+
+    new_b = backend.run_ocr_to_box(mosaic, *args, **kwargs)
+
+    words_per_box: List[List[Box]] = [[] for _ in boxes]
+    for word in new_b.preorder_traversal():
+        if word.children or not word.text.strip():
+            continue
+        center = (word.top + word.bottom) / 2
+        distances = [max(top - center, center - (top + crop.shape[0]), 0) for top, crop in zip(crop_tops, crops)]
+        i = distances.index(min(distances))
+        word.translate(max(boxes[i].left, 0) - padding, max(boxes[i].top, 0) - crop_tops[i])
+        word.parent = None
+        words_per_box[i].append(word)
+
+    for b, words in zip(boxes, words_per_box):
+        if words:
+            b.replace_children(words)
+            b.text = ''
+            b.additional_data.update({"recomputed_ocr": backend.__class__.__name__})
+
+
+def estimate_skew_angle(box: Box, min_lines: int = 3, min_words_per_line: int = 3) -> Optional[float]:
+    """Estimates skew of the text (in degrees, like in deskew_cv2) from coordinates of OCR-ed words.
+
+    A straight line is fitted to the centers of words of every text line (words with a common parent,
+    e.g. TESSERACT_LINE, which follow each other horizontally and overlap vertically).
+    Returns median of line angles weighted by line widths, or None if there are less than min_lines lines.
+    """
+    words_by_parent = {}
+    for b in box.preorder_traversal():
+        if b.box_type in SKEW_ESTIMATION_WORD_TYPES and b.text and b.text.strip() and b.parent is not None:
+            words_by_parent.setdefault(b.parent.box_id, []).append(b)
+
+    angles, widths = [], []
+    for words in words_by_parent.values():
+        words = sorted(words, key=lambda w: w.left)
+        if len(words) < min_words_per_line or not all(
+                w1.bottom > w2.top and w2.bottom > w1.top for w1, w2 in zip(words, words[1:])):
+            continue
+        xs = np.array([(w.left + w.right) / 2 for w in words])
+        ys = np.array([(w.top + w.bottom) / 2 for w in words])
+        if xs[-1] == xs[0]:
+            continue
+        slope = np.polyfit(xs, ys, 1)[0]
+        angles.append(math.degrees(math.atan(slope)))
+        widths.append(words[-1].right - words[0].left)
+
+    if len(angles) < min_lines:
+        return None
+    order = np.argsort(angles)
+    cumulative_widths = np.cumsum(np.array(widths)[order])
+    return float(np.array(angles)[order][np.searchsorted(cumulative_widths, cumulative_widths[-1] / 2)])
+
+
+def rotate_box_coordinates(box: Box, angle: float, img: np.ndarray) -> None:
+    """Moves box and its subboxes to the coordinates of the image rotated with rotate_cv2(img, angle, ...).
+
+    Centers of boxes are rotated. Sizes are computed assuming that boxes are bounding boxes of rectangles
+    skewed by the angle, so e.g. a text line keeps its height instead of growing by its skew.
+    Sizes are undefined for angles of 45 degrees, so large skew should be corrected by running OCR again.
+    """
+    rot_mat, _, _ = get_rotation_matrix_cv2(img, angle)
+    cos, sin = abs(math.cos(math.radians(angle))), abs(math.sin(math.radians(angle)))
+    for b in box.preorder_traversal():
+        if b.box_type in BOX_TYPES_WITHOUT_COORDINATES:
+            continue
+        center_x, center_y = rot_mat @ np.array([(b.left + b.right) / 2, (b.top + b.bottom) / 2, 1.0])
+        width, height = b.right - b.left, b.bottom - b.top
+        # inverse of: width = w * cos + h * sin, height = w * sin + h * cos
+        w = max((width * cos - height * sin) / (cos ** 2 - sin ** 2), 1.0)
+        h = max((height * cos - width * sin) / (cos ** 2 - sin ** 2), 1.0)
+        b.left, b.right = int(round(center_x - w / 2)), int(round(center_x + w / 2))
+        b.top, b.bottom = int(round(center_y - h / 2)), int(round(center_y + h / 2))
+
+
+def unrotate_box_coordinates(box: Box, angle: float, img: np.ndarray) -> None:
+    """Moves box and its subboxes from the coordinates of the image rotated with rotate_cv2(img, angle, ...)
+    back to the coordinates of img (the inverse of rotate_box_coordinates)."""
+    rot_mat, _, _ = get_rotation_matrix_cv2(img, angle)
+    inverse_rot_mat = cv2.invertAffineTransform(rot_mat)
+    cos, sin = abs(math.cos(math.radians(angle))), abs(math.sin(math.radians(angle)))
+    for b in box.preorder_traversal():
+        if b.box_type in BOX_TYPES_WITHOUT_COORDINATES:
+            continue
+        center_x, center_y = inverse_rot_mat @ np.array([(b.left + b.right) / 2, (b.top + b.bottom) / 2, 1.0])
+        w, h = b.right - b.left, b.bottom - b.top
+        width, height = w * cos + h * sin, w * sin + h * cos
+        b.left, b.right = int(round(center_x - width / 2)), int(round(center_x + width / 2))
+        b.top, b.bottom = int(round(center_y - height / 2)), int(round(center_y + height / 2))
@@ -1 +1,2 @@
-from .image import open_image, open_pdf, write_image
+from .image import open_image, open_pdf, iter_pdf_pages, write_image, is_pdf, get_number_of_pages, \
+    is_multi_page_document, DEFAULT_PDF_DPI
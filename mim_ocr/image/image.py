@@ -1,29 +1,133 @@
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional
 
 import cv2
 import numpy as np
 import pdf2image
 from PIL import Image
 
+# Default resolution of pdf2image.
+DEFAULT_PDF_DPI = 200
+# Number of pages rendered by one call of pdftoppm in iter_pdf_pages.
+DEFAULT_PDF_PAGES_PER_CHUNK = 4
+# Modes of PIL images kept as single channel by open_image(keep_grayscale=True).
+GRAYSCALE_MODES = ('1', 'L')
+# Modes of PIL images decoded by cv2.imread the same way as by PIL (other modes are converted by PIL).
+CV2_DECODED_MODES = ('1', 'L', 'P', 'RGB', 'RGBA', 'LA')
+# cv2.imread flags for (color, grayscale) images by reduce factor.
+IMREAD_FLAGS = {
+    1: {False: cv2.IMREAD_COLOR, True: cv2.IMREAD_GRAYSCALE},
+    2: {False: cv2.IMREAD_REDUCED_COLOR_2, True: cv2.IMREAD_REDUCED_GRAYSCALE_2},
+    4: {False: cv2.IMREAD_REDUCED_COLOR_4, True: cv2.IMREAD_REDUCED_GRAYSCALE_4},
+    8: {False: cv2.IMREAD_REDUCED_COLOR_8, True: cv2.IMREAD_REDUCED_GRAYSCALE_8},
+}
 
-def open_image(path: Path) -> np.ndarray:
+
+def open_image(path: Path, frame: int = 0, keep_grayscale: bool = False, reduce: int = 1) -> np.ndarray:
     """ Opens image from path as cv2 matrix.
-        Using PIL.Image as a proxy here gives us support for all image formats supported by tesseract:
+        Most images are decoded directly with cv2.imread, without intermediate copies.
+        Other images (e.g. 16-bit, CMYK or next frames) are opened using PIL.Image as a proxy,
+        which gives us support for all image formats supported by tesseract:
         https://github.com/tesseract-ocr/tessdoc/blob/main/InputFormats.md
+
+    Args:
+        path (Path): path to image
+        frame (int): page of multi-frame images (e.g. TIFF)
+        keep_grayscale (bool): return grayscale and bilevel images as single channel arrays instead of BGR
+        reduce (int): 1, 2, 4 or 8, decode image with resolution reduced this many times
+                      (decoding of JPEGs is then faster), e.g. for thumbnails
     """
+    if reduce not in IMREAD_FLAGS:
+        raise ValueError(f"Unsupported reduce factor: {reduce}")
+
     with Image.open(path) as pil_image:
-        return pil_image_to_cv2(pil_image)
+        grayscale = keep_grayscale and pil_image.mode in GRAYSCALE_MODES
+        if frame == 0 and pil_image.mode in CV2_DECODED_MODES:
+            # only JPEGs are decoded with reduced resolution, other formats would be subsampled with aliasing
+            imread_reduce = reduce if pil_image.format == 'JPEG' else 1
+            img = cv2.imread(str(path), IMREAD_FLAGS[imread_reduce][grayscale] | cv2.IMREAD_IGNORE_ORIENTATION)
+            if img is not None:
+                if imread_reduce != reduce:
+                    size = (-(-img.shape[1] // reduce), -(-img.shape[0] // reduce))
+                    img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+                return img
+        if frame:
+            pil_image.seek(frame)
+        return _pil_image_to_array(pil_image, grayscale, reduce)
+
+
+def _pil_image_to_array(pil_image: Image, grayscale: bool, reduce: int) -> np.ndarray:
+    mode = 'L' if grayscale else 'RGB'
+    width = pil_image.size[0]
+    if reduce > 1:
+        # reduced resolution decoding of JPEGs, no-op for other formats
+        pil_image.draft(mode, (pil_image.size[0] // reduce, pil_image.size[1] // reduce))
+    if pil_image.mode != mode:
+        pil_image = pil_image.convert(mode)
+    factor = round(pil_image.size[0] * reduce / width)
+    if factor > 1:
+        pil_image = pil_image.reduce(factor)
+    if grayscale:
+        return np.array(pil_image)
+    return cv2.cvtColor(np.asarray(pil_image), cv2.COLOR_RGB2BGR)
+
+
+def is_pdf(path: Path) -> bool:
+    return Path(path).suffix.lower() == '.pdf'
+
+
+def get_number_of_pages(path: Path) -> int:
+    """Returns number of pages of PDF or number of frames of image (e.g. multi-page TIFF)."""
+    if is_pdf(path):
+        return pdf2image.pdfinfo_from_path(path)['Pages']
+    with Image.open(path) as pil_image:
+        return getattr(pil_image, 'n_frames', 1)
+
+
+def is_multi_page_document(path: Path) -> bool:
+    """PDFs are always treated as documents, even if they have a single page."""
+    return is_pdf(path) or get_number_of_pages(path) > 1
 
 
 def pil_image_to_cv2(pil_image: Image) -> np.ndarray:
     # based on https://stackoverflow.com/questions/14134892/convert-image-from-pil-to-opencv-format
-    return cv2.cvtColor(np.array(pil_image.convert('RGB')), cv2.COLOR_RGB2BGR)
+    if pil_image.mode != 'RGB':
+        pil_image = pil_image.convert('RGB')
+    return cv2.cvtColor(np.asarray(pil_image), cv2.COLOR_RGB2BGR)
+
 
+def open_pdf(path: Path, **kwargs) -> List[np.ndarray]:
+    """Rasterizes all pages of PDF at once. Keyword arguments are passed to iter_pdf_pages,
+    which should be preferred for long documents."""
+    return list(iter_pdf_pages(path, **kwargs))
 
-def open_pdf(path: Path) -> List[np.ndarray]:
-    return [pil_image_to_cv2(pil_image)
-            for pil_image in pdf2image.convert_from_path(path)]
+
+def iter_pdf_pages(path: Path, dpi: int = DEFAULT_PDF_DPI, first_page: Optional[int] = None,
+                   last_page: Optional[int] = None, grayscale: bool = False, thread_count: int = 1,
+                   pages_per_chunk: int = DEFAULT_PDF_PAGES_PER_CHUNK) -> Iterator[np.ndarray]:
+    """Yields rasterized pages of PDF one by one.
+
+    Pages are rendered in ranges of pages_per_chunk pages, so only a few pages are kept in memory
+    regardless of the length of the document.
+
+    Args:
+        path (Path): path to PDF file
+        dpi (int): resolution of rendered pages
+        first_page (Optional[int]): first rendered page, numbered from 1 (like in pdftoppm)
+        last_page (Optional[int]): last rendered page (inclusive), by default the last page of the document
+        grayscale (bool): if True, single channel images are returned instead of BGR
+        thread_count (int): number of pdftoppm processes rendering a chunk in parallel
+        pages_per_chunk (int): number of pages rendered by one call of pdf2image.convert_from_path
+    """
+    if last_page is None:
+        last_page = pdf2image.pdfinfo_from_path(path)['Pages']
+    for chunk_first_page in range(first_page or 1, last_page + 1, pages_per_chunk):
+        pil_images = pdf2image.convert_from_path(path, dpi=dpi, first_page=chunk_first_page,
+                                                 last_page=min(chunk_first_page + pages_per_chunk - 1, last_page),
+                                                 grayscale=grayscale, thread_count=thread_count)
+        while pil_images:
+            pil_image = pil_images.pop(0)
+            yield np.array(pil_image) if grayscale else pil_image_to_cv2(pil_image)
 
 
 def write_image(img: np.ndarray, path: Path):
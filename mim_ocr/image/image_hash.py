@@ -0,0 +1,52 @@
+import hashlib
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from mim_ocr.image.image import open_image
+
+# Width and height of the thumbnail compared by average_hash, the hash has HASH_SIZE ** 2 bits.
+# Document pages differ mostly in small details, so the thumbnail is larger than the usual 8x8.
+HASH_SIZE = 16
+# Images are decoded with resolution reduced as much as possible (see open_image), but not below this size,
+# as hashes of too small thumbnails depend on their resolution.
+HASH_MIN_DECODED_SIZE = 256
+FILE_HASH_CHUNK_SIZE = 1024 ** 2
+
+
+def file_hash(path: Path) -> str:
+    """Returns SHA-256 of the content of the file."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(FILE_HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def average_hash(image: np.ndarray, hash_size: int = HASH_SIZE) -> np.ndarray:
+    """Returns perceptual average hash of the image as packed bits (array of hash_size ** 2 / 8 bytes).
+
+    The image is downscaled to hash_size x hash_size pixels and every bit tells whether a pixel is darker
+    than the mean. The hash does not change with resolution, compression, noise or brightness, so rescans
+    and re-uploads of the same page have similar hashes (see hamming_distance). Difference hash (comparing
+    neighbouring pixels) is not used, as its bits are random in white areas, which cover most of a page.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    # float thumbnail, as rounding to integers makes bits of pixels close to the mean unstable
+    thumbnail = cv2.resize(gray.astype(np.float32), (hash_size, hash_size), interpolation=cv2.INTER_AREA)
+    return np.packbits(thumbnail < thumbnail.mean())
+
+
+def file_average_hash(path: Path, hash_size: int = HASH_SIZE) -> np.ndarray:
+    """Returns average_hash of the (first page of) image file, decoded with reduced resolution."""
+    with Image.open(path) as pil_image:
+        min_size = min(pil_image.size)
+    reduce = max((r for r in (1, 2, 4, 8) if min_size / r >= HASH_MIN_DECODED_SIZE), default=1)
+    return average_hash(open_image(path, keep_grayscale=True, reduce=reduce), hash_size)
+
+
+def hamming_distance(image_hash: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+    """Returns numbers of different bits between image_hash and every row of hashes (2D array of packed hashes)."""
+    return np.unpackbits(np.bitwise_xor(hashes, image_hash), axis=-1).sum(axis=-1)
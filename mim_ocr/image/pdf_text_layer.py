@@ -0,0 +1,57 @@
+import subprocess
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+from typing import Optional
+
+from mim_ocr.data_model import Box
+from mim_ocr.data_model.box import BoxType
+from mim_ocr.image.image import DEFAULT_PDF_DPI
+
+PDF_POINTS_PER_INCH = 72
+XHTML_NAMESPACE = '{http://www.w3.org/1999/xhtml}'
+# Pages with less letters in the text layer are treated as scans (e.g. with some header added by a printer).
+MIN_TEXT_LAYER_LETTERS = 20
+
+
+def extract_pdf_text_layer(path: Path, dpi: int = DEFAULT_PDF_DPI,
+                           first_page: Optional[int] = None, last_page: Optional[int] = None) -> Box:
+    """Extracts words with coordinates embedded in PDF with poppler's pdftotext (no OCR is run).
+
+    Returns root box with PREDICTED_PAGE box for every page (with PDF_TEXT_LINE and PDF_TEXT_WORD boxes inside),
+    in coordinates of the page rasterized with given dpi. first_page and last_page are numbered from 1,
+    like in pdf2image.
+    """
+    command = ['pdftotext', '-bbox-layout', '-enc', 'UTF-8']
+    if first_page is not None:
+        command += ['-f', str(first_page)]
+    if last_page is not None:
+        command += ['-l', str(last_page)]
+    command += [str(path), '-']
+    result = subprocess.run(command, capture_output=True, check=True)
+    return parse_pdftotext_bbox_layout(result.stdout.decode('utf-8'), dpi, first_page_number=(first_page or 1) - 1)
+
+
+def parse_pdftotext_bbox_layout(xhtml: str, dpi: int = DEFAULT_PDF_DPI, first_page_number: int = 0) -> Box:
+    scale = dpi / PDF_POINTS_PER_INCH
+    root_box = Box.create_root_box()
+    for i, page in enumerate(ElementTree.fromstring(xhtml).iter(f'{XHTML_NAMESPACE}page')):
+        page_size = (round(float(page.get('width')) * scale), round(float(page.get('height')) * scale))
+        page_box = Box.create_page_box(page_number=first_page_number + i, page_size=page_size)
+        Box.add_child(root_box, page_box)
+
+        for line in page.iter(f'{XHTML_NAMESPACE}line'):
+            line_box = _element_to_box(line, BoxType.PDF_TEXT_LINE, scale)
+            Box.add_child(page_box, line_box)
+            for word in line.iter(f'{XHTML_NAMESPACE}word'):
+                Box.add_child(line_box, _element_to_box(word, BoxType.PDF_TEXT_WORD, scale))
+    return root_box
+
+
+def _element_to_box(element: ElementTree.Element, box_type: BoxType, scale: float) -> Box:
+    return Box(left=round(float(element.get('xMin')) * scale), top=round(float(element.get('yMin')) * scale),
+               right=round(float(element.get('xMax')) * scale), bottom=round(float(element.get('yMax')) * scale),
+               conf=100.0, text=element.text if box_type == BoxType.PDF_TEXT_WORD else None, box_type=box_type)
+
+
+def has_usable_text_layer(page_box: Box, min_letters: int = MIN_TEXT_LAYER_LETTERS) -> bool:
+    return sum(not c.isspace() for c in page_box.get_full_text()) >= min_letters
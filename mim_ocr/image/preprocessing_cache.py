@@ -0,0 +1,131 @@
+import functools
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from mim_ocr.backends.cache import OCRCacheStore
+from mim_ocr.image.transformations import BOX_MAPPINGS_KEY, REFERENCE_IMAGE_KEY
+from mim_ocr.preprocessing.blank_page import BLANK_PAGE_KEY
+
+if TYPE_CHECKING:
+    from mim_ocr.pipeline.latency_budget import LatencyBudget
+
+# Change when results of transformations change, so that old entries are not used.
+PREPROCESSING_CACHE_VERSION = 1
+# Metadata entries which cannot be restored from cache. Box mappings are functions valid only for the images
+# of the current run, so results of transformations registering them (e.g. rescale) are never stored.
+NOT_CACHEABLE_METADATA_KEYS = ('path', BOX_MAPPINGS_KEY, REFERENCE_IMAGE_KEY)
+
+
+class CachingTransformations:
+    """Transformation running given transformations (in order) with their results stored in cache.
+
+    Results are keyed by a hash of input image pixels and names and parameters of transformations
+    (see get_transformation_description), so only deterministic transformations defined at module level
+    (possibly wrapped with functools.partial) may be cached.
+    The image and metadata set by transformations (e.g. angle, orientation) are stored after the longest
+    chain of transformations whose results can be restored (see NOT_CACHEABLE_METADATA_KEYS).
+    On later runs, only the transformations following the cached ones are run.
+    Counters of cache hits and misses are kept per process.
+    """
+
+    def __init__(self, transformations: List[Callable], store: OCRCacheStore) -> None:
+        self.transformations = transformations
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    def get_cache_keys(self, img: np.ndarray) -> List[str]:
+        """Returns keys of results of every prefix of transformations (of length 1, 2, ...) for img."""
+        img = np.ascontiguousarray(img)
+        image_hash = hashlib.sha256(json.dumps([img.shape, str(img.dtype)]).encode())
+        image_hash.update(img.data)
+
+        keys = []
+        key_hash = hashlib.sha256(f"{PREPROCESSING_CACHE_VERSION}:{image_hash.hexdigest()}".encode())
+        for t in self.transformations:
+            key_hash.update(json.dumps(get_transformation_description(t), sort_keys=True, default=repr).encode())
+            keys.append(key_hash.copy().hexdigest())
+        return keys
+
+    def __call__(self, img: np.ndarray, path: Path, metadata: Dict,
+                 budget: Optional['LatencyBudget'] = None) -> np.ndarray:
+        """If budget is given, transformations not restored from cache are cheapened or skipped when they run
+        late (see LatencyBudget.get_transformation). Results of a degraded transformation and the following ones
+        are not stored, as they differ from the results of the given transformations."""
+        keys = self.get_cache_keys(img)
+        initial_keys = set(metadata)
+
+        n_cached = 0
+        for n in range(len(self.transformations), 0, -1):
+            cached_value = self.store.get(keys[n - 1])
+            if cached_value is not None:
+                img, cached_metadata = decode_preprocessing_result(cached_value)
+                metadata.update(cached_metadata)
+                n_cached = n
+                break
+        if n_cached == len(self.transformations):
+            self.hits += 1
+            logger.debug(f"Preprocessing cache hit for {path}.")
+        else:
+            self.misses += 1
+
+        result_to_store: Optional[Tuple[int, np.ndarray, Dict[str, Any]]] = None
+        n_cacheable = n_cached
+        degraded = False
+        for i in range(n_cached, len(self.transformations)):
+            if metadata.get(BLANK_PAGE_KEY):
+                break
+            t = self.transformations[i]
+            if budget is not None:
+                t = budget.get_transformation(t)
+                degraded = degraded or t is not self.transformations[i]
+                if t is None:
+                    continue
+            img = t(img, path, metadata)
+            if n_cacheable == i and not degraded:
+                new_metadata = {key: value for key, value in metadata.items() if key not in initial_keys}
+                if _is_cacheable(new_metadata):
+                    n_cacheable = i + 1
+                    result_to_store = (n_cacheable, img, new_metadata)
+
+        if result_to_store is not None:
+            n, result_img, result_metadata = result_to_store
+            self.store.put(keys[n - 1], encode_preprocessing_result(result_img, result_metadata))
+        return img
+
+
+def get_transformation_description(transformation: Callable) -> Dict[str, Any]:
+    """Returns name and parameters of transformation (function or functools.partial)."""
+    if isinstance(transformation, functools.partial):
+        description = get_transformation_description(transformation.func)
+        description['args'] = list(description.get('args', [])) + list(transformation.args)
+        description['kwargs'] = {**description.get('kwargs', {}), **transformation.keywords}
+        return description
+    return {'name': f"{transformation.__module__}.{transformation.__qualname__}"}
+
+
+def encode_preprocessing_result(img: np.ndarray, metadata: Dict[str, Any]) -> bytes:
+    """Encodes image losslessly (PNG) with JSON metadata in the first line."""
+    return json.dumps(metadata).encode() + b'\n' + cv2.imencode('.png', img)[1].tobytes()
+
+
+def decode_preprocessing_result(value: bytes) -> Tuple[np.ndarray, Dict[str, Any]]:
+    metadata_json, encoded_img = value.split(b'\n', 1)
+    img = cv2.imdecode(np.frombuffer(encoded_img, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    return img, json.loads(metadata_json)
+
+
+def _is_cacheable(metadata: Dict[str, Any]) -> bool:
+    if any(key in metadata for key in NOT_CACHEABLE_METADATA_KEYS):
+        return False
+    try:
+        json.dumps(metadata)
+    except (TypeError, ValueError):
+        return False
+    return True
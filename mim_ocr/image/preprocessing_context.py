@@ -0,0 +1,63 @@
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import cv2
+import numpy as np
+
+from mim_ocr.preprocessing.deskew import binarize
+from mim_ocr.preprocessing.rescale import estimate_text_height
+
+
+class PreprocessingContext(dict):
+    """Metadata passed through preprocessing transformations (see run_ocr_pipeline_on_image).
+
+    It is a dict, so transformations store their results (e.g. orientation) and box mappings in it
+    as before. Additionally, it lazily computes and caches intermediate products of the current image
+    (grayscale, binarized and downscaled versions, text height), so that chained transformations do not
+    repeat the same conversions. The cache is dropped when a transformation returns a new image,
+    so transformations must not modify images in place.
+    """
+
+    def __init__(self, path: Optional[Path] = None, **kwargs) -> None:
+        super().__init__(path=path, **kwargs)
+        self._image: Optional[np.ndarray] = None
+        self._products: Dict[Any, Any] = {}
+
+    @property
+    def path(self) -> Optional[Path]:
+        return self['path']
+
+    def get_product(self, img: np.ndarray, key: Any, compute: Callable[[], Any]) -> Any:
+        """Returns product of img identified by key, computed with compute() on first use."""
+        if img is not self._image:
+            self._image = img
+            self._products = {}
+        if key not in self._products:
+            self._products[key] = compute()
+        return self._products[key]
+
+    def gray(self, img: np.ndarray) -> np.ndarray:
+        return self.get_product(
+            img, 'gray', lambda: cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img)
+
+    def binary(self, img: np.ndarray) -> np.ndarray:
+        """See deskew.binarize."""
+        return self.get_product(img, 'binary', lambda: binarize(self.gray(img)))
+
+    def text_height(self, img: np.ndarray) -> Optional[float]:
+        """See rescale.estimate_text_height."""
+        return self.get_product(img, 'text_height', lambda: estimate_text_height(self.gray(img)))
+
+    def downscaled_gray(self, img: np.ndarray, scale: float) -> np.ndarray:
+        if scale == 1.0:
+            return self.gray(img)
+        return self.get_product(img, ('downscaled_gray', scale), lambda: cv2.resize(
+            self.gray(img), None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA))
+
+
+def get_preprocessing_context(metadata: Dict) -> PreprocessingContext:
+    """Returns metadata if it is a PreprocessingContext, otherwise a temporary context (without shared cache),
+    so that transformations work also when called with a plain dict."""
+    if isinstance(metadata, PreprocessingContext):
+        return metadata
+    return PreprocessingContext(metadata.get('path'))
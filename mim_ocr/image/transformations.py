@@ -1,22 +1,95 @@
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Callable
 
 import numpy as np
 
-from mim_ocr.preprocessing import deskew_cv2, reorient_cv2
+from mim_ocr.data_model import Box
+from mim_ocr.image.preprocessing_context import get_preprocessing_context
+from mim_ocr.preprocessing import crop_cv2, deskew_cv2, reorient_cv2, rescale_cv2
+from mim_ocr.preprocessing.blank_page import BLANK_PAGE_KEY, MAX_BLANK_INK_RATIO, MIN_TEXT_COMPONENTS, \
+    get_blank_page_thumbnail_scale, is_blank_page
+from mim_ocr.preprocessing.crop import DEFAULT_CROP_PADDING, DEFAULT_MIN_CROP_REDUCTION, get_crop_thumbnail_scale
+from mim_ocr.preprocessing.reorient import ORIENTATION_TARGET_TEXT_HEIGHT, ORIENTATION_THUMBNAIL_MIN_SCALE
+from mim_ocr.preprocessing.rescale import DEFAULT_TARGET_TEXT_HEIGHT, get_rescale_factor
+
+# Keys of metadata used to map OCR results back to coordinates of the reference image, see add_box_mapping.
+BOX_MAPPINGS_KEY = 'box_mappings'
+REFERENCE_IMAGE_KEY = 'reference_image'
 
 
 def no_transform(img: np.ndarray, path: Path, metadata: Dict) -> np.ndarray:
     return img
 
 
-def reorient(img: np.ndarray, path: Path, metadata: Dict) -> np.ndarray:
-    img, orientation = reorient_cv2(img, image_path=path)
+def reorient(img: np.ndarray, path: Path, metadata: Dict, method: str = "osd") -> np.ndarray:
+    """Rotates image so that the text is upright (see reorient_cv2). Orientation is detected on the image
+    in memory, so it works after other transformations. The method can be set with functools.partial."""
+    context = get_preprocessing_context(metadata)
+    thumbnail_scale = get_rescale_factor(context.text_height(img), ORIENTATION_TARGET_TEXT_HEIGHT,
+                                         min_scale=ORIENTATION_THUMBNAIL_MIN_SCALE)
+    img, orientation = reorient_cv2(img, method=method, thumbnail=context.downscaled_gray(img, thumbnail_scale))
     metadata['orientation'] = orientation
     return img
 
 
-def deskew(img: np.ndarray, path: Path, metadata: Dict) -> np.ndarray:
-    img, angle = deskew_cv2(img)
+def deskew(img: np.ndarray, path: Path, metadata: Dict, method: str = "fast_projection_profile",
+           projection_delta: float = 0.5) -> np.ndarray:
+    """Rotates image so that lines of text are horizontal (see deskew_cv2). The method and the step
+    of checked angles can be set with functools.partial."""
+    img, angle = deskew_cv2(img, method=method, projection_delta=projection_delta,
+                            binary=get_preprocessing_context(metadata).binary(img))
     metadata['angle'] = f"{angle:.2}"
     return img
+
+
+def rescale(img: np.ndarray, path: Path, metadata: Dict,
+            target_text_height: float = DEFAULT_TARGET_TEXT_HEIGHT) -> np.ndarray:
+    """Rescales image to the resolution optimal for OCR (see rescale_cv2). OCR results are mapped back
+    to the coordinates of the original image. Other parameters can be set with functools.partial."""
+    rescaled_img, scale = rescale_cv2(img, target_text_height,
+                                      text_height=get_preprocessing_context(metadata).text_height(img))
+    metadata['scale'] = scale
+    if scale != 1.0:
+        add_box_mapping(metadata, img, lambda box: box.scale(1 / scale))
+    return rescaled_img
+
+
+def crop_margins(img: np.ndarray, path: Path, metadata: Dict, padding: float = DEFAULT_CROP_PADDING,
+                 min_reduction: float = DEFAULT_MIN_CROP_REDUCTION) -> np.ndarray:
+    """Crops white margins and black scanner borders (see crop_cv2), so that OCR processes less pixels.
+    OCR results are mapped back to the coordinates of the original image."""
+    thumbnail = get_preprocessing_context(metadata).downscaled_gray(img, get_crop_thumbnail_scale(img))
+    cropped_img, crop_box = crop_cv2(img, padding, min_reduction, thumbnail=thumbnail)
+    metadata['crop_box'] = crop_box
+    if cropped_img is not img:
+        left, top = crop_box[:2]
+        add_box_mapping(metadata, img, lambda box: box.translate(left, top))
+    return cropped_img
+
+
+def skip_blank_page(img: np.ndarray, path: Path, metadata: Dict, max_ink_ratio: float = MAX_BLANK_INK_RATIO,
+                    min_components: int = MIN_TEXT_COMPONENTS) -> np.ndarray:
+    """Marks blank and nearly empty pages (see is_blank_page) in metadata. The pipeline then skips
+    the following transformations and OCR, returning an empty box with BLANK_PAGE_KEY set in additional_data.
+    Should be the first transformation, as it is much faster than the others."""
+    context = get_preprocessing_context(metadata)
+    thumbnail = context.downscaled_gray(img, get_blank_page_thumbnail_scale(img))
+    metadata[BLANK_PAGE_KEY] = is_blank_page(img, max_ink_ratio, min_components, thumbnail=thumbnail)
+    return img
+
+
+def add_box_mapping(metadata: Dict, img: np.ndarray, mapping: Callable[[Box], None]) -> None:
+    """Registers a function mapping boxes found on the transformed image to coordinates of img (the image before
+    the transformation). Used by transformations which change the image only to make OCR faster or better.
+
+    The pipeline applies the mappings after OCR (in reverse order) and returns the image from before the first
+    such transformation as the reference image for the boxes. Therefore, transformations following it must not
+    change the geometry of the image or have to register their own mappings.
+    """
+    metadata.setdefault(BOX_MAPPINGS_KEY, []).append(mapping)
+    metadata.setdefault(REFERENCE_IMAGE_KEY, img)
+
+
+def map_boxes_to_reference_image(box: Box, metadata: Dict) -> None:
+    for mapping in reversed(metadata.get(BOX_MAPPINGS_KEY, [])):
+        mapping(box)
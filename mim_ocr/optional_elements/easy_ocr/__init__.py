@@ -1,3 +1,7 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple, Any
+
+import torch
 from easyocr import Reader
 import numpy as np
 
@@ -5,20 +9,79 @@ from mim_ocr.backends import OCRBackend
 from mim_ocr.data_model import Box
 from mim_ocr.data_model.box import BoxType
 
+# Readers are expensive to create (they load detector and recognizer weights),
+# so they are shared by all backends within a process.
+_READERS: Dict[Tuple[Tuple[str, ...], bool], Reader] = {}
+
+
+def get_reader(languages: Sequence[str] = ('pl',), gpu: bool = True) -> Reader:
+    """Returns EasyOCR Reader for given languages, created on first use in the current process."""
+    key = (tuple(languages), gpu)
+    if key not in _READERS:
+        _READERS[key] = Reader(list(languages), gpu=gpu)
+    return _READERS[key]
+
 
 class EasyOCRBackend(OCRBackend):
 
-    def __init__(self):
+    def __init__(self, languages: Sequence[str] = ('pl',), gpu: bool = True,
+                 n_threads: Optional[int] = None, batch_size: int = 8):
+        """
+        Args:
+            languages (Sequence[str]): languages recognized by EasyOCR
+            gpu (bool): use GPU if available
+            n_threads (Optional[int]): number of torch intra-op threads set in worker processes (see init_worker).
+                                       When running many processes, nr_proc * n_threads should not exceed
+                                       the number of cores. If None, torch default is used.
+            batch_size (int): maximal number of images of the same size processed in one call
+                              of Reader.readtext_batched (see run_ocr_to_boxes)
+        """
         super().__init__()
-        self.reader = Reader(['pl'])
+        self.languages = tuple(languages)
+        self.gpu = gpu
+        self.n_threads = n_threads
+        self.batch_size = batch_size
+
+    @property
+    def reader(self) -> Reader:
+        return get_reader(self.languages, self.gpu)
+
+    def init_worker(self) -> None:
+        if self.n_threads is not None:
+            torch.set_num_threads(self.n_threads)
+        get_reader(self.languages, self.gpu)
+
+    def get_config(self) -> Dict[str, Any]:
+        return {'languages': self.languages}
 
     def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
         """
         EasyOCR does not return levels, so the output structure is simple:
         a dummy box with children.
         """
-        res_list = self.reader.readtext(img, *args, **kwargs)
+        return self._results_to_box(self.reader.readtext(img, *args, **kwargs))
+
+    def run_ocr_to_boxes(self, imgs: List[np.ndarray], *args, n_workers: int = 1, **kwargs) -> List[Box]:
+        """Images of the same size are processed in batches with Reader.readtext_batched.
+        n_workers is ignored - parallelism is controlled by torch threads."""
+        indices_by_shape = defaultdict(list)
+        for i, img in enumerate(imgs):
+            indices_by_shape[img.shape].append(i)
+
+        boxes: List[Optional[Box]] = [None] * len(imgs)
+        for indices in indices_by_shape.values():
+            for start in range(0, len(indices), self.batch_size):
+                batch_indices = indices[start:start + self.batch_size]
+                if len(batch_indices) == 1:
+                    results = [self.reader.readtext(imgs[batch_indices[0]], *args, **kwargs)]
+                else:
+                    results = self.reader.readtext_batched([imgs[i] for i in batch_indices], *args, **kwargs)
+                for i, res_list in zip(batch_indices, results):
+                    boxes[i] = self._results_to_box(res_list)
+        return boxes
 
+    @staticmethod
+    def _results_to_box(res_list: List) -> Box:
         tree = Box.create_root_box()
         for res in res_list:
 
@@ -2,18 +2,32 @@ import argparse
 import dataclasses
 import multiprocessing
 import os
+import time
 from contextlib import closing
 from multiprocessing import Pool
 from multiprocessing.pool import ApplyResult
 from pathlib import Path
-from typing import Optional, List, Callable
+from typing import Optional, List, Callable, Dict, Iterable, Tuple
 
 from loguru import logger
 from tqdm import tqdm
 
-from mim_ocr.backends import OCRBackend
+from mim_ocr.backends import OCRBackend, CachingBackend, OCRCacheStore, SkewCorrectingBackend, \
+    MultiResolutionBackend, TilingBackend
+from mim_ocr.backends.skew import MAX_REOCR_THRESHOLD
+from mim_ocr.backends.tiling import DEFAULT_TILE_OVERLAP
+from mim_ocr.data_model import Box
 from mim_ocr.heuristics import Feature
-from mim_ocr.pipeline.pipeline import run_pipeline_and_save_results_to_file, RunPipelineAndSaveResultToFileInput
+from mim_ocr.image import is_pdf, get_number_of_pages, DEFAULT_PDF_DPI
+from mim_ocr.image.preprocessing_cache import CachingTransformations
+from mim_ocr.pipeline.deduplication import DEFAULT_DEDUP_THRESHOLD, DEDUP_REPORT_FILENAME, Duplicates, \
+    find_duplicates, save_duplicate_result, write_duplicates_report
+from mim_ocr.pipeline.pipeline import run_pipeline_and_save_results_to_file, RunPipelineAndSaveResultToFileInput, \
+    run_pipeline_on_document_page, save_document_pages
+from mim_ocr.pipeline.profiles import PROFILES, PipelineProfile, get_profile
+
+# Hits and misses of caches by their names, see get_cache_stats.
+CacheStats = Dict[str, Tuple[int, int]]
 
 
 @dataclasses.dataclass
@@ -34,6 +48,29 @@ class RunPipelineAndSaveDataframeInput:
 
     batch_size: int = 1
 
+    ocr_cache_path: Optional[str] = None
+    ocr_cache_max_size_mb: Optional[float] = None
+
+    ocr_deskew_threshold: Optional[float] = None
+
+    multi_resolution_scale: Optional[float] = None
+
+    tile_size: Optional[int] = None
+    tile_overlap: int = DEFAULT_TILE_OVERLAP
+    tile_workers: int = 1
+
+    preprocessing_cache_path: Optional[str] = None
+    preprocessing_cache_max_size_mb: Optional[float] = None
+    preprocessing_cache_max_age_days: Optional[float] = None
+
+    keep_grayscale: bool = False
+    pdf_dpi: int = DEFAULT_PDF_DPI
+    time_budget: Optional[float] = None
+
+    deduplicate: bool = False
+    dedup_threshold: int = DEFAULT_DEDUP_THRESHOLD
+    dedup_exact_only: bool = False
+
     def validate(self):
         if self.image_input_path:
             if not os.path.isdir(self.image_input_path):
@@ -49,6 +86,39 @@ class RunPipelineAndSaveDataframeInput:
             if not os.path.isdir(self.input_box_path):
                 raise ValueError("input_img_dir is not a valid directory path.")
 
+    def wrap_backend_with_tiling(self) -> None:
+        if self.tile_size is None or self.backend is None:
+            return
+        self.backend = TilingBackend(self.backend, tile_size=self.tile_size, overlap=self.tile_overlap,
+                                     n_workers=self.tile_workers)
+
+    def wrap_backend_with_multi_resolution(self) -> None:
+        if self.multi_resolution_scale is None or self.backend is None:
+            return
+        self.backend = MultiResolutionBackend(self.backend, scale=self.multi_resolution_scale)
+
+    def wrap_backend_with_skew_correction(self) -> None:
+        if self.ocr_deskew_threshold is None or self.backend is None:
+            return
+        self.backend = SkewCorrectingBackend(self.backend, reocr_threshold=self.ocr_deskew_threshold)
+
+    def wrap_backend_with_cache(self) -> None:
+        if self.ocr_cache_path is None or self.backend is None or isinstance(self.backend, CachingBackend):
+            return
+        max_size_bytes = None if self.ocr_cache_max_size_mb is None else int(self.ocr_cache_max_size_mb * 1024 ** 2)
+        self.backend = CachingBackend(self.backend, OCRCacheStore.from_path(self.ocr_cache_path, max_size_bytes))
+
+    def wrap_transformations_with_cache(self) -> None:
+        if (self.preprocessing_cache_path is None or not self.preprocessing_transformations
+                or isinstance(self.preprocessing_transformations[0], CachingTransformations)):
+            return
+        max_size_bytes = None if self.preprocessing_cache_max_size_mb is None \
+            else int(self.preprocessing_cache_max_size_mb * 1024 ** 2)
+        max_age_seconds = None if self.preprocessing_cache_max_age_days is None \
+            else self.preprocessing_cache_max_age_days * 24 * 3600
+        store = OCRCacheStore.from_path(self.preprocessing_cache_path, max_size_bytes, max_age_seconds)
+        self.preprocessing_transformations = [CachingTransformations(self.preprocessing_transformations, store)]
+
     def calculate_path_lists(self) -> None:
         if self.image_input_path:
             filenames = [f for f in os.listdir(self.image_input_path) if
@@ -74,7 +144,56 @@ class RunPipelineAndSaveDataframeInput:
         else:
             self.preprocessed_image_paths = [Path(self.out_dir, f) for f in filenames]
 
+    def get_document_page_counts(self) -> Dict[int, int]:
+        """Returns numbers of pages of input PDFs and multi-frame images by indices of input files."""
+        page_counts = {}
+        for k, path in enumerate(self.input_img_filepaths):
+            if path is None:
+                continue
+            try:
+                n_pages = get_number_of_pages(path)
+            except Exception:
+                # file will be reported by the worker trying to process it
+                continue
+            if is_pdf(path) or n_pages > 1:
+                page_counts[k] = n_pages
+        return page_counts
+
+    def find_duplicates(self) -> Duplicates:
+        """Returns duplicates of input images (see deduplication.find_duplicates) if deduplication is enabled."""
+        if not self.deduplicate or not self.image_input_path:
+            return {}
+        duplicates = find_duplicates(self.input_img_filepaths, self.dedup_threshold, self.dedup_exact_only)
+        if duplicates:
+            logger.info(f"Skipping {len(duplicates)} duplicates of other input images.")
+            if self.out_dir is not None:
+                write_duplicates_report(Path(self.out_dir, DEDUP_REPORT_FILENAME), duplicates,
+                                        self.input_img_filepaths)
+        return duplicates
+
+    def remove_representative_results(self, duplicates: Duplicates) -> None:
+        """Removes results of representatives of duplicates left by earlier runs into the same out_dir,
+        so that results of duplicates are saved only if their representative succeeds in this run."""
+        for representative in {representative for representative, _ in duplicates.values()}:
+            if self.output_filepaths[representative] is not None:
+                self.output_filepaths[representative].unlink(missing_ok=True)
+
+    def save_duplicate_results(self, duplicates: Duplicates) -> None:
+        """Saves OCR results of representatives as results of their duplicates."""
+        for k, (representative, _) in duplicates.items():
+            if self.output_filepaths[k] is None:
+                continue
+            if not self.output_filepaths[representative].exists():
+                logger.error(f"Results not saved for {self.input_img_filepaths[k]}, "
+                             f"processing of its duplicate {self.input_img_filepaths[representative]} failed.")
+                continue
+            save_duplicate_result(self.input_img_filepaths[representative], self.output_filepaths[representative],
+                                  self.input_img_filepaths[k], self.output_filepaths[k])
+
     def get_single_pipeline_input(self, i: int, j: int) -> List[RunPipelineAndSaveResultToFileInput]:
+        return self.get_pipeline_inputs(range(i, j))
+
+    def get_pipeline_inputs(self, indices: Iterable[int]) -> List[RunPipelineAndSaveResultToFileInput]:
         return [RunPipelineAndSaveResultToFileInput(
             output_path=self.output_filepaths[k],
             image_input_path=self.input_img_filepaths[k],
@@ -83,7 +202,10 @@ class RunPipelineAndSaveDataframeInput:
             backend=self.backend,
             box_input_path=self.input_box_filepaths[k],
             features=self.features,
-        ) for k in range(i, j)]
+            keep_grayscale=self.keep_grayscale,
+            pdf_dpi=self.pdf_dpi,
+            time_budget=self.time_budget,
+        ) for k in indices]
 
 
 def batch_run_pipeline_and_save_dataframe_for_dirs(args: RunPipelineAndSaveDataframeInput) -> None:
@@ -92,14 +214,25 @@ def batch_run_pipeline_and_save_dataframe_for_dirs(args: RunPipelineAndSaveDataf
 
     args.validate()
     args.calculate_path_lists()
+    args.wrap_backend_with_tiling()
+    args.wrap_backend_with_multi_resolution()
+    args.wrap_backend_with_skew_correction()
+    args.wrap_backend_with_cache()
+    args.wrap_transformations_with_cache()
+
+    duplicates = args.find_duplicates()
+    args.remove_representative_results(duplicates)
+    indices = [k for k in range(len(args.input_img_filepaths)) if k not in duplicates]
 
-    logger.info(f"Running pipeline on {len(args.input_img_filepaths)} images.")
+    logger.info(f"Running pipeline on {len(indices)} images.")
 
     if args.nr_proc == 1:
         # some elements of the pipeline, like NER_FEATURE do not run in multiprocessing environement.
         # Disabling multiprocessing for 1 CPU enables to run them.
-        for i, _ in enumerate(tqdm(args.input_img_filepaths)):
-            pipeline_input = args.get_single_pipeline_input(i, i+1)
+        if args.backend is not None:
+            args.backend.init_worker()
+        for k in tqdm(indices):
+            pipeline_input = args.get_pipeline_inputs([k])
             options_dict = {
                 'job_info': f"filepath: {pipeline_input[0].image_input_path or pipeline_input[0].box_input_path} "
                             f"({args.batch_size} files)",
@@ -107,29 +240,53 @@ def batch_run_pipeline_and_save_dataframe_for_dirs(args: RunPipelineAndSaveDataf
             }
             run_pipeline_and_save_results_to_file(pipeline_input, **options_dict)
 
+        log_cache_stats(get_cache_stats(args.backend, args.preprocessing_transformations))
+
     else:
-        with closing(Pool(args.nr_proc)) as pool:
+        # backend state (e.g. models) is loaded once per worker, not for every task
+        initializer = args.backend.init_worker if args.backend is not None else None
+        with closing(Pool(args.nr_proc, initializer=initializer)) as pool:
+            # pages of PDFs and multi-frame images are processed as separate tasks,
+            # so that a long document does not keep a single worker busy
+            page_counts = {k: n_pages for k, n_pages in args.get_document_page_counts().items()
+                           if k not in duplicates}
+            file_indices = [k for k in indices if k not in page_counts]
+
             funclist: List[ApplyResult] = []
             i = 0
-            j = min(i + args.batch_size, len(args.input_img_filepaths))
+            j = min(i + args.batch_size, len(file_indices))
             while i < j:
-                pipeline_input = args.get_single_pipeline_input(i, j)
+                pipeline_input = args.get_pipeline_inputs(file_indices[i:j])
                 options_dict = {
                     'job_info': f"filepath: {pipeline_input[0].image_input_path or pipeline_input[0].box_input_path} "
                                 f"({args.batch_size} files)",
                     'suppress_exceptions': True,
                 }
 
-                f = pool.apply_async(run_pipeline_and_save_results_to_file,
+                f = pool.apply_async(_run_pipeline_task,
                                      (pipeline_input,),
                                      options_dict)
                 funclist.append(f)
                 i = j
-                j = min(i + args.batch_size, len(args.input_img_filepaths))
+                j = min(i + args.batch_size, len(file_indices))
 
+            document_funclists: Dict[int, List[ApplyResult]] = {}
+            for k, n_pages in page_counts.items():
+                document_input = args.get_pipeline_inputs([k])[0]
+                # time budget of the document starts once for all its pages
+                document_input.budget_start = time.monotonic()
+                document_funclists[k] = [
+                    pool.apply_async(_run_document_page_task,
+                                     (document_input, page_number),
+                                     {'job_info': f"filepath: {document_input.image_input_path} page {page_number}",
+                                      'suppress_exceptions': True})
+                    for page_number in range(n_pages)]
+
+            # caches are used by copies of the backend and transformations sent with every task
+            cache_stats: List[CacheStats] = []
             for k, f in enumerate(tqdm(funclist)):
                 try:
-                    f.get(timeout=10000*args.batch_size)
+                    cache_stats.append(f.get(timeout=10000*args.batch_size))
                 except multiprocessing.context.TimeoutError:
                     logger.error(
                         f"Mutiprocessing timeout error "
@@ -137,6 +294,62 @@ def batch_run_pipeline_and_save_dataframe_for_dirs(args: RunPipelineAndSaveDataf
                         f"{args.input_img_filepaths[args.batch_size] or args.input_box_filepaths[args.batch_size]} "
                         f"({args.batch_size} files).")
 
+            for k, page_funclist in tqdm(document_funclists.items()):
+                document_input = args.get_pipeline_inputs([k])[0]
+                try:
+                    page_results = [f.get(timeout=10000) for f in page_funclist]
+                except multiprocessing.context.TimeoutError:
+                    logger.error(f"Mutiprocessing timeout error on input {document_input.image_input_path}.")
+                    continue
+                page_boxes = [page_box for page_box, _ in page_results]
+                cache_stats.extend(page_cache_stats for _, page_cache_stats in page_results)
+                if any(page_box is None for page_box in page_boxes):
+                    logger.error(f"Results not saved for {document_input.image_input_path}, some pages failed.")
+                    continue
+                save_document_pages(document_input, page_boxes)
+
+            log_cache_stats(merge_cache_stats(cache_stats))
+
+    args.save_duplicate_results(duplicates)
+
+
+def get_cache_stats(backend: Optional[OCRBackend], preprocessing_transformations: List[Callable]) -> CacheStats:
+    """Returns hits and misses (counted in this process) of OCR and preprocessing caches, if they are used."""
+    cache_stats = {}
+    if isinstance(backend, CachingBackend):
+        cache_stats['OCR'] = (backend.hits, backend.misses)
+    if preprocessing_transformations and isinstance(preprocessing_transformations[0], CachingTransformations):
+        cache = preprocessing_transformations[0]
+        cache_stats['Preprocessing'] = (cache.hits, cache.misses)
+    return cache_stats
+
+
+def merge_cache_stats(cache_stats: List[CacheStats]) -> CacheStats:
+    merged_stats: CacheStats = {}
+    for stats in cache_stats:
+        for name, (hits, misses) in stats.items():
+            merged_hits, merged_misses = merged_stats.get(name, (0, 0))
+            merged_stats[name] = (merged_hits + hits, merged_misses + misses)
+    return merged_stats
+
+
+def log_cache_stats(cache_stats: CacheStats) -> None:
+    for name, (hits, misses) in cache_stats.items():
+        logger.info(f"{name} cache hits: {hits}, misses: {misses}.")
+
+
+def _run_pipeline_task(args_list: List[RunPipelineAndSaveResultToFileInput], **kwargs) -> CacheStats:
+    """Runs run_pipeline_and_save_results_to_file in a worker and returns cache statistics of the task."""
+    run_pipeline_and_save_results_to_file(args_list, **kwargs)
+    return get_cache_stats(args_list[0].backend, args_list[0].preprocessing_transformations)
+
+
+def _run_document_page_task(args: RunPipelineAndSaveResultToFileInput, page_number: int,
+                            **kwargs) -> Tuple[Optional[Box], CacheStats]:
+    """Runs run_pipeline_on_document_page in a worker and returns its result and cache statistics of the task."""
+    box = run_pipeline_on_document_page(args, page_number, **kwargs)
+    return box, get_cache_stats(args.backend, args.preprocessing_transformations)
+
 
 class OcrBatchProcessingArgumentParser(argparse.ArgumentParser):
     def __init__(self):
@@ -151,9 +364,64 @@ class OcrBatchProcessingArgumentParser(argparse.ArgumentParser):
         self.add_argument('--backend', type=str, help='Backend name, e.g TesseractBacked, EasyOCRBackend',
                           default=None)
         self.add_argument('--batch_size', type=int, help='Number of files processed with one worker')
+        self.add_argument('--profile', type=str, choices=list(PROFILES), default=None,
+                          help='Settings of the pipeline trading speed for quality (tesseract models, resolution, '
+                               'preprocessing, slow features), see profiles.PROFILES. Options given explicitly '
+                               'override the profile. TesseractBackend is used if no backend is given.')
+        self.add_argument('--tessdata_dir', type=str, default=None,
+                          help='Directory with "fast" and "best" subdirectories with tesseract models used '
+                               'by profiles. Installed models are used if not given.')
+        self.add_argument('--pdf_dpi', type=int, default=None, help='Resolution of rasterized pages of PDFs.')
+        self.add_argument('--skip_blank_pages', action=argparse.BooleanOptionalAction,
+                          help='Skip OCR of blank and nearly empty pages, their results are empty boxes '
+                               'with blank_page flag.')
         self.add_argument('--reorient', action=argparse.BooleanOptionalAction)
         self.add_argument('--deskew', action=argparse.BooleanOptionalAction)
+        self.add_argument('--crop', action=argparse.BooleanOptionalAction,
+                          help='Crop margins and scanner borders before OCR. Results are in original coordinates.')
+        self.add_argument('--rescale', action=argparse.BooleanOptionalAction,
+                          help='Rescale images to resolution optimal for OCR. Results are in original coordinates.')
+        self.add_argument('--ocr_deskew_threshold', type=float, default=None,
+                          help='Deskew OCR results using skew estimated from coordinates of words. OCR is run '
+                               'again on rotated image only if the skew (in degrees) exceeds this value.')
+        self.add_argument('--keep_grayscale', action=argparse.BooleanOptionalAction,
+                          help='Process grayscale and bilevel scans as single channel images (less memory).')
+        self.add_argument('--deduplicate', action=argparse.BooleanOptionalAction,
+                          help='OCR only one of identical or similar input images and save its results '
+                               f'for the others. Skipped files are listed in {DEDUP_REPORT_FILENAME} in out_dir.')
+        self.add_argument('--dedup_threshold', type=int, default=DEFAULT_DEDUP_THRESHOLD,
+                          help='Maximal number of different bits of perceptual hashes (of 256) of similar images. '
+                               'Pages of the same template with different content can be similar, use low values.')
+        self.add_argument('--dedup_exact_only', action=argparse.BooleanOptionalAction,
+                          help='Deduplicate only identical files.')
+        self.add_argument('--multi_resolution_scale', type=float, default=None,
+                          help='Run OCR on images downscaled by this factor first and again in full resolution '
+                               'only on lines with low confidence or suspicious numbers.')
+        self.add_argument('--tile_size', type=int, default=None,
+                          help='Run OCR on overlapping tiles of at most this size (in pixels) of larger images, '
+                               'e.g. engineering drawings and large-format scans.')
+        self.add_argument('--tile_overlap', type=int, default=DEFAULT_TILE_OVERLAP,
+                          help='Overlap (in pixels) of neighbouring tiles, should be larger than lines of text '
+                               'and most words. tile_size must be more than twice as large.')
+        self.add_argument('--tile_workers', type=int, default=1,
+                          help='Number of tiles of one image processed in parallel (in every process).')
         self.add_argument('--features', nargs='+', help='List of features to find')
+        self.add_argument('--time_budget', type=float, default=None,
+                          help='Time (in seconds) for processing of every document. When stages run late, '
+                               'optional ones (reorient, deskew, fuzzy matching and NER features) are cheapened '
+                               'or skipped, degraded stages are recorded in results.')
+        self.add_argument('--ocr_cache', type=str, default=None,
+                          help='Cache of OCR results: a directory, or an SQLite file (.sqlite or .db suffix).')
+        self.add_argument('--ocr_cache_max_size_mb', type=float, default=None,
+                          help='Maximal size of OCR cache, least recently used results are removed when exceeded.')
+        self.add_argument('--preprocessing_cache', type=str, default=None,
+                          help='Cache of preprocessed images (results of reorient, deskew etc.): a directory, '
+                               'or an SQLite file (.sqlite or .db suffix).')
+        self.add_argument('--preprocessing_cache_max_size_mb', type=float, default=None,
+                          help='Maximal size of preprocessing cache, least recently used images are removed '
+                               'when exceeded.')
+        self.add_argument('--preprocessing_cache_max_age_days', type=float, default=None,
+                          help='Preprocessed images not used for longer than this are removed from cache.')
 
     def parse_args(self, *args, **kwargs):
         parser_args = super().parse_args(*args, **kwargs)
@@ -162,10 +430,38 @@ class OcrBatchProcessingArgumentParser(argparse.ArgumentParser):
             logger.remove()
             logger.add(parser_args.logfile, mode="w")
 
-        if parser_args.out_dir and not (parser_args.backend or parser_args.input_box_dir):
+        if parser_args.out_dir and not (parser_args.backend or parser_args.profile or parser_args.input_box_dir):
             raise ValueError("You need to provide backend together with out_ocr_dir.")
 
         if not (parser_args.out_dir or parser_args.prep_dir):
             raise ValueError("Nothing to do, no output dirs provided.")
 
+        deskew_threshold = parser_args.ocr_deskew_threshold
+        if deskew_threshold is not None and not 0 <= deskew_threshold <= MAX_REOCR_THRESHOLD:
+            raise ValueError(f"ocr_deskew_threshold must be in [0, {MAX_REOCR_THRESHOLD}].")
+
+        if parser_args.tile_overlap < 0:
+            raise ValueError("tile_overlap must not be negative.")
+
+        if parser_args.tile_size is not None and parser_args.tile_size // 2 <= parser_args.tile_overlap:
+            raise ValueError(f"tile_size must be at least {2 * (parser_args.tile_overlap + 1)} pixels "
+                             f"for tile_overlap {parser_args.tile_overlap}.")
+
+        if parser_args.tile_workers < 1:
+            raise ValueError("tile_workers must be at least 1.")
+
         return parser_args
+
+    @staticmethod
+    def get_profile(parser_args: argparse.Namespace) -> PipelineProfile:
+        """Returns profile selected with --profile (or the default one) with explicitly given options applied."""
+        profile = get_profile(parser_args.profile) if parser_args.profile else PipelineProfile()
+        return profile.with_overrides(
+            skip_blank_pages=parser_args.skip_blank_pages,
+            reorient=parser_args.reorient,
+            deskew=parser_args.deskew,
+            crop=parser_args.crop,
+            rescale=parser_args.rescale,
+            multi_resolution_scale=parser_args.multi_resolution_scale,
+            pdf_dpi=parser_args.pdf_dpi,
+        )
@@ -0,0 +1,94 @@
+import csv
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from PIL import Image
+
+from mim_ocr.data_model import Box
+from mim_ocr.image import is_multi_page_document, is_pdf
+from mim_ocr.image.image_hash import HASH_SIZE, file_hash, file_average_hash, hamming_distance
+
+# Maximal number of different bits (of HASH_SIZE ** 2) of perceptual hashes of near-duplicate images.
+DEFAULT_DEDUP_THRESHOLD = 12
+DEDUP_REPORT_FILENAME = 'duplicates.csv'
+
+# index of representative input and hamming distance (0 for identical files) by index of duplicate input
+Duplicates = Dict[int, Tuple[int, int]]
+
+
+def find_duplicates(paths: List[Optional[Path]], threshold: int = DEFAULT_DEDUP_THRESHOLD,
+                    exact_only: bool = False) -> Duplicates:
+    """Groups identical and near-duplicate input images (e.g. re-uploads, rescans of the same page).
+
+    The first file of every group is its representative. Identical files are found with file_hash, other
+    images are compared by average_hash. Multi-page documents are grouped only when identical.
+
+    Args:
+        paths (List[Optional[Path]]): input files, None values are skipped
+        threshold (int): maximal hamming distance of perceptual hashes of near-duplicates
+        exact_only (bool): group only identical files
+    Returns:
+        index of representative and distance of hashes by index of every duplicate (not representative)
+    """
+    duplicates: Duplicates = {}
+    representatives_by_file_hash: Dict[str, int] = {}
+    representative_indices: List[int] = []
+    representative_hashes = np.zeros((len(paths), HASH_SIZE ** 2 // 8), dtype=np.uint8)
+
+    for k, path in enumerate(paths):
+        if path is None:
+            continue
+        try:
+            content_hash = file_hash(path)
+            if content_hash in representatives_by_file_hash:
+                duplicates[k] = (representatives_by_file_hash[content_hash], 0)
+                continue
+            representatives_by_file_hash[content_hash] = k
+            if exact_only or is_multi_page_document(path):
+                continue
+            image_hash = file_average_hash(path)
+        except Exception as e:
+            # file will be reported by the worker trying to process it
+            logger.debug(f"Duplicates of {path} not searched: {e}")
+            continue
+
+        n_representatives = len(representative_indices)
+        if n_representatives:
+            distances = hamming_distance(image_hash, representative_hashes[:n_representatives])
+            closest = int(np.argmin(distances))
+            if distances[closest] <= threshold:
+                duplicates[k] = (representative_indices[closest], int(distances[closest]))
+                continue
+        representative_hashes[n_representatives] = image_hash
+        representative_indices.append(k)
+
+    return duplicates
+
+
+def save_duplicate_result(representative_image_path: Path, representative_output_path: Path,
+                          image_path: Path, output_path: Path) -> None:
+    """Saves OCR result of representative as the result of its duplicate. Boxes of near-duplicates
+    are rescaled to the size of the duplicate (e.g. the same page scanned with another resolution)."""
+    scale = 1.0
+    if not is_pdf(image_path):
+        with Image.open(representative_image_path) as representative_image, Image.open(image_path) as image:
+            scale = (image.size[0] / representative_image.size[0]
+                     + image.size[1] / representative_image.size[1]) / 2
+    if scale == 1.0:
+        shutil.copyfile(representative_output_path, output_path)
+        return
+    box = Box.from_json_file(representative_output_path)
+    box.scale(scale)
+    box.to_json_file(output_path)
+
+
+def write_duplicates_report(report_path: Path, duplicates: Duplicates, paths: List[Path]) -> None:
+    """Writes CSV with skipped files, their representatives (OCRed instead of them) and distances of hashes."""
+    with open(report_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['skipped_file', 'representative_file', 'distance'])
+        for k, (representative, distance) in sorted(duplicates.items()):
+            writer.writerow([paths[k], paths[representative], distance])
@@ -0,0 +1,123 @@
+import functools
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from mim_ocr.heuristics import Feature
+from mim_ocr.image.transformations import deskew, reorient
+from mim_ocr.pipeline.profiles import is_slow_feature
+
+# Key of additional_data of the root box with the budget, elapsed time and degraded stages (see LatencyBudget).
+LATENCY_BUDGET_KEY = 'latency_budget'
+# Parts of the budget after which optional stages are degraded: transformations are cheapened
+# to leave time for OCR, and slow features are skipped unless OCR finished early enough.
+PREPROCESSING_BUDGET_SHARE = 0.3
+FEATURES_BUDGET_SHARE = 0.7
+# Step of angles (in degrees) checked by cheapened deskew.
+DEGRADED_DESKEW_DELTA = 1.0
+
+CHEAPENED = 'cheapened'
+SKIPPED = 'skipped'
+
+
+class LatencyBudget:
+    """Time budget of processing of one document. When stages run late, the remaining optional ones
+    are cheapened or skipped, and every degraded stage is recorded:
+
+    - reorient and deskew (see cheapen_transformation) are cheapened after PREPROCESSING_BUDGET_SHARE
+      of the budget and skipped when the whole budget is exceeded,
+    - slow features (fuzzy matching, NER) are skipped after FEATURES_BUDGET_SHARE of the budget.
+
+    Other transformations and OCR are always run. Time is measured with a monotonic clock,
+    which can be replaced (e.g. with a fake clock in tests). The budget starts at start (time of the clock)
+    or when it is created. time.monotonic is system-wide, so pages of a document processed in worker processes
+    can share the start recorded by the process distributing them.
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic,
+                 start: Optional[float] = None) -> None:
+        if seconds <= 0:
+            raise ValueError(f"Time budget must be positive, got {seconds}")
+        self.seconds = seconds
+        self.clock = clock
+        self.start = clock() if start is None else start
+        # action (CHEAPENED or SKIPPED) by name of the stage
+        self.degraded_stages: Dict[str, str] = {}
+
+    def elapsed(self) -> float:
+        return self.clock() - self.start
+
+    def is_late(self, share: float = 1.0) -> bool:
+        """Returns whether more than share of the budget has elapsed."""
+        return self.elapsed() > share * self.seconds
+
+    def get_transformation(self, transformation: Callable) -> Optional[Callable]:
+        """Returns transformation to run instead of the given one: the same one, its cheaper version,
+        or None if it should be skipped."""
+        cheap_transformation = cheapen_transformation(transformation)
+        if cheap_transformation is None or not self.is_late(PREPROCESSING_BUDGET_SHARE):
+            return transformation
+        name = get_stage_name(transformation)
+        if self.is_late():
+            self._record(name, SKIPPED)
+            return None
+        self._record(name, CHEAPENED)
+        return cheap_transformation
+
+    def select_features(self, features: List[Feature]) -> List[Feature]:
+        """Returns features to run, without slow ones if the budget is nearly exhausted."""
+        if not self.is_late(FEATURES_BUDGET_SHARE):
+            return features
+        selected_features = []
+        for feature in features:
+            if is_slow_feature(feature):
+                self._record(feature.name, SKIPPED)
+            else:
+                selected_features.append(feature)
+        return selected_features
+
+    def get_report(self) -> Dict[str, Any]:
+        return {'seconds': self.seconds, 'elapsed': self.elapsed(), 'degraded_stages': dict(self.degraded_stages)}
+
+    def _record(self, name: str, action: str) -> None:
+        if self.degraded_stages.get(name) != action:
+            logger.info(f"Stage {name} {action}, {self.elapsed():.2f} s of {self.seconds} s budget elapsed.")
+        # skipping is recorded over cheapening (e.g. on later pages of a document)
+        if self.degraded_stages.get(name) != SKIPPED:
+            self.degraded_stages[name] = action
+
+
+def cheapen_transformation(transformation: Callable) -> Optional[Callable]:
+    """Returns cheaper version of an optional transformation (functools.partial parameters are kept),
+    or None if the transformation is not optional."""
+    func, args, keywords = transformation, (), {}
+    if isinstance(transformation, functools.partial):
+        func, args, keywords = transformation.func, transformation.args, transformation.keywords
+    if func is deskew:
+        delta = max(keywords.get('projection_delta', DEGRADED_DESKEW_DELTA), DEGRADED_DESKEW_DELTA)
+        return functools.partial(deskew, *args, **{**keywords, 'method': 'fast_projection_profile',
+                                                   'projection_delta': delta})
+    if func is reorient:
+        # heuristic method runs OSD only on pages on which it is ambiguous
+        return functools.partial(reorient, *args, **{**keywords, 'method': 'heuristic'})
+    return None
+
+
+def get_stage_name(transformation: Callable) -> str:
+    if isinstance(transformation, functools.partial):
+        return get_stage_name(transformation.func)
+    return getattr(transformation, '__name__', type(transformation).__name__)
+
+
+def merge_latency_reports(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merges reports (see LatencyBudget.get_report) of pages of a document processed in parallel
+    with budgets of the same start, so the elapsed time of the document is the one of its last page."""
+    degraded_stages: Dict[str, str] = {}
+    for report in reports:
+        for name, action in report['degraded_stages'].items():
+            if degraded_stages.get(name) != SKIPPED:
+                degraded_stages[name] = action
+    return {'seconds': max(report['seconds'] for report in reports),
+            'elapsed': max(report['elapsed'] for report in reports),
+            'degraded_stages': degraded_stages}
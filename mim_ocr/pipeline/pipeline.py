@@ -1,29 +1,204 @@
 import dataclasses
+import itertools
 from pathlib import Path
-from typing import List, Callable, Optional, Tuple
+from typing import List, Callable, Optional, Tuple, Iterator
 
 import cv2
 import numpy as np
+from loguru import logger
 
-from mim_ocr.backends import OCRBackend
-from mim_ocr.data_model import Box
+from mim_ocr.backends import OCRBackend, CloudOCRBackend
+from mim_ocr.backends.skew import SKEW_ANGLE_KEY, SKEW_CORRECTION_BACKGROUND
+from mim_ocr.data_model import Box, box_functions
 from mim_ocr.exceptions.smooth_job_context import SmoothOCRJobRunContext
 from mim_ocr.heuristics import Feature, heuristic_examine_box_lines
-from mim_ocr.image import open_image
+from mim_ocr.image import open_image, iter_pdf_pages, is_pdf, get_number_of_pages, is_multi_page_document, \
+    DEFAULT_PDF_DPI
+from mim_ocr.image.pdf_text_layer import extract_pdf_text_layer, has_usable_text_layer, MIN_TEXT_LAYER_LETTERS
+from mim_ocr.image.preprocessing_cache import CachingTransformations
+from mim_ocr.image.preprocessing_context import PreprocessingContext
+from mim_ocr.image.transformations import map_boxes_to_reference_image, REFERENCE_IMAGE_KEY, \
+    BOX_MAPPINGS_KEY
+from mim_ocr.pipeline.latency_budget import LatencyBudget, LATENCY_BUDGET_KEY, merge_latency_reports
+from mim_ocr.preprocessing import rotate_cv2
+from mim_ocr.preprocessing.blank_page import BLANK_PAGE_KEY
 
 
 def run_ocr_pipeline_on_file(input_path: Path, preprocessing_transformations: List[Callable],
-                             backend: Optional[OCRBackend]) -> Tuple[np.ndarray, Optional[Box]]:
-    img = open_image(input_path)
-    metadata = {'path': input_path}
+                             backend: Optional[OCRBackend], keep_grayscale: bool = False,
+                             budget: Optional[LatencyBudget] = None) -> Tuple[np.ndarray, Optional[Box]]:
+    """Returns preprocessed image and OCR results in coordinates of this image.
+
+    If some transformations change the image only for OCR (e.g. rescale), the boxes are mapped back
+    and the image from before such transformations is returned (see add_box_mapping).
+    If a transformation marks the page as blank (see skip_blank_page), the remaining transformations and OCR
+    are skipped and an empty box with BLANK_PAGE_KEY set in additional_data is returned.
+    If keep_grayscale is set, grayscale and bilevel images are passed to transformations as single channel
+    arrays (see open_image), so all transformations and the backend must support such images.
+    If budget is given, optional transformations are cheapened or skipped when they run late
+    (see LatencyBudget.get_transformation).
+    """
+    return run_ocr_pipeline_on_image(open_image(input_path, keep_grayscale=keep_grayscale), input_path,
+                                     preprocessing_transformations, backend, source_file_unchanged=True,
+                                     budget=budget)
+
+
+def run_ocr_pipeline_on_image(img: np.ndarray, input_path: Path, preprocessing_transformations: List[Callable],
+                              backend: Optional[OCRBackend],
+                              source_file_unchanged: bool = False,
+                              budget: Optional[LatencyBudget] = None) -> Tuple[np.ndarray, Optional[Box]]:
+    """See run_ocr_pipeline_on_file.
+
+    Args:
+        source_file_unchanged (bool): whether img is exactly the content of input_path
+                                      (so the file can be used directly, e.g. uploaded to cloud backend)
+        budget (Optional[LatencyBudget]): time budget of the document
+    """
+    original_img = img
+    metadata = PreprocessingContext(input_path)
 
     for t in preprocessing_transformations:
-        img = t(img, input_path, metadata)
+        if isinstance(t, CachingTransformations):
+            img = t(img, input_path, metadata, budget=budget)
+        else:
+            if budget is not None:
+                t = budget.get_transformation(t)
+                if t is None:
+                    continue
+            img = t(img, input_path, metadata)
+        if metadata.get(BLANK_PAGE_KEY):
+            break
+
+    box = None
+    if backend is not None and metadata.get(BLANK_PAGE_KEY):
+        box = Box.create_root_box()
+        box.additional_data[BLANK_PAGE_KEY] = True
+    elif backend is not None:
+        if isinstance(backend, CloudOCRBackend) and source_file_unchanged and img is original_img:
+            # image was not changed, so the source file can be uploaded without encoding
+            box = backend.run_ocr_to_box(img, source_path=input_path)
+        else:
+            box = backend.run_ocr_to_box(img)
+        _map_boxes_to_reference_image(box, img, metadata)
+
+    img = metadata.get(REFERENCE_IMAGE_KEY, img)
+    if box is not None and box.additional_data.get(SKEW_ANGLE_KEY):
+        # results were deskewed by SkewCorrectingBackend
+        img = rotate_cv2(img, box.additional_data[SKEW_ANGLE_KEY], SKEW_CORRECTION_BACKGROUND)
+    return img, box
+
+
+def _map_boxes_to_reference_image(box: Box, img: np.ndarray, metadata: PreprocessingContext) -> None:
+    angle = box.additional_data.get(SKEW_ANGLE_KEY)
+    if not angle or not metadata.get(BOX_MAPPINGS_KEY):
+        map_boxes_to_reference_image(box, metadata)
+        return
+    # results deskewed by SkewCorrectingBackend are rotated around the center of the image passed to it,
+    # so they are rotated back before mapping and rotated around the center of the reference image after it
+    box_functions.unrotate_box_coordinates(box, angle, img)
+    map_boxes_to_reference_image(box, metadata)
+    box_functions.rotate_box_coordinates(box, angle, metadata[REFERENCE_IMAGE_KEY])
+
+
+def run_ocr_pipeline_on_pdf(input_path: Path, preprocessing_transformations: List[Callable],
+                            backend: OCRBackend, dpi: int = DEFAULT_PDF_DPI,
+                            min_text_layer_letters: int = MIN_TEXT_LAYER_LETTERS,
+                            thread_count: int = 1, budget: Optional[LatencyBudget] = None) -> Box:
+    """Returns root box with PREDICTED_PAGE box for every page of PDF.
+
+    Words are taken from the text layer of PDF when the page has one (born-digital documents).
+    Only the remaining pages are rasterized with given dpi (see iter_pdf_pages) and passed through
+    preprocessing and OCR one by one. Coordinates of all pages match pages rasterized with given dpi.
+    """
+    text_layer_pages = list(extract_pdf_text_layer(input_path, dpi).children)
+    uses_text_layer = [has_usable_text_layer(page_box, min_text_layer_letters) for page_box in text_layer_pages]
+    ocr_page_numbers = [page_box.additional_data['page_number']
+                        for page_box, use_text_layer in zip(text_layer_pages, uses_text_layer) if not use_text_layer]
+    ocr_page_images = _iter_selected_pdf_pages(input_path, ocr_page_numbers, dpi=dpi, thread_count=thread_count)
+
+    root_box = Box.create_root_box()
+    for page_box, use_text_layer in zip(text_layer_pages, uses_text_layer):
+        _add_pdf_page(root_box, page_box, use_text_layer, ocr_page_images, input_path,
+                      preprocessing_transformations, backend, budget)
+    return root_box
+
+
+def run_ocr_pipeline_on_document(input_path: Path, preprocessing_transformations: List[Callable],
+                                 backend: OCRBackend, dpi: int = DEFAULT_PDF_DPI,
+                                 keep_grayscale: bool = False, budget: Optional[LatencyBudget] = None) -> Box:
+    """Returns root box with PREDICTED_PAGE box for every page of PDF or multi-frame image (e.g. TIFF).
+
+    keep_grayscale is used only for images (see run_ocr_pipeline_on_file).
+    """
+    if is_pdf(input_path):
+        return run_ocr_pipeline_on_pdf(input_path, preprocessing_transformations, backend, dpi=dpi, budget=budget)
+
+    root_box = Box.create_root_box()
+    for page_number in range(get_number_of_pages(input_path)):
+        page_img = open_image(input_path, frame=page_number, keep_grayscale=keep_grayscale)
+        _add_ocr_page(root_box, page_img, page_number, input_path, preprocessing_transformations, backend, budget)
+    return root_box
+
 
-    if backend is not None:
-        return img, backend.run_ocr_to_box(img)
+def run_ocr_pipeline_on_document_page(input_path: Path, page_number: int,
+                                      preprocessing_transformations: List[Callable], backend: OCRBackend,
+                                      dpi: int = DEFAULT_PDF_DPI,
+                                      min_text_layer_letters: int = MIN_TEXT_LAYER_LETTERS,
+                                      keep_grayscale: bool = False,
+                                      budget: Optional[LatencyBudget] = None) -> Box:
+    """Returns root box with a single PREDICTED_PAGE box for given page (from 0) of PDF or multi-frame image.
+
+    Pages of one document can be processed in parallel this way and gathered with Box.add_pages.
+    """
+    root_box = Box.create_root_box()
+    if is_pdf(input_path):
+        page_box = extract_pdf_text_layer(input_path, dpi, first_page=page_number + 1,
+                                          last_page=page_number + 1).children[0]
+        # the page is rasterized only if its text layer is not used
+        page_images = iter_pdf_pages(input_path, dpi, first_page=page_number + 1, last_page=page_number + 1)
+        _add_pdf_page(root_box, page_box, has_usable_text_layer(page_box, min_text_layer_letters), page_images,
+                      input_path, preprocessing_transformations, backend, budget)
     else:
-        return img, None
+        page_img = open_image(input_path, frame=page_number, keep_grayscale=keep_grayscale)
+        _add_ocr_page(root_box, page_img, page_number, input_path, preprocessing_transformations, backend, budget)
+    return root_box
+
+
+def _add_pdf_page(root_box: Box, text_layer_page_box: Box, use_text_layer: bool, page_images: Iterator[np.ndarray],
+                  input_path: Path, preprocessing_transformations: List[Callable], backend: OCRBackend,
+                  budget: Optional[LatencyBudget] = None) -> Box:
+    """Adds page of PDF to root_box as PREDICTED_PAGE box: the page of its text layer if use_text_layer is set,
+    otherwise results of pipeline run on the next image of page_images (the rasterized page)."""
+    if use_text_layer:
+        text_layer_page_box.additional_data['text_layer'] = True
+        Box.add_child(root_box, text_layer_page_box)
+        return text_layer_page_box
+    page_box = _add_ocr_page(root_box, next(page_images), text_layer_page_box.additional_data['page_number'],
+                             input_path, preprocessing_transformations, backend, budget)
+    page_box.additional_data['text_layer'] = False
+    return page_box
+
+
+def _add_ocr_page(root_box: Box, page_img: np.ndarray, page_number: int, input_path: Path,
+                  preprocessing_transformations: List[Callable], backend: OCRBackend,
+                  budget: Optional[LatencyBudget] = None) -> Box:
+    """Runs pipeline on page image and adds its results to root_box as PREDICTED_PAGE box.
+    additional_data of the results (e.g. BLANK_PAGE_KEY, SKEW_ANGLE_KEY) is kept in the page box."""
+    _, page_ocr_box = run_ocr_pipeline_on_image(page_img, input_path, preprocessing_transformations, backend,
+                                                budget=budget)
+    page_box = Box.create_page_box(page_number=page_number, page_size=(page_img.shape[1], page_img.shape[0]))
+    Box.add_child(root_box, page_box)
+    page_box.replace_children(page_ocr_box.children)
+    for key, value in page_ocr_box.additional_data.items():
+        page_box.additional_data.setdefault(key, value)
+    return page_box
+
+
+def _iter_selected_pdf_pages(path: Path, page_numbers: List[int], **kwargs) -> Iterator[np.ndarray]:
+    """Yields rasterized pages with given sorted numbers (from 0), rendering runs of consecutive pages together."""
+    for _, run in itertools.groupby(enumerate(page_numbers), key=lambda x: x[1] - x[0]):
+        run = [page_number for _, page_number in run]
+        yield from iter_pdf_pages(path, first_page=run[0] + 1, last_page=run[-1] + 1, **kwargs)
 
 
 @dataclasses.dataclass
@@ -35,6 +210,10 @@ class RunPipelineAndSaveResultToFileInput:
     backend: Optional[OCRBackend] = None
     box_input_path: Optional[Path] = None
     features: List[Feature] = dataclasses.field(default_factory=lambda: [])
+    keep_grayscale: bool = False
+    pdf_dpi: int = DEFAULT_PDF_DPI
+    time_budget: Optional[float] = None
+    budget_start: Optional[float] = None
 
     def validate(self):
         if not (self.image_input_path or self.box_input_path):
@@ -52,6 +231,21 @@ class RunPipelineAndSaveResultToFileInput:
         if self.box_input_path and not self.features:
             raise ValueError("No features defined, nothing to do.")
 
+    def get_latency_budget(self) -> Optional[LatencyBudget]:
+        """Returns budget starting at budget_start (or now), or None if time_budget is not set."""
+        if self.time_budget is None:
+            return None
+        return LatencyBudget(self.time_budget, start=self.budget_start)
+
+    def warn_if_preprocessed_image_not_saved(self) -> None:
+        """Preprocessed images of multi-page documents are not saved."""
+        if self.preprocessed_image_path:
+            logger.warning(f"Preprocessed images of multi-page document {self.image_input_path} are not saved "
+                           f"to {self.preprocessed_image_path}.")
+
+    def is_multi_page_document(self) -> bool:
+        return self.image_input_path is not None and is_multi_page_document(self.image_input_path)
+
     def read_box(self) -> Box:
         if str(self.box_input_path).endswith('.json'):
             return Box.from_json_file(self.box_input_path)
@@ -68,11 +262,24 @@ def run_pipeline_and_save_results_to_file(args_list: List[RunPipelineAndSaveResu
     """Run full pipeline for an image file.
     Args:
         output_path (Optional[pathlib.Path]): path to output excel file for OCR results
-        image_input_path (Optional[pathlib.Path]): path to input image file if pipeline runs on image
+        image_input_path (Optional[pathlib.Path]): path to input image file if pipeline runs on image.
+                                                   PDFs and multi-frame images are processed page by page
+                                                   (see run_ocr_pipeline_on_document).
         preprocessed_image_path (Optional[pathlib.Path]): path to store preprocessed image
+                                                          (not used for multi-page documents)
         preprocessing_transformations (List[Callable]): list of image preprocessing transformations
         backend (OCRBackend): if None, then OCR is not performed
         box_input_path (Optional[pathlib.Path]): path to input box file if pipeline runs on box images
+        keep_grayscale (bool): pass grayscale and bilevel images as single channel arrays
+                               (see run_ocr_pipeline_on_file)
+        pdf_dpi (int): resolution of rasterized pages of PDFs
+        time_budget (Optional[float]): time (in seconds) for processing of every document. When stages run late,
+                                       optional ones are cheapened or skipped (see LatencyBudget) and
+                                       the budget report is saved in LATENCY_BUDGET_KEY of the root box
+        budget_start (Optional[float]): time.monotonic() at which processing of the document started,
+                                        e.g. in the process distributing its pages (see
+                                        run_pipeline_on_document_page); the budget starts when processing
+                                        of the document begins if None
         features (Optional[List[Feature]]): Space-separated list of names of Feateres to search in OCR results, example:
                                              NUMBER_FEATURE PHONE_NUMBER_FEATURE NER_FEATURE.
         suppress_exceptions (bool): allows to log and not raise every exception e.g. for batch runs
@@ -81,20 +288,75 @@ def run_pipeline_and_save_results_to_file(args_list: List[RunPipelineAndSaveResu
     for args in args_list:
         with SmoothOCRJobRunContext(job_info=job_info, suppress_exceptions=suppress_exceptions):
             args.validate()
+            budget = args.get_latency_budget()
 
-            if args.image_input_path:
+            if args.is_multi_page_document():
+                args.warn_if_preprocessed_image_not_saved()
+                box = run_ocr_pipeline_on_document(
+                    args.image_input_path,
+                    args.preprocessing_transformations,
+                    args.backend,
+                    dpi=args.pdf_dpi,
+                    keep_grayscale=args.keep_grayscale,
+                    budget=budget)
+            elif args.image_input_path:
                 img, box = run_ocr_pipeline_on_file(
                     args.image_input_path,
                     args.preprocessing_transformations,
-                    args.backend)
+                    args.backend,
+                    keep_grayscale=args.keep_grayscale,
+                    budget=budget)
                 if args.preprocessed_image_path:
                     cv2.imwrite(str(args.preprocessed_image_path), img)
 
             if args.box_input_path:
                 box = args.read_box()
 
-            if args.output_path and args.features:
-                heuristic_examine_box_lines(box, features_to_check=args.features)
+            _examine_box_lines(box, args, budget)
 
             if box and args.output_path:
                 box.to_json_file(args.output_path)
+
+
+def run_pipeline_on_document_page(args: RunPipelineAndSaveResultToFileInput, page_number: int,
+                                  suppress_exceptions: bool = False, job_info: str = "") -> Optional[Box]:
+    """Runs pipeline (without saving results) on a single page of multi-page document.
+
+    Returns root box with a single PREDICTED_PAGE box (see run_ocr_pipeline_on_document_page)
+    or None if an exception was suppressed. Results of all pages are saved with save_document_pages.
+    All pages should get the same args.budget_start, so that the time budget applies to the whole document.
+    """
+    with SmoothOCRJobRunContext(job_info=job_info, suppress_exceptions=suppress_exceptions):
+        if page_number == 0:
+            args.warn_if_preprocessed_image_not_saved()
+        budget = args.get_latency_budget()
+        box = run_ocr_pipeline_on_document_page(args.image_input_path, page_number,
+                                                args.preprocessing_transformations, args.backend,
+                                                dpi=args.pdf_dpi, keep_grayscale=args.keep_grayscale,
+                                                budget=budget)
+        _examine_box_lines(box, args, budget)
+        return box
+    return None
+
+
+def save_document_pages(args: RunPipelineAndSaveResultToFileInput, page_boxes: List[Box]) -> Box:
+    """Gathers results of run_pipeline_on_document_page (in page order) into one root box and saves it."""
+    box = Box.create_root_box()
+    box.add_pages(page_boxes)
+    if args.time_budget is not None:
+        # pages were processed in parallel, with budgets of the same start
+        box.additional_data[LATENCY_BUDGET_KEY] = merge_latency_reports(
+            [page_box.additional_data[LATENCY_BUDGET_KEY] for page_box in page_boxes])
+    if args.output_path:
+        box.to_json_file(args.output_path)
+    return box
+
+
+def _examine_box_lines(box: Box, args: RunPipelineAndSaveResultToFileInput, budget: Optional[LatencyBudget]) -> None:
+    """Finds features in box (unless there is nothing to save) and records the budget report in it."""
+    if args.output_path and args.features:
+        features = budget.select_features(args.features) if budget is not None else args.features
+        if features:
+            heuristic_examine_box_lines(box, features_to_check=features)
+    if budget is not None and box is not None:
+        box.additional_data[LATENCY_BUDGET_KEY] = budget.get_report()
@@ -0,0 +1,134 @@
+import dataclasses
+import functools
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from mim_ocr.backends import TesseractBackend
+from mim_ocr.heuristics import Feature
+from mim_ocr.image import DEFAULT_PDF_DPI
+from mim_ocr.image.transformations import reorient, deskew, rescale, skip_blank_page, crop_margins
+from mim_ocr.preprocessing.rescale import DEFAULT_TARGET_TEXT_HEIGHT
+
+# Classes of features much slower than OCR of a page. They are matched by name, as their modules
+# require config (fuzzy matching) or optional dependencies (NER) already at import.
+SLOW_FEATURE_CLASSES = ('FuzzyMatchKeywordFeature', 'NERFeature')
+
+
+@dataclasses.dataclass(frozen=True)
+class PipelineProfile:
+    """Settings of the pipeline trading speed for quality, see PROFILES.
+
+    Default values keep the pipeline as configured without a profile (no preprocessing, default tesseract).
+
+    Args:
+        name (str): name of the profile
+        tessdata_variant (Optional[str]): subdirectory of tessdata_dir (see get_tesseract_config) with models,
+                                          "fast" (integer LSTM models) or "best" (float LSTM models, slower);
+                                          installed models are used if None
+        oem (int): tesseract OCR engine mode (1 for LSTM only, the only one supported by fast and best models)
+        psm (int): tesseract page segmentation mode
+        lang (str): tesseract language
+        pdf_dpi (int): resolution of rasterized pages of PDFs
+        rescale (bool): rescale images to target_text_height (see transformations.rescale)
+        target_text_height (float): height of letters (in pixels) of rescaled images
+        reorient (bool): rotate images so that text is upright (see transformations.reorient)
+        reorient_method (str): method of reorient, "osd" or "heuristic"
+        deskew (bool): straighten lines of text (see transformations.deskew)
+        deskew_method (str): method of deskew, see deskew_cv2
+        deskew_delta (float): step of checked angles (in degrees) of deskew
+        crop (bool): crop margins and scanner borders (see transformations.crop_margins)
+        skip_blank_pages (bool): skip OCR of blank pages (see transformations.skip_blank_page)
+        multi_resolution_scale (Optional[float]): run OCR on images downscaled by this factor first
+                                                  (see MultiResolutionBackend)
+        slow_features (bool): run features of SLOW_FEATURE_CLASSES (fuzzy matching and NER)
+    """
+    name: str = "default"
+    tessdata_variant: Optional[str] = None
+    oem: int = 1
+    psm: int = 3
+    lang: str = "pol"
+    pdf_dpi: int = DEFAULT_PDF_DPI
+    rescale: bool = False
+    target_text_height: float = DEFAULT_TARGET_TEXT_HEIGHT
+    reorient: bool = False
+    reorient_method: str = "osd"
+    deskew: bool = False
+    deskew_method: str = "fast_projection_profile"
+    deskew_delta: float = 0.5
+    crop: bool = False
+    skip_blank_pages: bool = False
+    multi_resolution_scale: Optional[float] = None
+    slow_features: bool = True
+
+    def get_tesseract_config(self, tessdata_dir: Optional[str] = None) -> str:
+        """Returns tesseract config. Models of tessdata_variant are read from its subdirectory of tessdata_dir
+        (e.g. with clones of tesseract-ocr/tessdata_fast and tessdata_best repositories as "fast" and "best")."""
+        config = f"--oem {self.oem} --psm {self.psm} -l {self.lang}"
+        if self.tessdata_variant is not None:
+            if tessdata_dir is None:
+                logger.warning(f"No tessdata_dir given, installed models are used instead of "
+                               f"{self.tessdata_variant} models of profile {self.name}.")
+            else:
+                config += f" --tessdata-dir {os.path.join(tessdata_dir, self.tessdata_variant)}"
+        return config
+
+    def get_backend(self, tessdata_dir: Optional[str] = None) -> TesseractBackend:
+        return TesseractBackend(self.get_tesseract_config(tessdata_dir))
+
+    def get_preprocessing_transformations(self) -> List[Callable]:
+        transformations: List[Callable] = []
+        if self.skip_blank_pages:
+            transformations.append(skip_blank_page)
+        if self.reorient:
+            transformations.append(functools.partial(reorient, method=self.reorient_method))
+        if self.deskew:
+            transformations.append(functools.partial(deskew, method=self.deskew_method,
+                                                     projection_delta=self.deskew_delta))
+        if self.crop:
+            transformations.append(crop_margins)
+        if self.rescale:
+            transformations.append(functools.partial(rescale, target_text_height=self.target_text_height))
+        return transformations
+
+    def filter_features(self, features: List[Feature]) -> List[Feature]:
+        """Returns features run with this profile."""
+        if self.slow_features:
+            return features
+        selected_features = []
+        for feature in features:
+            if is_slow_feature(feature):
+                logger.warning(f"Feature {feature.name} is not run with profile {self.name}.")
+            else:
+                selected_features.append(feature)
+        return selected_features
+
+    def with_overrides(self, **kwargs: Any) -> 'PipelineProfile':
+        """Returns copy of the profile with given settings replaced, None values are ignored
+        (e.g. options not given in command line)."""
+        return dataclasses.replace(self, **{key: value for key, value in kwargs.items() if value is not None})
+
+
+PROFILES: Dict[str, PipelineProfile] = {
+    # fast models on images rescaled to small letters; multi-resolution OCR is not used, as its first pass
+    # would see letters of about 10 pixels and recognize most lines again
+    'fast': PipelineProfile(name='fast', tessdata_variant='fast', pdf_dpi=150, rescale=True, target_text_height=20,
+                            deskew=True, deskew_delta=1.0, crop=True, skip_blank_pages=True, slow_features=False),
+    'balanced': PipelineProfile(name='balanced', tessdata_variant='fast', pdf_dpi=200, rescale=True,
+                                reorient=True, reorient_method='heuristic', deskew=True, crop=True,
+                                skip_blank_pages=True),
+    'accurate': PipelineProfile(name='accurate', tessdata_variant='best', pdf_dpi=300, rescale=True,
+                                target_text_height=32, reorient=True, reorient_method='osd', deskew=True,
+                                deskew_method='projection_profile', deskew_delta=0.25),
+}
+
+
+def is_slow_feature(feature: Feature) -> bool:
+    return any(cls.__name__ in SLOW_FEATURE_CLASSES for cls in type(feature).__mro__)
+
+
+def get_profile(name: str) -> PipelineProfile:
+    if name not in PROFILES:
+        raise ValueError(f"Unknown profile: {name}, available profiles: {', '.join(PROFILES)}")
+    return PROFILES[name]
@@ -1,2 +1,4 @@
+from .crop import crop_cv2
 from .deskew import deskew_cv2, rotate_cv2
 from .reorient import reorient_cv2
+from .rescale import rescale_cv2
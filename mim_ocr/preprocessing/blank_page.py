@@ -0,0 +1,63 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Key of additional_data of the box returned for blank pages (and of preprocessing metadata).
+BLANK_PAGE_KEY = 'blank_page'
+# Blank pages are detected on a thumbnail of this width, on which letters of typical scans have 5-10 pixels.
+BLANK_PAGE_THUMBNAIL_WIDTH = 600
+# Pixels darker than the background by at least this value are ink. Bleed-through of the other side
+# of the sheet and scanner noise are usually much lighter.
+MIN_INK_CONTRAST = 50
+# Part of the thumbnail size ignored at each edge, where scans often have dark borders, punch holes or shadows.
+BLANK_PAGE_MARGIN = 0.05
+# Connected components of ink smaller than this (in thumbnail pixels) are dust and noise.
+MIN_INK_COMPONENT_AREA = 4
+# Pages with less ink and less components than these are blank.
+MAX_BLANK_INK_RATIO = 0.002
+MIN_TEXT_COMPONENTS = 10
+
+
+def is_blank_page(image: np.ndarray, max_ink_ratio: float = MAX_BLANK_INK_RATIO,
+                  min_components: int = MIN_TEXT_COMPONENTS, thumbnail: Optional[np.ndarray] = None) -> bool:
+    """Returns whether the page is blank or nearly empty (e.g. separator sheet, back side), so OCR can be skipped.
+
+    Args:
+        image (np.ndarray): image with one or three channels
+        max_ink_ratio (float): maximal part of the page (without margins) covered by ink
+        min_components (int): minimal number of ink components (e.g. letters) of a page which is not blank
+        thumbnail (Optional[np.ndarray]): precomputed blank_page_thumbnail(image), computed if not given
+    """
+    if thumbnail is None:
+        thumbnail = blank_page_thumbnail(image)
+    ink_ratio, n_components = get_ink_statistics(thumbnail)
+    return ink_ratio <= max_ink_ratio and n_components < min_components
+
+
+def blank_page_thumbnail(image: np.ndarray) -> np.ndarray:
+    """Returns grayscale image downscaled to BLANK_PAGE_THUMBNAIL_WIDTH (images are never upscaled)."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    scale = get_blank_page_thumbnail_scale(gray)
+    if scale == 1.0:
+        return gray
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def get_blank_page_thumbnail_scale(image: np.ndarray) -> float:
+    return min(1.0, BLANK_PAGE_THUMBNAIL_WIDTH / image.shape[1])
+
+
+def get_ink_statistics(thumbnail: np.ndarray) -> Tuple[float, int]:
+    """Returns part of grayscale thumbnail (without margins) covered by ink and number of ink components."""
+    margin_y, margin_x = (round(size * BLANK_PAGE_MARGIN) for size in thumbnail.shape[:2])
+    page = thumbnail[margin_y:thumbnail.shape[0] - margin_y, margin_x:thumbnail.shape[1] - margin_x]
+    if page.size == 0:
+        return 0.0, 0
+
+    # background is estimated with median, so it works also for gray or yellowed paper
+    background = int(np.median(page))
+    ink = (page.astype(np.int16) <= background - MIN_INK_CONTRAST).astype(np.uint8)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    components = stats[1:][stats[1:, cv2.CC_STAT_AREA] >= MIN_INK_COMPONENT_AREA]
+    return float(components[:, cv2.CC_STAT_AREA].sum()) / page.size, len(components)
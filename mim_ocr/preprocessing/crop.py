@@ -0,0 +1,97 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from mim_ocr.preprocessing.deskew import binarize
+
+# Content is detected on a thumbnail of this width (images are never upscaled).
+CROP_THUMBNAIL_WIDTH = 800
+# Ink components touching the edge of the image and longer than this part of it are scanner borders.
+MIN_BORDER_LENGTH = 0.5
+# Ink components smaller than this (in thumbnail pixels) are noise, e.g. dust or punch hole shadows.
+MIN_CONTENT_COMPONENT_AREA = 6
+# White margin left around the content, as a part of the image width (tesseract works worse on text at edges).
+DEFAULT_CROP_PADDING = 0.01
+# Images are not cropped when it would remove a smaller part of their area.
+DEFAULT_MIN_CROP_REDUCTION = 0.05
+
+# left, top, right, bottom
+CropBox = Tuple[int, int, int, int]
+
+
+def crop_cv2(image: np.ndarray, padding: float = DEFAULT_CROP_PADDING,
+             min_reduction: float = DEFAULT_MIN_CROP_REDUCTION,
+             thumbnail: Optional[np.ndarray] = None) -> Tuple[np.ndarray, CropBox]:
+    """Crops white margins and black scanner borders of the image.
+
+    Args:
+        image (np.ndarray): image with one or three channels
+        padding (float): margin left around the content, as a part of the image width
+        min_reduction (float): the image is not cropped when the crop would remove a smaller part of its area
+        thumbnail (Optional[np.ndarray]): precomputed grayscale image downscaled by get_crop_thumbnail_scale(image),
+                                          computed if not given
+    Returns:
+        cropped image (a view of the image, without copying) and the crop box (left, top, right, bottom)
+        in coordinates of the image, covering the whole image if it was not cropped
+    """
+    height, width = image.shape[:2]
+    crop_box = find_content_box(image, padding, thumbnail)
+    if crop_box is None:
+        return image, (0, 0, width, height)
+    left, top, right, bottom = crop_box
+    if (right - left) * (bottom - top) > (1 - min_reduction) * width * height:
+        return image, (0, 0, width, height)
+    return image[top:bottom, left:right], crop_box
+
+
+def get_crop_thumbnail_scale(image: np.ndarray) -> float:
+    return min(1.0, CROP_THUMBNAIL_WIDTH / image.shape[1])
+
+
+def find_content_box(image: np.ndarray, padding: float = DEFAULT_CROP_PADDING,
+                     thumbnail: Optional[np.ndarray] = None) -> Optional[CropBox]:
+    """Returns box (left, top, right, bottom) of the content of the image, without margins and scanner borders,
+    extended by padding (but not over the borders), or None if the image has no content."""
+    scale = get_crop_thumbnail_scale(image)
+    if thumbnail is None:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+        thumbnail = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+    n_labels, labels, stats, _ = cv2.connectedComponentsWithStats(binarize(thumbnail), connectivity=8)
+    thumbnail_height, thumbnail_width = labels.shape
+    x, y = stats[:, cv2.CC_STAT_LEFT], stats[:, cv2.CC_STAT_TOP]
+    w, h = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+    touches_edge = (x == 0) | (y == 0) | (x + w == thumbnail_width) | (y + h == thumbnail_height)
+    is_border = touches_edge & ((w >= MIN_BORDER_LENGTH * thumbnail_width)
+                                | (h >= MIN_BORDER_LENGTH * thumbnail_height))
+    is_content = ~is_border & (stats[:, cv2.CC_STAT_AREA] >= MIN_CONTENT_COMPONENT_AREA)
+    is_border[0], is_content[0] = False, False
+    if not is_content.any():
+        return None
+
+    left, top = x[is_content].min(), y[is_content].min()
+    right, bottom = (x + w)[is_content].max(), (y + h)[is_content].max()
+
+    # padding is added only over white space, so that parts of borders are not left at the edges
+    pad = int(round(padding * thumbnail_width))
+    border = is_border[labels]
+    left = max(left - pad, _last_index(border[top:bottom, :left].any(axis=0)) + 1)
+    right = min(right + pad, right + _first_index(border[top:bottom, right:].any(axis=0), thumbnail_width - right))
+    top = max(top - pad, _last_index(border[:top, left:right].any(axis=1)) + 1)
+    bottom = min(bottom + pad,
+                 bottom + _first_index(border[bottom:, left:right].any(axis=1), thumbnail_height - bottom))
+
+    height, width = image.shape[:2]
+    return (max(0, int(left / scale)), max(0, int(top / scale)),
+            min(width, int(np.ceil(right / scale))), min(height, int(np.ceil(bottom / scale))))
+
+
+def _last_index(mask: np.ndarray) -> int:
+    indices = np.flatnonzero(mask)
+    return indices[-1] if len(indices) else -1
+
+
+def _first_index(mask: np.ndarray, default: int) -> int:
+    indices = np.flatnonzero(mask)
+    return indices[0] if len(indices) else default
@@ -1,21 +1,31 @@
 import math
-from typing import Union, Tuple
+from typing import Optional, Union, Tuple
 
 import cv2
 import numpy as np
 from deskew import determine_skew
 from scipy.ndimage import interpolation
 
+# Longer side of the binary image used by the fast projection profile method.
+FAST_PROJECTION_MAX_SIZE = 1000
+# Step of the first (coarse) angle sweep of the fast projection profile method.
+FAST_PROJECTION_COARSE_DELTA = 1.0
+
 
 def deskew_cv2(image: np.ndarray,
-               method: str = "projection_profile",
+               method: str = "fast_projection_profile",
                projection_delta: float = 0.5,
                projection_limit: int = 10,
-               background: Union[int, Tuple[int, int, int]] = (0, 0, 0)) -> Tuple[np.ndarray, float]:
+               background: Union[int, Tuple[int, int, int]] = (0, 0, 0),
+               binary: Optional[np.ndarray] = None) -> Tuple[np.ndarray, float]:
+    """binary is precomputed binarize(image) (e.g. shared with other transformations), computed if not given."""
     if method == "hough_transform":
-        best_angle = _determine_best_angle_hough_transform(image)
+        best_angle = _determine_best_angle_hough_transform(image, binary)
     elif method == "projection_profile":
-        best_angle = _determine_best_angle_projection_profile(image, projection_delta, projection_limit)
+        best_angle = _determine_best_angle_projection_profile(image, projection_delta, projection_limit, binary)
+    elif method == "fast_projection_profile":
+        best_angle = _determine_best_angle_fast_projection_profile(image, projection_delta, projection_limit,
+                                                                   binary=binary)
     else:
         raise ValueError(f"Unknown deskew method: {method}")
     if best_angle == 0.0:
@@ -23,15 +33,9 @@ def deskew_cv2(image: np.ndarray,
     return rotate_cv2(image, best_angle, background), best_angle
 
 
-def _determine_best_angle_hough_transform(image: np.ndarray) -> float:
+def _determine_best_angle_hough_transform(image: np.ndarray, binary: Optional[np.ndarray] = None) -> float:
     """See more: https://github.com/sbrunner/deskew"""
-    if len(image.shape) == 3:
-        img_grayscale = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    else:
-        img_grayscale = image
-
-    blur = cv2.medianBlur(img_grayscale, 3)
-    thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+    thresh = binarize(image) if binary is None else binary
 
     angle = determine_skew(thresh, num_angles=360, sigma=2.0,
                            num_peaks=40)  # small variation of default parameters obtained by trial and error
@@ -40,7 +44,8 @@ def _determine_best_angle_hough_transform(image: np.ndarray) -> float:
     return float(angle)
 
 
-def _determine_best_angle_projection_profile(image: np.ndarray, delta: float = .5, limit: int = 10) -> float:
+def _determine_best_angle_projection_profile(image: np.ndarray, delta: float = .5, limit: int = 10,
+                                             binary: Optional[np.ndarray] = None) -> float:
     """Here's a modified implementation of the Projection Profile Method to correct skewed images
     as described in Projection profile based skew estimation algorithm for JBIG compressed images.
     After obtaining a binary image, the idea is to rotate the image at various angles and generate
@@ -52,9 +57,7 @@ def _determine_best_angle_projection_profile(image: np.ndarray, delta: float = .
       - http://www.cvc.uab.es/~bagdanov/pubs/ijdar98.pdf
     """
 
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    blur = cv2.medianBlur(gray, 3)
-    thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+    thresh = binarize(image) if binary is None else binary
 
     scores = []
     angles = np.arange(-limit, limit + delta, delta)
@@ -65,6 +68,62 @@ def _determine_best_angle_projection_profile(image: np.ndarray, delta: float = .
     return angles[scores.index(max(scores))]
 
 
+def _determine_best_angle_fast_projection_profile(image: np.ndarray, delta: float = .5, limit: int = 10,
+                                                  coarse_delta: float = FAST_PROJECTION_COARSE_DELTA,
+                                                  max_size: int = FAST_PROJECTION_MAX_SIZE,
+                                                  binary: Optional[np.ndarray] = None) -> float:
+    """Faster version of _determine_best_angle_projection_profile returning angles from the same grid.
+
+    Scores are computed on the binary image downscaled to max_size. Instead of rotating the image,
+    coordinates of ink pixels are rotated and binned into rows, for all checked angles at once.
+    A coarse sweep with coarse_delta step is followed by a fine search with delta step around the best angle.
+    """
+    thresh = binarize(image) if binary is None else binary
+    scale = max_size / max(thresh.shape)
+    if scale < 1.0:
+        thresh = cv2.resize(thresh, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    ys, xs = np.nonzero(thresh)
+    if len(ys) == 0:
+        return 0.0
+    weights = thresh[ys, xs].astype(np.float64)
+    ys = ys - thresh.shape[0] / 2
+    xs = xs - thresh.shape[1] / 2
+
+    angles = np.arange(-limit, limit + delta, delta)
+    coarse_step = max(1, int(round(coarse_delta / delta)))
+    # coarse sweep over every coarse_step-th angle of the grid, including the middle one (0.0)
+    coarse_indices = np.arange((len(angles) // 2) % coarse_step, len(angles), coarse_step)
+    coarse_scores = _determine_fast_projection_profile_scores(ys, xs, weights, angles[coarse_indices])
+    best_index = coarse_indices[int(np.argmax(coarse_scores))]
+
+    fine_indices = np.arange(max(0, best_index - coarse_step + 1), min(len(angles), best_index + coarse_step))
+    fine_scores = _determine_fast_projection_profile_scores(ys, xs, weights, angles[fine_indices])
+    return float(angles[fine_indices[int(np.argmax(fine_scores))]])
+
+
+def _determine_fast_projection_profile_scores(ys: np.ndarray, xs: np.ndarray, weights: np.ndarray,
+                                              angles: np.ndarray) -> np.ndarray:
+    """Scores of _determine_projection_profile_score for all angles, computed from coordinates
+    (relative to the image center) and weights of ink pixels."""
+    angles_radian = np.radians(angles)[:, np.newaxis]
+    # row of every pixel after rotation (as in scipy.ndimage.rotate) by every angle
+    rows = np.floor(ys * np.cos(angles_radian) - xs * np.sin(angles_radian)).astype(np.int64)
+    rows -= rows.min()
+    n_rows = int(rows.max()) + 1
+    rows += np.arange(len(angles))[:, np.newaxis] * n_rows
+    histograms = np.bincount(rows.ravel(), weights=np.tile(weights, len(angles)),
+                             minlength=len(angles) * n_rows).reshape(len(angles), n_rows)
+    return np.sum(np.diff(histograms, axis=1) ** 2, axis=1)
+
+
+def binarize(image: np.ndarray) -> np.ndarray:
+    """Returns binary image with text (foreground) as 255, used by deskew methods."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    blur = cv2.medianBlur(gray, 3)
+    return cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+
+
 def _determine_projection_profile_score(arr, angle):
     data = interpolation.rotate(arr, angle, reshape=False, order=0)
     histogram = np.sum(data, axis=1)
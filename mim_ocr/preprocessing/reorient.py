@@ -1,40 +1,137 @@
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
 
 import cv2
 import numpy as np
-from pytesseract import pytesseract, Output
+from loguru import logger
+from pytesseract import pytesseract, Output, TesseractError
+
+from mim_ocr.preprocessing.rescale import rescale_cv2
 
 MINIMAL_REORIENTATION_CONFIDENCE = 3.0
+# Orientation is detected on a thumbnail with letters of about this height (in pixels),
+# which is enough for tesseract OSD and much faster than the full resolution image.
+ORIENTATION_TARGET_TEXT_HEIGHT = 20
+ORIENTATION_THUMBNAIL_MIN_SCALE = 0.1
+# Resolution passed to tesseract OSD, as images passed from memory have no resolution information.
+OSD_DPI = 300
+# Minimal decisive values of the scores used by the heuristic method, below them OSD is used.
+MIN_LETTER_ASPECT_RATIO = 1.1
+MIN_BASELINE_SCORE = 0.1
+MIN_LETTERS_IN_LINE = 5
 
 
-def reorient_cv2(image: np.ndarray, image_path: Path) -> Tuple[np.ndarray, int]:
-    # We need to add path due to strange tesseract errors.
-    # https://stackoverflow.com/questions/67018785/why-pytesseract-cant-handle-osd-mode
-    # if image_path is None:
-    #     im = Image.fromarray(image)
-    #     temp = tempfile.NamedTemporaryFile()
-    #     temp.write(im.tobytes())
-    #     image_path = temp.name
-    # else:
-    #     image_path = str(image_path)
+def reorient_cv2(image: np.ndarray, image_path: Optional[Path] = None,
+                 method: str = "osd", thumbnail: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int]:
+    """Rotates image by multiple of 90 degrees, so that the text is upright.
 
-    osd = pytesseract.image_to_osd(str(image_path), output_type=Output.DICT)
-    rotation = osd['rotate']
-    confidence = osd['orientation_conf']
-    if confidence < MINIMAL_REORIENTATION_CONFIDENCE:
-        rotation = 0
+    Args:
+        image (np.ndarray): image with one or three channels
+        image_path (Optional[Path]): not used, orientation is detected on the image in memory
+        method (str): "osd" to use tesseract orientation detection, or "heuristic" to use cheap
+                      letter shape heuristic (see detect_orientation_heuristic) with OSD used only
+                      when the heuristic is ambiguous
+        thumbnail (Optional[np.ndarray]): precomputed orientation_thumbnail(image), computed if not given
+    Returns:
+        rotated image and rotation (clockwise, in degrees)
+    """
+    if thumbnail is None:
+        thumbnail = orientation_thumbnail(image)
+    if method == "osd":
+        rotation = _detect_orientation_osd(thumbnail)
+    elif method == "heuristic":
+        rotation = detect_orientation_heuristic(thumbnail)
+        if rotation is None:
+            rotation = _detect_orientation_osd(thumbnail)
+    else:
+        raise ValueError(f"Unknown reorient method: {method}")
 
     return _reorient_image(image, rotation), rotation
 
 
+def orientation_thumbnail(image: np.ndarray) -> np.ndarray:
+    """Returns grayscale image downscaled to letters of about ORIENTATION_TARGET_TEXT_HEIGHT pixels."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    return rescale_cv2(gray, ORIENTATION_TARGET_TEXT_HEIGHT, min_scale=ORIENTATION_THUMBNAIL_MIN_SCALE)[0]
+
+
+def _detect_orientation_osd(image: np.ndarray) -> int:
+    try:
+        osd = pytesseract.image_to_osd(image, output_type=Output.DICT, config=f"--dpi {OSD_DPI}")
+    except TesseractError as e:
+        # e.g. too few characters on the image
+        logger.debug(f"Orientation not detected: {e}")
+        return 0
+    if osd['orientation_conf'] < MINIMAL_REORIENTATION_CONFIDENCE:
+        return 0
+    return osd['rotate']
+
+
+def detect_orientation_heuristic(image: np.ndarray) -> Optional[int]:
+    """Returns rotation (clockwise, in degrees) making the text upright or None if the result is ambiguous.
+
+    Letters are usually taller than wide, which distinguishes horizontal text (0 or 180) from vertical
+    (90 or 270). Upright text is then recognized by bottoms of letters in a line being aligned
+    (on the baseline) better than their tops (ascenders, capitals). Works on a binarized image
+    with letters of about ORIENTATION_TARGET_TEXT_HEIGHT pixels.
+    """
+    binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+    letters = _letter_components(binary)
+    if len(letters) == 0:
+        return None
+
+    aspect_ratio = np.median(letters[:, cv2.CC_STAT_HEIGHT] / letters[:, cv2.CC_STAT_WIDTH])
+    if max(aspect_ratio, 1 / aspect_ratio) < MIN_LETTER_ASPECT_RATIO:
+        return None
+    candidates = (0, 180) if aspect_ratio > 1 else (90, 270)
+
+    baseline_score = _baseline_score(_letter_components(_reorient_image(binary, candidates[0])))
+    if abs(baseline_score) < MIN_BASELINE_SCORE:
+        return None
+    return candidates[0] if baseline_score > 0 else candidates[1]
+
+
+def _letter_components(binary: np.ndarray) -> np.ndarray:
+    """Returns stats (see cv2.connectedComponentsWithStats) of letter-like components."""
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    stats = stats[1:]
+    widths, heights = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+    # skip noise, lines, frames and pictures
+    is_letter = ((np.maximum(widths, heights) >= 6) & (heights <= binary.shape[0] / 10)
+                 & (widths <= binary.shape[1] / 10) & (widths <= 3 * heights) & (heights <= 3 * widths))
+    return stats[is_letter]
+
+
+def _baseline_score(letters: np.ndarray) -> float:
+    """Returns value in [-1, 1], positive if bottoms of letters in lines are aligned better than their tops."""
+    if len(letters) == 0:
+        return 0.0
+    tops = letters[:, cv2.CC_STAT_TOP].astype(float)
+    bottoms = tops + letters[:, cv2.CC_STAT_HEIGHT]
+    centers = (tops + bottoms) / 2
+    max_center_distance = np.median(letters[:, cv2.CC_STAT_HEIGHT]) / 2
+
+    # letters sorted by vertical center are split into lines at gaps between centers
+    order = np.argsort(centers)
+    line_starts = np.flatnonzero(np.diff(centers[order]) >= max_center_distance) + 1
+    tops_deviation, bottoms_deviation = 0.0, 0.0
+    for line in np.split(order, line_starts):
+        if len(line) < MIN_LETTERS_IN_LINE:
+            continue
+        tops_deviation += np.abs(tops[line] - np.median(tops[line])).sum()
+        bottoms_deviation += np.abs(bottoms[line] - np.median(bottoms[line])).sum()
+    if tops_deviation + bottoms_deviation == 0:
+        return 0.0
+    return (tops_deviation - bottoms_deviation) / (tops_deviation + bottoms_deviation)
+
+
 def _reorient_image(image: np.ndarray, angle: int):
     if angle == 0:
         return image
     elif angle == 90:
-        return cv2.rotate(image, cv2.cv2.ROTATE_90_CLOCKWISE)
+        return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
     elif angle == 180:
-        return cv2.rotate(image, cv2.cv2.ROTATE_180)
+        return cv2.rotate(image, cv2.ROTATE_180)
     elif angle == 270:
-        return cv2.rotate(image, cv2.cv2.ROTATE_90_COUNTERCLOCKWISE)
+        return cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
     raise ValueError("Incorrect rotation. Must be multiple of 90.")
@@ -0,0 +1,70 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Median height of connected components (letters) in pixels, for which OCR works well and fast.
+# For typical fonts it corresponds to x-height of about 20 pixels, which is recommended for tesseract.
+DEFAULT_TARGET_TEXT_HEIGHT = 25
+MIN_NUMBER_OF_LETTERS = 20
+
+
+def estimate_text_height(image: np.ndarray) -> Optional[float]:
+    """Returns median height of letter-like connected components of the binarized image
+    or None if there is too little text to estimate it."""
+    if len(image.shape) == 3:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = image
+    thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+    _, _, stats, _ = cv2.connectedComponentsWithStats(thresh, connectivity=8)
+
+    widths, heights = stats[1:, cv2.CC_STAT_WIDTH], stats[1:, cv2.CC_STAT_HEIGHT]
+    # skip noise, lines, frames and pictures
+    is_letter = (heights >= 4) & (heights <= image.shape[0] / 10) & (widths <= 3 * heights) & (heights <= 5 * widths)
+    if is_letter.sum() < MIN_NUMBER_OF_LETTERS:
+        return None
+    return float(np.median(heights[is_letter]))
+
+
+def rescale_cv2(image: np.ndarray,
+                target_text_height: float = DEFAULT_TARGET_TEXT_HEIGHT,
+                max_scale: float = 1.0,
+                min_scale: float = 0.25,
+                min_change: float = 0.1,
+                text_height: Optional[float] = None) -> Tuple[np.ndarray, float]:
+    """Rescales image so that the text has approximately target_text_height pixels.
+
+    Args:
+        image (np.ndarray): image with one or three channels
+        target_text_height (float): desired median height of letters (see estimate_text_height)
+        max_scale (float): by default images are only downscaled, set above 1.0 to allow upscaling of small text
+        min_scale (float): the image is never downscaled more than this
+        min_change (float): images are not rescaled when the relative change of size would be smaller than this
+        text_height (Optional[float]): precomputed estimate_text_height(image), computed if not given
+    Returns:
+        rescaled image and the scale factor (1.0 if the image was not changed)
+    """
+    if text_height is None:
+        text_height = estimate_text_height(image)
+    scale = get_rescale_factor(text_height, target_text_height, max_scale, min_scale, min_change)
+    if scale == 1.0:
+        return image, 1.0
+
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation), scale
+
+
+def get_rescale_factor(text_height: Optional[float],
+                       target_text_height: float = DEFAULT_TARGET_TEXT_HEIGHT,
+                       max_scale: float = 1.0,
+                       min_scale: float = 0.25,
+                       min_change: float = 0.1) -> float:
+    """Returns the scale factor used by rescale_cv2 for the image with given estimate_text_height."""
+    if text_height is None:
+        return 1.0
+
+    scale = min(max(target_text_height / text_height, min_scale), max_scale)
+    if abs(scale - 1.0) < min_change:
+        return 1.0
+    return scale
@@ -0,0 +1,86 @@
+"""Measures per-request overhead of AwsTextractBackend against a local mock of the Textract API.
+
+Compares creating a new boto3 client for every image (old behaviour) with a lazily created client reused
+by the backend instance. No AWS account is needed - dummy credentials are set for the local endpoint.
+
+Usage: python scripts/benchmark_cloud_clients.py [number_of_requests]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
+import numpy as np
+
+from mim_ocr.backends import AwsTextractBackend
+
+MOCK_RESPONSE = {
+    "DocumentMetadata": {"Pages": 1},
+    "Blocks": [
+        {"BlockType": "PAGE", "Id": "p", "Relationships": [{"Type": "CHILD", "Ids": ["l"]}]},
+        {"BlockType": "LINE", "Id": "l", "Confidence": 99.0, "Text": "mock",
+         "Geometry": {"BoundingBox": {"Left": 0.1, "Top": 0.1, "Width": 0.5, "Height": 0.1}},
+         "Relationships": [{"Type": "CHILD", "Ids": ["w"]}]},
+        {"BlockType": "WORD", "Id": "w", "Confidence": 99.0, "Text": "mock",
+         "Geometry": {"BoundingBox": {"Left": 0.1, "Top": 0.1, "Width": 0.5, "Height": 0.1}}},
+    ],
+}
+
+
+class MockTextractHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = json.dumps(MOCK_RESPONSE).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-amz-json-1.1")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class NewClientPerCallTextractBackend(AwsTextractBackend):
+    """Reproduces the behaviour from before the clients were reused."""
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs):
+        self._client = boto3.client('textract', endpoint_url=self.endpoint_url)
+        self._client_pid = os.getpid()
+        return super().run_ocr_to_box(img, *args, **kwargs)
+
+
+def benchmark(backend: AwsTextractBackend, img: np.ndarray, n_requests: int) -> float:
+    backend.run_ocr_to_box(img)  # warm-up, excluded from measurements
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        backend.run_ocr_to_box(img)
+    return (time.perf_counter() - start) / n_requests
+
+
+if __name__ == "__main__":
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "mock")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "mock")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "eu-central-1")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockTextractHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    img = np.full((200, 200, 3), 255, dtype=np.uint8)
+
+    before = benchmark(NewClientPerCallTextractBackend(endpoint_url=endpoint_url), img, n_requests)
+    after = benchmark(AwsTextractBackend(endpoint_url=endpoint_url), img, n_requests)
+    server.shutdown()
+
+    print(f"{'client per call':>20}: {1000 * before:8.2f} ms/request")
+    print(f"{'reused client':>20}: {1000 * after:8.2f} ms/request")
+    print(f"{'speedup':>20}: {before / after:8.2f}x")
@@ -0,0 +1,43 @@
+"""Compares the angle and time of deskew methods (see deskew_cv2) on rotated sample images.
+
+Usage: python scripts/benchmark_deskew.py [images_dir]
+"""
+import sys
+import time
+from pathlib import Path
+
+from mim_ocr.image import open_image
+from mim_ocr.preprocessing import rotate_cv2
+from mim_ocr.preprocessing.deskew import _determine_best_angle_projection_profile, \
+    _determine_best_angle_fast_projection_profile
+
+METHODS = {
+    'projection_profile': _determine_best_angle_projection_profile,
+    'fast_projection_profile': _determine_best_angle_fast_projection_profile,
+}
+ROTATIONS = (0.0, -0.5, 1.5, 3.5, -7.0, 9.0)
+
+if __name__ == "__main__":
+    images_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("sample_data/sample_data")
+    images = {path.name: open_image(path) for path in sorted(images_dir.iterdir()) if path.is_file()}
+
+    total_times = {name: 0.0 for name in METHODS}
+    n_different = 0
+    print(f"{'image':>32} | {'rotation':>8} | " + " | ".join(f"{name:>23}" for name in METHODS))
+    for image_name, img in images.items():
+        for rotation in ROTATIONS:
+            rotated_img = rotate_cv2(img, rotation, (255, 255, 255)) if rotation else img
+            results = []
+            for name, method in METHODS.items():
+                start = time.perf_counter()
+                angle = method(rotated_img)
+                elapsed = time.perf_counter() - start
+                total_times[name] += elapsed
+                results.append((angle, elapsed))
+            n_different += len({angle for angle, _ in results}) > 1
+            print(f"{image_name[:32]:>32} | {rotation:>8} | "
+                  + " | ".join(f"{angle:>6.1f} ({1000 * elapsed:>8.1f} ms)" for angle, elapsed in results))
+
+    n_runs = len(images) * len(ROTATIONS)
+    print("mean time: " + ", ".join(f"{name} {1000 * t / n_runs:.1f} ms" for name, t in total_times.items()))
+    print(f"different angles in {n_different} of {n_runs} runs")
@@ -0,0 +1,77 @@
+"""Compares decoding time and memory of open_image with the previous PIL-only decoding.
+
+Images from images_dir are decoded together with grayscale and bilevel TIFF versions of them
+(typical for scanned documents). Memory is the size of the returned array and the peak of memory
+allocated during decoding (traced by tracemalloc, which includes numpy and PIL buffers).
+
+Usage: python scripts/benchmark_open_image.py [images_dir]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from mim_ocr.image import open_image
+
+N_REPEATS = 5
+
+
+def open_image_pil(path: Path) -> np.ndarray:
+    """Decoding used by open_image before, for reference."""
+    with Image.open(path) as pil_image:
+        return cv2.cvtColor(np.array(pil_image.convert('RGB')), cv2.COLOR_RGB2BGR)
+
+
+DECODERS = {
+    'pil': open_image_pil,
+    'open_image': open_image,
+    'keep_grayscale': lambda path: open_image(path, keep_grayscale=True),
+    'reduce=2': lambda path: open_image(path, reduce=2),
+}
+
+
+def measure(decoder, path: Path):
+    start = time.perf_counter()
+    for _ in range(N_REPEATS):
+        decoder(path)
+    elapsed = (time.perf_counter() - start) / N_REPEATS
+    tracemalloc.start()
+    img = decoder(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, img.nbytes, peak
+
+
+if __name__ == "__main__":
+    images_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("sample_data/sample_data")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for path in sorted(images_dir.iterdir()):
+            if not path.is_file():
+                continue
+            paths.append(path)
+            with Image.open(path) as pil_image:
+                for mode, name in (('L', 'gray'), ('1', 'bilevel')):
+                    tiff_path = Path(tmp_dir, f"{path.stem}-{name}.tiff")
+                    pil_image.convert(mode).save(tiff_path, compression='tiff_lzw')
+                    paths.append(tiff_path)
+
+        print(f"{'image':>36} | " + " | ".join(f"{name:>28}" for name in DECODERS))
+        totals = {name: np.zeros(3) for name in DECODERS}
+        for path in paths:
+            results = [measure(decoder, path) for decoder in DECODERS.values()]
+            for name, result in zip(DECODERS, results):
+                totals[name] += result
+            print(f"{path.name[-36:]:>36} | " + " | ".join(
+                f"{1000 * t:>6.1f} ms {size / 2 ** 20:>6.1f} MB {peak / 2 ** 20:>6.1f} MB"
+                for t, size, peak in results))
+
+    print("mean per page (time, array size, peak memory):")
+    for name, (t, size, peak) in totals.items():
+        print(f"{name:>16}: {1000 * t / len(paths):.1f} ms, {size / len(paths) / 2 ** 20:.1f} MB, "
+              f"{peak / len(paths) / 2 ** 20:.1f} MB")
@@ -0,0 +1,94 @@
+"""Compares throughput and accuracy of pipeline profiles (see mim_ocr.pipeline.profiles.PROFILES).
+
+Every image from images_dir is processed with preprocessing and backend of every profile. Accuracy is
+the similarity (1 - normalized edit distance, from difflib) of recognized words to the words of the reference
+result of the image from reference_dir (Box in excel file named like the image with .xlsx suffix), e.g.
+sample_data_tesseract_result. Printed table is in Markdown format. If docs_path is given, the table also
+replaces the part of this file between BENCHMARK_TABLE_START and BENCHMARK_TABLE_END (e.g. docs/profiles.md).
+
+Usage: python scripts/benchmark_profiles.py [images_dir] [reference_dir] [tessdata_dir] [docs_path]
+"""
+import difflib
+import platform
+import sys
+import time
+from pathlib import Path
+
+import pytesseract
+
+from mim_ocr.backends import MultiResolutionBackend
+from mim_ocr.data_model import Box
+from mim_ocr.image import open_image
+from mim_ocr.pipeline.pipeline import run_ocr_pipeline_on_image
+from mim_ocr.pipeline.profiles import PROFILES, PipelineProfile
+
+BENCHMARK_TABLE_START = "<!-- benchmark table start -->"
+BENCHMARK_TABLE_END = "<!-- benchmark table end -->"
+
+
+def get_words(box: Box):
+    return box.get_full_text().split()
+
+
+def word_similarity(words, reference_words) -> float:
+    return difflib.SequenceMatcher(a=words, b=reference_words, autojunk=False).ratio()
+
+
+def get_missing_models(profiles, tessdata_dir):
+    """Returns traineddata files of profiles missing in tessdata_dir, so that no profile silently falls back
+    to installed models."""
+    paths = {Path(tessdata_dir or "tessdata", profile.tessdata_variant, f"{profile.lang}.traineddata")
+             for profile in profiles.values() if profile.tessdata_variant is not None}
+    return sorted(str(path) for path in paths if tessdata_dir is None or not path.exists())
+
+
+def update_docs(docs_path: Path, table: str) -> None:
+    text = docs_path.read_text()
+    start, end = text.index(BENCHMARK_TABLE_START) + len(BENCHMARK_TABLE_START), text.index(BENCHMARK_TABLE_END)
+    docs_path.write_text(text[:start] + "\n" + table + "\n" + text[end:])
+
+
+if __name__ == "__main__":
+    images_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("sample_data/sample_data")
+    reference_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else Path("sample_data/sample_data_tesseract_result")
+    tessdata_dir = sys.argv[3] if len(sys.argv) > 3 else None
+    docs_path = Path(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    profiles = {'default': PipelineProfile(), **PROFILES}
+    tesseract_version = pytesseract.get_tesseract_version()
+    missing_models = get_missing_models(profiles, tessdata_dir)
+    if missing_models:
+        sys.exit(f"Missing models: {', '.join(missing_models)}")
+
+    paths = [path for path in sorted(images_dir.iterdir()) if Path(reference_dir, path.name + ".xlsx").exists()]
+    images = {path: open_image(path) for path in paths}
+    references = {path: get_words(Box.from_excel(Path(reference_dir, path.name + ".xlsx"))) for path in paths}
+    n_pixels = sum(img.shape[0] * img.shape[1] for img in images.values())
+
+    lines = [f"{len(paths)} images, {n_pixels / len(paths) / 1e6:.1f} Mpx per image on average, "
+             f"tesseract {tesseract_version}, {platform.processor() or platform.machine()}, "
+             f"{platform.python_implementation()} {platform.python_version()}",
+             "",
+             "| profile | s / page | pages / min | word accuracy | min word accuracy |",
+             "|---|---|---|---|---|"]
+    print("\n".join(lines))
+    for name, profile in profiles.items():
+        backend = profile.get_backend(tessdata_dir)
+        if profile.multi_resolution_scale is not None:
+            backend = MultiResolutionBackend(backend, scale=profile.multi_resolution_scale)
+        transformations = profile.get_preprocessing_transformations()
+
+        elapsed = 0.0
+        accuracies = []
+        for path, img in images.items():
+            start = time.perf_counter()
+            _, box = run_ocr_pipeline_on_image(img.copy(), path, transformations, backend)
+            elapsed += time.perf_counter() - start
+            accuracies.append(word_similarity(get_words(box), references[path]))
+
+        lines.append(f"| {name} | {elapsed / len(paths):.2f} | {60 * len(paths) / elapsed:.1f} "
+                     f"| {sum(accuracies) / len(accuracies):.3f} | {min(accuracies):.3f} |")
+        print(lines[-1])
+
+    if docs_path is not None:
+        update_docs(docs_path, "\n".join(lines))
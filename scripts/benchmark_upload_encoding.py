@@ -0,0 +1,36 @@
+"""Compares encode time and payload size of upload encodings used by cloud backends (see UploadEncoding).
+
+Usage: python scripts/benchmark_upload_encoding.py [images_dir]
+"""
+import sys
+import time
+from pathlib import Path
+
+from mim_ocr.backends import UploadEncoding
+from mim_ocr.image import open_image
+
+ENCODINGS = {
+    'png (default)': UploadEncoding(),
+    'png, compression level 1': UploadEncoding(png_compression=1),
+    'png, grayscale': UploadEncoding(grayscale=True),
+    'jpeg 90': UploadEncoding(image_format='jpeg', quality=90),
+    'jpeg 80, grayscale': UploadEncoding(image_format='jpeg', quality=80, grayscale=True),
+    'webp 80, grayscale': UploadEncoding(image_format='webp', quality=80, grayscale=True),
+    'jpeg 80, grayscale, max 1600px': UploadEncoding(image_format='jpeg', quality=80, grayscale=True,
+                                                     max_dimension=1600),
+}
+N_REPEATS = 5
+
+if __name__ == "__main__":
+    images_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("sample_data/sample_data")
+    images = [open_image(path) for path in sorted(images_dir.iterdir()) if path.is_file()]
+    total_pixels = sum(img.shape[0] * img.shape[1] for img in images)
+    print(f"{len(images)} images, {total_pixels / 1e6:.1f} Mpx in total")
+
+    print(f"{'encoding':>32} | {'encode ms/image':>15} | {'payload kB/image':>16}")
+    for name, encoding in ENCODINGS.items():
+        start = time.perf_counter()
+        for _ in range(N_REPEATS):
+            payload_size = sum(len(encoding.encode(img)[0]) for img in images)
+        encode_time = (time.perf_counter() - start) / N_REPEATS / len(images)
+        print(f"{name:>32} | {1000 * encode_time:>15.1f} | {payload_size / 1024 / len(images):>16.1f}")
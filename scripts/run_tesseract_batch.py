@@ -1,9 +1,8 @@
-from typing import List, Callable
+from typing import List
 
-from mim_ocr.backends import OCRBackend
+from mim_ocr.backends import OCRBackend, TesseractBackend
 import mim_ocr.heuristics
 from mim_ocr.heuristics import Feature
-from mim_ocr.image.transformations import reorient, deskew
 
 from mim_ocr.pipeline.batch_processing import batch_run_pipeline_and_save_dataframe_for_dirs, \
     RunPipelineAndSaveDataframeInput
@@ -14,13 +13,16 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    backend = OCRBackend.get_by_name(args.backend) if args.backend is not None else None
+    profile = parser.get_profile(args)
 
-    preprocessing_transformations: List[Callable] = []
-    if args.reorient:
-        preprocessing_transformations.append(reorient)
-    if args.deskew:
-        preprocessing_transformations.append(deskew)
+    if args.backend is not None and args.backend != TesseractBackend.__name__:
+        backend = OCRBackend.get_by_name(args.backend)
+    elif args.backend is not None or args.profile:
+        backend = profile.get_backend(args.tessdata_dir)
+    else:
+        backend = None
+
+    preprocessing_transformations = profile.get_preprocessing_transformations()
 
     features: List[Feature] = []
     if args.features:
@@ -28,6 +30,7 @@ if __name__ == "__main__":
             feature = getattr(mim_ocr.heuristics, feature_name)
             assert isinstance(feature, Feature)
             features.append(feature)
+    features = profile.filter_features(features)
 
     # To avoid using a lot of arguments we put them inside a dataclass
     pipeline_args = RunPipelineAndSaveDataframeInput(
@@ -40,6 +43,22 @@ if __name__ == "__main__":
         input_box_path=args.input_box_dir,
         features=features,
         batch_size=args.batch_size,
+        ocr_cache_path=args.ocr_cache,
+        ocr_cache_max_size_mb=args.ocr_cache_max_size_mb,
+        ocr_deskew_threshold=args.ocr_deskew_threshold,
+        multi_resolution_scale=profile.multi_resolution_scale,
+        tile_size=args.tile_size,
+        tile_overlap=args.tile_overlap,
+        tile_workers=args.tile_workers,
+        preprocessing_cache_path=args.preprocessing_cache,
+        preprocessing_cache_max_size_mb=args.preprocessing_cache_max_size_mb,
+        preprocessing_cache_max_age_days=args.preprocessing_cache_max_age_days,
+        keep_grayscale=bool(args.keep_grayscale),
+        pdf_dpi=profile.pdf_dpi,
+        time_budget=args.time_budget,
+        deduplicate=bool(args.deduplicate),
+        dedup_threshold=args.dedup_threshold,
+        dedup_exact_only=bool(args.dedup_exact_only),
     )
 
     batch_run_pipeline_and_save_dataframe_for_dirs(pipeline_args)
@@ -1,4 +1,7 @@
+import pickle
+
 from mim_ocr.backends.aws_textract import AwsTextractBackend
+from mim_ocr.data_model.box import BoxType
 from mim_ocr.image import open_image
 
 INPUT_DATA = {
@@ -10,3 +13,58 @@ def test_simple_aws_textract_ocr(validate_cwd):
     img = open_image(INPUT_DATA["example_image_path"])
     box = AwsTextractBackend().run_ocr_to_box(img)
     assert box.calc_confidence()['total_letters'] > 900
+
+
+def test_aws_textract_client_reused(mocker):
+    boto3_mock = mocker.patch("mim_ocr.backends.aws_textract.boto3")
+    backend = AwsTextractBackend(max_pool_connections=4)
+    assert backend.client is backend.client
+    assert boto3_mock.session.Session.return_value.client.call_count == 1
+    assert boto3_mock.session.Session.return_value.client.call_args.kwargs['config'].max_pool_connections == 4
+
+    # client has to be recreated in a forked process
+    mocker.patch("mim_ocr.backends.backend.os.getpid", return_value=-1)
+    backend.client
+    assert boto3_mock.session.Session.return_value.client.call_count == 2
+
+
+def test_aws_textract_client_not_pickled(mocker):
+    mocker.patch("mim_ocr.backends.aws_textract.boto3")
+    backend = AwsTextractBackend()
+    backend.client
+    unpickled_backend = pickle.loads(pickle.dumps(backend))
+    assert unpickled_backend._client is None
+    assert backend._client is not None
+
+
+def _textract_block(block_type: str, block_id: str, child_ids=None, text=None) -> dict:
+    block = {
+        "BlockType": block_type, "Id": block_id, "Confidence": 90.0,
+        "Geometry": {"BoundingBox": {"Left": 0.1, "Top": 0.2, "Width": 0.5, "Height": 0.25}},
+    }
+    if text is not None:
+        block["Text"] = text
+    if child_ids is not None:
+        # children split into two relationship entries, as it happens in multi-page responses
+        block["Relationships"] = [{"Type": "CHILD", "Ids": child_ids[:1]}, {"Type": "CHILD", "Ids": child_ids[1:]}]
+    return block
+
+
+def test_aws_textract_response_to_box():
+    response = {
+        "DocumentMetadata": {"Pages": 2},
+        "Blocks": [
+            _textract_block("PAGE", "p1", ["l1", "l2"]),
+            _textract_block("PAGE", "p2", ["l3"]),
+            _textract_block("LINE", "l1", ["w1", "w2"]),
+            _textract_block("LINE", "l2", ["w3"]),
+            _textract_block("LINE", "l3", ["w4", "w5"]),
+        ] + [_textract_block("WORD", f"w{i}", text=f"word{i}") for i in range(1, 6)],
+    }
+    box = AwsTextractBackend().response_to_box(response, img_height=100, img_width=200)
+
+    assert box.additional_data == {"DocumentMetadata": {"Pages": 2}}
+    assert [len(page.children) for page in box.children] == [2, 1]
+    assert [b.text for b in box.get_subboxes(BoxType.AWS_BLOCK_WORD)] == [f"word{i}" for i in range(1, 6)]
+    word_box = box.children[1].children[0].children[1]
+    assert (word_box.left, word_box.top, word_box.right, word_box.bottom) == (20, 20, 120, 45)
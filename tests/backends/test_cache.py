@@ -0,0 +1,106 @@
+import itertools
+import os
+import pickle
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+
+from mim_ocr.backends import OCRBackend, CachingBackend, DirectoryCacheStore, SQLiteCacheStore, OCRCacheStore
+from mim_ocr.data_model import Box
+from mim_ocr.data_model.box import BoxType
+
+
+class CountingBackend(OCRBackend):
+    def __init__(self, config: str = "default"):
+        self.config = config
+        self.calls = 0
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        self.calls += 1
+        box = Box.create_root_box()
+        Box.add_child(box, Box(text=f"sum={int(img.sum())}", box_type=BoxType.EASYOCR_BOX, conf=90.0,
+                               left=1, top=2, right=3, bottom=4))
+        return box
+
+    def get_config(self) -> Dict[str, Any]:
+        return {'config': self.config}
+
+
+def _image(value: int) -> np.ndarray:
+    return np.full((10, 20, 3), value, dtype=np.uint8)
+
+
+@pytest.fixture(params=["cache_dir", "cache.sqlite"])
+def cache_path(request, tmp_path):
+    return tmp_path / request.param
+
+
+def test_caching_backend_hits_and_misses(cache_path):
+    backend = CountingBackend()
+    caching_backend = CachingBackend(backend, OCRCacheStore.from_path(cache_path))
+
+    box = caching_backend.run_ocr_to_box(_image(1))
+    cached_box = caching_backend.run_ocr_to_box(_image(1))
+    assert cached_box == box
+    assert (caching_backend.hits, caching_backend.misses, backend.calls) == (1, 1, 1)
+
+    caching_backend.run_ocr_to_box(_image(2))
+    caching_backend.run_ocr_to_box(_image(1), config="other")
+    CachingBackend(CountingBackend(config="other"), caching_backend.store).run_ocr_to_box(_image(1))
+    assert (caching_backend.hits, caching_backend.misses, backend.calls) == (1, 3, 3)
+
+    # cache is persistent and can be shared with other processes
+    unpickled_backend = pickle.loads(pickle.dumps(caching_backend))
+    unpickled_backend.run_ocr_to_box(_image(2))
+    assert unpickled_backend.hits == 2
+
+
+@pytest.mark.parametrize("store_class", [DirectoryCacheStore, SQLiteCacheStore])
+def test_cache_store_lru_eviction(store_class, tmp_path, mocker):
+    mocker.patch("mim_ocr.backends.cache.time.time", side_effect=itertools.count())
+    store = store_class(tmp_path / "cache", max_size_bytes=250)
+    for i, key in enumerate(["aa1", "bb2"]):
+        store.put(key, bytes(100))
+        if store_class == DirectoryCacheStore:
+            os.utime(store._entry_path(key), (i, i))
+
+    assert store.get("aa1") is not None  # "aa1" becomes the most recently used entry
+    store.put("cc3", bytes(100))
+
+    assert store.get("bb2") is None
+    assert store.get("aa1") is not None
+    assert store.get("cc3") is not None
+
+
+def test_caching_backend_batch(cache_path):
+    backend = CountingBackend()
+    caching_backend = CachingBackend(backend, OCRCacheStore.from_path(cache_path))
+    caching_backend.run_ocr_to_box(_image(2))
+
+    boxes = caching_backend.run_ocr_to_boxes([_image(1), _image(2), _image(3)], n_workers=2)
+
+    assert [b.get_full_text() for b in boxes] == ["sum=600", "sum=1200", "sum=1800"]
+    assert (caching_backend.hits, caching_backend.misses, backend.calls) == (1, 3, 3)
+
+
+@pytest.mark.parametrize("store_class", [DirectoryCacheStore, SQLiteCacheStore])
+def test_cache_store_expiration(store_class, tmp_path, mocker):
+    time_mock = mocker.patch("mim_ocr.backends.cache.time.time", return_value=1000.0)
+    store = store_class(tmp_path / "cache", max_age_seconds=100)
+    store.put("aa1", bytes(10))
+    if store_class == DirectoryCacheStore:
+        os.utime(store._entry_path("aa1"), (1000, 1000))
+
+    time_mock.return_value = 1050.0
+    assert store.get("aa1") is not None
+    if store_class == DirectoryCacheStore:
+        os.utime(store._entry_path("aa1"), (1050, 1050))
+
+    time_mock.return_value = 1200.0
+    assert store.get("aa1") is None
+    store.put("bb2", bytes(10))
+    if store_class == DirectoryCacheStore:
+        assert not store._entry_path("aa1").exists()
+    else:
+        assert store.connection.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0] == 1
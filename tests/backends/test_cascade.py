@@ -0,0 +1,54 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from mim_ocr.backends import OCRBackend, CascadingBackend
+from mim_ocr.data_model import Box
+from mim_ocr.data_model.box import BoxType
+
+
+class FakeTesseractBackend(OCRBackend):
+    """Returns one line with single word for every (text, confidence) pair, lines are 10 pixels high."""
+
+    def __init__(self, lines: List[Tuple[str, float]]):
+        self.lines = lines
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        box = Box.create_root_box()
+        for box_type in [BoxType.TESSERACT_DOCUMENT, BoxType.TESSERACT_PAGE, BoxType.TESSERACT_PARAGRAPH]:
+            box.add_box_based_on_type(Box(text=None, box_type=box_type, left=0, top=0, right=100, bottom=100))
+        for i, (text, conf) in enumerate(self.lines):
+            box.add_box_based_on_type(Box(text=None, box_type=BoxType.TESSERACT_LINE,
+                                          left=10, top=10 * i, right=90, bottom=10 * i + 10))
+            box.add_box_based_on_type(Box(text=text, box_type=BoxType.TESSERACT_WORD, conf=conf,
+                                          left=10, top=10 * i, right=90, bottom=10 * i + 10))
+        return box
+
+
+class FakeCloudBackend(OCRBackend):
+    def __init__(self):
+        self.image_shapes = []
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        self.image_shapes.append(img.shape)
+        box = Box.create_root_box()
+        Box.add_child(box, Box(text="cloud", box_type=BoxType.EASYOCR_BOX, conf=99.0, left=1, top=2, right=3, bottom=4))
+        return box
+
+
+def test_cascading_backend_recomputes_only_low_confidence_lines():
+    secondary_backend = FakeCloudBackend()
+    backend = CascadingBackend(FakeTesseractBackend([("good", 95.0), ("bad", 30.0), ("", -1.0), ("good", 85.0)]),
+                               secondary_backend, confidence_threshold=80.0)
+
+    box = backend.run_ocr_to_box(np.zeros((100, 100, 3), dtype=np.uint8))
+
+    assert secondary_backend.image_shapes == [(10, 80, 3)]
+    assert [line.get_full_text() for line in box.get_subboxes(BoxType.TESSERACT_LINE)] == \
+        ["good", "cloud", "", "good"]
+    recomputed_line = box.get_subboxes(BoxType.TESSERACT_LINE)[1]
+    assert recomputed_line.additional_data["recomputed_ocr"] == "FakeCloudBackend"
+    cloud_box = recomputed_line.children[0]
+    assert (cloud_box.left, cloud_box.top, cloud_box.right, cloud_box.bottom) == (11, 12, 13, 14)
+    assert cloud_box.parent is recomputed_line
+    assert box.box_dict[cloud_box.box_id] is cloud_box
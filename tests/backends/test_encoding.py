@@ -0,0 +1,83 @@
+from pathlib import Path
+from typing import Any
+
+import cv2
+import numpy as np
+import pytest
+
+from mim_ocr.backends import CloudOCRBackend, UploadEncoding
+from mim_ocr.data_model import Box
+from mim_ocr.data_model.box import BoxType
+from mim_ocr.image import open_image
+
+INPUT_DATA = {
+    "example_image_path": "tests/input_data/example_report1.png",
+}
+
+
+class FakeCloudBackend(CloudOCRBackend):
+    """Returns single box covering the whole uploaded image."""
+    supported_formats = ('png', 'jpeg', 'webp')
+
+    def _create_client(self) -> Any:
+        return None
+
+    def _run_ocr_on_encoded_image(self, content: bytes, img_height: int, img_width: int) -> Box:
+        self.uploaded_content = content
+        uploaded_img = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        assert uploaded_img.shape[:2] == (img_height, img_width)
+        box = Box.create_root_box()
+        Box.add_child(box, Box(text="image", box_type=BoxType.CUSTOM, right=img_width, bottom=img_height))
+        return box
+
+
+@pytest.mark.parametrize("encoding", [
+    UploadEncoding(),
+    UploadEncoding(image_format='jpeg', quality=80, grayscale=True),
+    UploadEncoding(image_format='webp', quality=50, max_dimension=500),
+])
+def test_upload_encoding(encoding, validate_cwd):
+    img = open_image(INPUT_DATA["example_image_path"])
+    backend = FakeCloudBackend(encoding)
+
+    box = backend.run_ocr_to_box(img)
+
+    uploaded_img = cv2.imdecode(np.frombuffer(backend.uploaded_content, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    assert len(uploaded_img.shape) == (2 if encoding.grayscale else 3)
+    assert max(uploaded_img.shape) <= (encoding.max_dimension or max(img.shape))
+    # results are always in coordinates of the input image
+    assert box.children[0].size() == (img.shape[1], img.shape[0])
+
+
+def test_upload_source_file(validate_cwd):
+    img = open_image(INPUT_DATA["example_image_path"])
+
+    backend = FakeCloudBackend()
+    backend.run_ocr_to_box(img, source_path=Path(INPUT_DATA["example_image_path"]))
+    assert backend.uploaded_content == Path(INPUT_DATA["example_image_path"]).read_bytes()
+
+    backend = FakeCloudBackend(UploadEncoding(max_dimension=500))
+    backend.run_ocr_to_box(img, source_path=Path(INPUT_DATA["example_image_path"]))
+    assert backend.uploaded_content != Path(INPUT_DATA["example_image_path"]).read_bytes()
+
+
+def test_upload_source_file_in_other_format(validate_cwd, tmp_path):
+    encoding = UploadEncoding(image_format='jpeg', quality=50)
+
+    # PNG of noise is larger than the requested JPEG
+    noise_path = tmp_path / "noise.png"
+    cv2.imwrite(str(noise_path), np.random.default_rng(0).integers(0, 256, (300, 400, 3), dtype=np.uint8))
+    noise_img = open_image(noise_path)
+    backend = FakeCloudBackend(encoding)
+    backend.run_ocr_to_box(noise_img, source_path=noise_path)
+    assert backend.uploaded_content == encoding.encode(noise_img)[0]
+
+    # PNG of a document is smaller than the requested JPEG
+    path = Path(INPUT_DATA["example_image_path"])
+    backend.run_ocr_to_box(open_image(path), source_path=path)
+    assert backend.uploaded_content == path.read_bytes()
+
+
+def test_unsupported_upload_format():
+    with pytest.raises(ValueError):
+        FakeCloudBackend(UploadEncoding(image_format='gif'))
@@ -0,0 +1,53 @@
+from typing import Tuple
+
+import numpy as np
+import pytest
+
+from mim_ocr.backends import MultiResolutionBackend
+from mim_ocr.backends.multi_resolution import fails_feature_sanity_check, REOCR_LINES_KEY
+from mim_ocr.data_model.box import BoxType
+from mim_ocr.heuristics import NUMBER_FEATURE, DATE_FEATURE
+from fixtures.backends import BarsBackend
+
+
+def read_bar(height: int, is_cut: bool) -> Tuple[str, float]:
+    """Bars lower than 10 pixels are recognized with low confidence and wrong text, like small text
+    in low resolution."""
+    return ("bar", 95.0) if height >= 10 else ("b4r", 30.0)
+
+
+def test_multi_resolution_backend():
+    img = np.full((400, 600, 3), 255, dtype=np.uint8)
+    img[50:90, 100:500] = 0
+    img[150:162, 100:300] = 0
+    img[250:290, 100:400] = 0
+    backend = BarsBackend(read_bar)
+
+    box = MultiResolutionBackend(backend, scale=0.5).run_ocr_to_box(img)
+
+    assert backend.image_shapes[0] == (200, 300, 3)
+    assert len(backend.image_shapes) == 2
+    assert backend.image_shapes[1][0] < 12 + 2 * 4 and backend.image_shapes[1][1] < 200 + 2 * 4
+    assert box.additional_data[REOCR_LINES_KEY] == 1
+    assert box.get_full_text() == "bar bar bar"
+
+    words = sorted(box.get_subboxes(BoxType.TESSERACT_WORD), key=lambda b: b.top)
+    assert [(w.left, w.top, w.right, w.bottom) for w in words] == [
+        (100, 50, 500, 90), (100, 150, 300, 162), (100, 250, 400, 290)]
+    # like in run_ocr_on_single_box, the result of the crop replaces children of the weak line
+    assert words[1].parent.parent.additional_data['recomputed_ocr'] == 'BarsBackend'
+
+
+def test_multi_resolution_backend_invalid_scale():
+    with pytest.raises(ValueError):
+        MultiResolutionBackend(BarsBackend(read_bar), scale=2.0)
+
+
+@pytest.mark.parametrize("text, fails", [
+    ("Data badania: 12.O3.2O21", True),
+    ("Data badania: 12.03.2021", False),
+    ("Wynik 1O,5 mg/dl", True),
+    ("Osoba Badana", False),
+])
+def test_fails_feature_sanity_check(text, fails):
+    assert fails_feature_sanity_check(text, [NUMBER_FEATURE, DATE_FEATURE]) == fails
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from mim_ocr.backends import OCRBackend, SkewCorrectingBackend
+from mim_ocr.backends.skew import SKEW_ANGLE_KEY
+from mim_ocr.data_model import Box
+from fixtures.boxes import skewed_words_box
+
+
+class SkewedTextBackend(OCRBackend):
+    """Returns words skewed by given angle for the original image and straight words for any other image."""
+
+    def __init__(self, angle: float, img_shape=(1000, 1200)):
+        self.angle = angle
+        self.img_shape = img_shape
+        self.calls = 0
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        self.calls += 1
+        return skewed_words_box(self.angle if img.shape[:2] == self.img_shape else 0.0, img_shape=self.img_shape)
+
+
+@pytest.mark.parametrize("angle, expected_calls", [(0.0, 1), (1.0, 1), (-4.0, 2)])
+def test_skew_correcting_backend(angle, expected_calls):
+    backend = SkewedTextBackend(angle)
+    box = SkewCorrectingBackend(backend, reocr_threshold=2.0).run_ocr_to_box(np.zeros((1000, 1200, 3), np.uint8))
+
+    assert backend.calls == expected_calls
+    assert box.additional_data.get(SKEW_ANGLE_KEY, 0.0) == pytest.approx(angle, abs=0.2)
+    for line in box.children:
+        assert max(w.top for w in line.children) - min(w.top for w in line.children) <= 2
+
+
+@pytest.mark.parametrize("reocr_threshold", [-1.0, 45.0])
+def test_skew_correcting_backend_invalid_threshold(reocr_threshold):
+    with pytest.raises(ValueError):
+        SkewCorrectingBackend(SkewedTextBackend(0.0), reocr_threshold=reocr_threshold)
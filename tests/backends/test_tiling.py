@@ -0,0 +1,76 @@
+from typing import Tuple
+
+import numpy as np
+import pytest
+
+from mim_ocr.backends import TilingBackend
+from mim_ocr.backends.tiling import get_tiles, TILES_KEY, DEFAULT_TILE_OVERLAP
+from mim_ocr.data_model.box import BoxType
+from mim_ocr.pipeline.batch_processing import RunPipelineAndSaveDataframeInput, OcrBatchProcessingArgumentParser
+from fixtures.backends import BarsBackend
+
+WORDS_BY_HEIGHT = {20: "alpha", 24: "beta", 28: "gamma", 32: "delta", 36: "epsilon"}
+
+
+def read_bar(height: int, is_cut: bool) -> Tuple[str, float]:
+    """The text depends on the height of the bar, bars cut by the edge of the image are recognized partially
+    (first two letters)."""
+    return (WORDS_BY_HEIGHT[height][:2] if is_cut else WORDS_BY_HEIGHT[height]), 90.0
+
+
+def test_get_tiles():
+    assert get_tiles(300, 200, 500, 100) == [(0, 0, 300, 200)]
+    tiles = get_tiles(1000, 1300, 500, 100)
+    assert len(tiles) == 3 * 3
+    assert {(left, right) for left, _, right, _ in tiles} == {(0, 400), (300, 700), (600, 1000)}
+    assert {(top, bottom) for _, top, _, bottom in tiles} == {(0, 500), (400, 900), (800, 1300)}
+
+
+def test_tiling_backend():
+    img = np.full((400, 1000, 3), 255, dtype=np.uint8)
+    bars = [(50, 150, 20), (320, 380, 24), (380, 460, 28), (650, 690, 32), (800, 900, 36)]
+    for k, (left, right, height) in enumerate(bars):
+        img[50 + 60 * k:50 + 60 * k + height, left:right] = 0
+    backend = BarsBackend(read_bar)
+
+    box = TilingBackend(backend, tile_size=500, overlap=100, n_workers=2).run_ocr_to_box(img)
+
+    assert backend.image_shapes == [(400, 400, 3)] * 3
+    assert box.additional_data[TILES_KEY] == 3
+    words = sorted(box.get_subboxes(BoxType.TESSERACT_WORD), key=lambda b: b.left)
+    assert [w.text for w in words] == ["alpha", "beta", "gamma", "delta", "epsilon"]
+    assert [(w.left, w.right, w.bottom - w.top) for w in words] == bars
+    assert len(box.get_subboxes(BoxType.TESSERACT_LINE)) == 5
+    assert all(box.box_dict[b.box_id] is b for b in box.get_subboxes())
+
+
+def test_tiling_backend_small_image():
+    backend = BarsBackend(read_bar)
+    img = np.full((300, 400, 3), 255, dtype=np.uint8)
+    img[100:120, 50:150] = 0
+    box = TilingBackend(backend, tile_size=500, overlap=100).run_ocr_to_box(img)
+    assert backend.image_shapes == [img.shape]
+    assert box.get_full_text() == "alpha"
+    assert TILES_KEY not in box.additional_data
+
+    with pytest.raises(ValueError):
+        TilingBackend(backend, tile_size=500, overlap=250)
+
+
+def test_batch_processing_tiling_options():
+    args = RunPipelineAndSaveDataframeInput(image_input_path="in", out_dir="out", prep_dir=None, nr_proc=1,
+                                            backend=BarsBackend(read_bar), input_box_path=None, tile_size=1000,
+                                            tile_workers=3)
+    args.wrap_backend_with_tiling()
+    assert isinstance(args.backend, TilingBackend)
+    assert (args.backend.tile_size, args.backend.overlap, args.backend.n_workers) == (1000, DEFAULT_TILE_OVERLAP, 3)
+
+    parser = OcrBatchProcessingArgumentParser()
+    args = parser.parse_args(['--out_dir', 'out', '--profile', 'fast', '--tile_size', '602'])
+    assert (args.tile_overlap, args.tile_workers) == (DEFAULT_TILE_OVERLAP, 1)
+    assert parser.parse_args(['--out_dir', 'out', '--profile', 'fast', '--tile_size', '102',
+                              '--tile_overlap', '50']).tile_overlap == 50
+    for options in (['--tile_size', '601'], ['--tile_size', '100', '--tile_overlap', '50'],
+                    ['--tile_size', '1000', '--tile_overlap', '-1'], ['--tile_size', '1000', '--tile_workers', '0']):
+        with pytest.raises(ValueError):
+            parser.parse_args(['--out_dir', 'out', '--profile', 'fast'] + options)
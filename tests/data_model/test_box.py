@@ -177,3 +177,27 @@ def test_merge_subboxes(validate_cwd):
     assert word_box.bottom == 125
     assert word_box.conf == 100
     assert word_box.text == "t1t2"
+
+
+def test_translate_and_scale():
+    box = Box.create_root_box()
+    Box.add_child(box, Box(text="a", box_type=BoxType.CUSTOM, left=10, top=20, right=30, bottom=40))
+
+    box.translate(5, -10)
+    assert box.children[0].to_dict().items() >= {'left': 15, 'top': 10, 'right': 35, 'bottom': 30}.items()
+    assert (box.left, box.top) == (-1, -1)
+
+    box.scale(2, 0.5)
+    assert box.children[0].to_dict().items() >= {'left': 30, 'top': 5, 'right': 70, 'bottom': 15}.items()
+
+
+def test_replace_children():
+    box = Box.create_root_box()
+    old_child = Box(text="old", box_type=BoxType.CUSTOM)
+    Box.add_child(box, old_child)
+    new_child = Box(text="new", box_type=BoxType.CUSTOM)
+
+    box.replace_children([new_child])
+    assert box.children == [new_child]
+    assert new_child.parent is box
+    assert list(box.box_dict.keys()) == [new_child.box_id]
@@ -1,7 +1,12 @@
-from mim_ocr.backends import TesseractBackend
-from mim_ocr.data_model.box import BoxType
-from mim_ocr.data_model.box_functions import run_ocr_on_box, run_ocr_on_single_box
+import numpy as np
+import pytest
+
+from mim_ocr.backends import TesseractBackend, OCRBackend
+from mim_ocr.data_model.box import BoxType, Box
+from mim_ocr.data_model.box_functions import run_ocr_on_box, run_ocr_on_single_box, run_ocr_on_boxes_mosaic, \
+    estimate_skew_angle, rotate_box_coordinates, unrotate_box_coordinates
 from mim_ocr.image import open_image
+from fixtures.boxes import skewed_words_box
 
 INPUT_DATA = {
     "example_tesseract_image_path": "tests/input_data/example_report1.png",
@@ -38,3 +43,98 @@ def test_run_ocr_on_box(validate_cwd):
         n_new_boxes_type = (new_df['box_type'] == box_type.value).sum()
 
         assert n_boxes_type <= n_new_boxes_type
+
+
+class MeanValueBackend(OCRBackend):
+    """Returns a single box with mean pixel value of the image as a text."""
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        box = Box.create_root_box()
+        Box.add_child(box, Box(text=str(int(img.mean())), box_type=BoxType.EASYOCR_BOX,
+                               left=1, top=1, right=img.shape[1], bottom=img.shape[0]))
+        return box
+
+
+def test_run_ocr_on_box_parallel_single_channel():
+    img = np.zeros((100, 50), dtype=np.uint8)
+    box = Box.create_root_box()
+    Box.add_child(box, Box(text=None, box_type=BoxType.TESSERACT_PARAGRAPH, left=0, top=0, right=50, bottom=100))
+    for i in range(10):
+        img[10 * i:10 * i + 10, :] = i
+        line = Box(text="old", box_type=BoxType.TESSERACT_LINE, left=0, top=10 * i, right=50, bottom=10 * i + 10)
+        Box.add_child(box.children[0], line)
+
+    box = run_ocr_on_box(MeanValueBackend(), img, box, box_type=BoxType.TESSERACT_LINE, n_workers=4)
+
+    lines = box.get_subboxes(BoxType.TESSERACT_LINE)
+    assert [line.get_full_text() for line in lines] == [str(i) for i in range(10)]
+    assert all(line.additional_data["recomputed_ocr"] == "MeanValueBackend" for line in lines)
+    assert [(b.top, b.bottom) for b in box.get_subboxes(BoxType.EASYOCR_BOX)] == [(10 * i + 1, 10 * i + 10)
+                                                                                  for i in range(10)]
+
+
+class DarkRowsBackend(OCRBackend):
+    """Returns a word for every group of consecutive non-white rows, with the darkest value as a text."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        self.calls += 1
+        box = Box.create_root_box()
+        dark_rows = np.flatnonzero((img < 255).any(axis=1))
+        groups = np.split(dark_rows, np.flatnonzero(np.diff(dark_rows) > 1) + 1)
+        for rows in groups:
+            columns = np.flatnonzero((img[rows[0]] < 255))
+            Box.add_child(box, Box(text=str(img[rows].min()), box_type=BoxType.TESSERACT_WORD,
+                                   left=columns[0], top=rows[0], right=columns[-1] + 1, bottom=rows[-1] + 1))
+        return box
+
+
+def test_run_ocr_on_boxes_mosaic():
+    img = np.full((200, 100), 255, dtype=np.uint8)
+    box = Box.create_root_box()
+    for i in range(5):
+        img[40 * i + 5:40 * i + 15, 20 + i:60] = i
+        Box.add_child(box, Box(text="old", box_type=BoxType.TESSERACT_LINE,
+                               left=10, top=40 * i, right=90, bottom=40 * i + 20))
+    backend = DarkRowsBackend()
+
+    lines = run_ocr_on_boxes_mosaic(backend, img, box.children, max_mosaic_height=140)
+
+    assert backend.calls == 2
+    assert [line.get_full_text() for line in lines] == [str(i) for i in range(5)]
+    for i, line in enumerate(lines):
+        word = line.children[0]
+        assert (word.left, word.top, word.right, word.bottom) == (20 + i, 40 * i + 5, 60, 40 * i + 15)
+        assert word.parent is line
+
+
+@pytest.mark.parametrize("angle", [0.0, 1.0, -2.5, 6.0])
+def test_estimate_skew_angle_and_rotate_box_coordinates(angle):
+    box = skewed_words_box(angle)
+    estimated_angle = estimate_skew_angle(box)
+    assert estimated_angle == pytest.approx(angle, abs=0.2)
+
+    rotate_box_coordinates(box, estimated_angle, np.zeros((1000, 1200, 3), dtype=np.uint8))
+    for line in box.get_subboxes(BoxType.TESSERACT_LINE):
+        assert line.bottom - line.top == pytest.approx(20, abs=3)
+        assert max(w.top for w in line.children) - min(w.top for w in line.children) <= 2
+        assert [w.right - w.left for w in line.children] == pytest.approx([100] * 6, abs=3)
+
+
+@pytest.mark.parametrize("angle", [1.0, -4.0])
+def test_unrotate_box_coordinates(angle):
+    img = np.zeros((1000, 1200, 3), dtype=np.uint8)
+    box = skewed_words_box(angle)
+    expected = [(b.left, b.top, b.right, b.bottom) for b in box.get_subboxes(BoxType.TESSERACT_WORD)]
+
+    rotate_box_coordinates(box, angle, img)
+    unrotate_box_coordinates(box, angle, img)
+    for word, expected_coordinates in zip(box.get_subboxes(BoxType.TESSERACT_WORD), expected):
+        assert (word.left, word.top, word.right, word.bottom) == pytest.approx(expected_coordinates, abs=2)
+
+
+def test_estimate_skew_angle_not_enough_lines():
+    assert estimate_skew_angle(skewed_words_box(2.0, n_lines=2)) is None
+    assert estimate_skew_angle(skewed_words_box(2.0, n_words=2)) is None
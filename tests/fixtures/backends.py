@@ -0,0 +1,31 @@
+from typing import Callable, Tuple
+
+import cv2
+import numpy as np
+
+from mim_ocr.backends import OCRBackend
+from mim_ocr.data_model import Box
+from mim_ocr.data_model.box import BoxType
+
+
+class BarsBackend(OCRBackend):
+    """Recognizes black bars as lines with a single word. Text and confidence of the word are returned
+    by read_bar for the height of the bar and whether the bar is cut by the edge of the image."""
+
+    def __init__(self, read_bar: Callable[[int, bool], Tuple[str, float]]):
+        self.read_bar = read_bar
+        self.image_shapes = []
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        self.image_shapes.append(img.shape)
+        box = Box.create_root_box()
+        _, _, stats, _ = cv2.connectedComponentsWithStats((img[:, :, 0] < 128).astype(np.uint8))
+        for left, top, width, height, _ in stats[1:]:
+            is_cut = left == 0 or top == 0 or left + width == img.shape[1] or top + height == img.shape[0]
+            text, conf = self.read_bar(height, is_cut)
+            line = Box(left=left, top=top, right=left + width, bottom=top + height, conf=-1, text="",
+                       box_type=BoxType.TESSERACT_LINE)
+            Box.add_child(box, line)
+            Box.add_child(line, Box(left=left, top=top, right=left + width, bottom=top + height, conf=conf,
+                                    text=text, box_type=BoxType.TESSERACT_WORD))
+        return box
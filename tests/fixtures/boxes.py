@@ -0,0 +1,23 @@
+import cv2
+import numpy as np
+
+from mim_ocr.data_model import Box
+from mim_ocr.data_model.box import BoxType
+
+
+def skewed_words_box(angle: float, img_shape=(1000, 1200), n_lines: int = 5, n_words: int = 6) -> Box:
+    """Returns lines of words (100x20 px) rotated like in the image rotated by -angle around its center."""
+    rot_mat = cv2.getRotationMatrix2D((img_shape[1] / 2, img_shape[0] / 2), -angle, 1.0)
+    box = Box.create_root_box()
+    for i in range(n_lines):
+        line = Box(text="", box_type=BoxType.TESSERACT_LINE, left=0, top=0, right=0, bottom=0)
+        Box.add_child(box, line)
+        for j in range(n_words):
+            corners = np.array([[100 + 150 * j + dx, 200 + 100 * i + dy, 1] for dx in (0, 100) for dy in (0, 20)])
+            xs, ys = (rot_mat @ corners.T).round().astype(int)
+            Box.add_child(line, Box(box_type=BoxType.TESSERACT_WORD, text="word", conf=90.0,
+                                    left=xs.min(), top=ys.min(), right=xs.max(), bottom=ys.max()))
+        line.left, line.top, line.right, line.bottom = (
+            min(w.left for w in line.children), min(w.top for w in line.children),
+            max(w.right for w in line.children), max(w.bottom for w in line.children))
+    return box
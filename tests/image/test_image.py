@@ -1,7 +1,12 @@
 from pathlib import Path
+
+import cv2
 import numpy as np
+import pytest
+from PIL import Image
 
-from mim_ocr.image import open_image, open_pdf
+from mim_ocr.image import open_image, open_pdf, iter_pdf_pages
+from mim_ocr.image.image import pil_image_to_cv2
 
 INPUT_DATA = {
     "all_image_formats_dir": Path("tests/input_data/all_image_formats"),
@@ -15,6 +20,52 @@ def test_simple_open_pdf(validate_cwd):
             assert isinstance(img, np.ndarray)
 
 
+def test_iter_pdf_pages(validate_cwd):
+    for path in INPUT_DATA['pdfs_dir'].iterdir():
+        pages = open_pdf(path, dpi=50)
+        streamed_pages = list(iter_pdf_pages(path, dpi=50, pages_per_chunk=1))
+        assert len(streamed_pages) == len(pages)
+        assert all(np.array_equal(a, b) for a, b in zip(pages, streamed_pages))
+
+        grayscale_pages = list(iter_pdf_pages(path, dpi=50, first_page=len(pages), grayscale=True))
+        assert len(grayscale_pages) == 1
+        assert grayscale_pages[0].shape == pages[-1].shape[:2]
+
+
 def test_simple_open_image(validate_cwd):
     for path in INPUT_DATA['all_image_formats_dir'].iterdir():
         assert isinstance(open_image(path), np.ndarray)
+
+
+def test_open_image_same_as_pil(validate_cwd):
+    for path in INPUT_DATA['all_image_formats_dir'].iterdir():
+        with Image.open(path) as pil_image:
+            assert np.array_equal(open_image(path), pil_image_to_cv2(pil_image))
+
+
+def test_open_image_keep_grayscale(tmp_path):
+    gray = np.tile(np.arange(256, dtype=np.uint8), (64, 2))
+    for mode in ('L', '1'):
+        path = tmp_path / f"{mode}.tiff"
+        Image.fromarray(gray).convert(mode).save(path)
+
+        img = open_image(path, keep_grayscale=True)
+        assert img.shape == gray.shape
+        assert img.dtype == np.uint8
+        assert open_image(path).shape == gray.shape + (3,)
+        assert np.array_equal(img, open_image(path)[:, :, 0])
+
+    rgb_path = tmp_path / "rgb.png"
+    Image.fromarray(gray).convert('RGB').save(rgb_path)
+    assert open_image(rgb_path, keep_grayscale=True).shape == gray.shape + (3,)
+
+
+def test_open_image_reduce(tmp_path):
+    img = np.random.default_rng(0).integers(0, 256, (400, 300, 3), dtype=np.uint8)
+    for suffix in ('.png', '.jpg'):
+        path = tmp_path / f"image{suffix}"
+        cv2.imwrite(str(path), img)
+        assert open_image(path, reduce=4).shape == (100, 75, 3)
+
+    with pytest.raises(ValueError):
+        open_image(tmp_path / "image.png", reduce=3)
@@ -0,0 +1,28 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from mim_ocr.image import open_image
+from mim_ocr.image.image_hash import average_hash, hamming_distance
+from mim_ocr.pipeline.deduplication import DEFAULT_DEDUP_THRESHOLD
+
+INPUT_DATA = {
+    "image": Path("tests/input_data/example_report1.png"),
+    "other_image": Path("tests/input_data/all_image_formats/badania.png"),
+}
+
+
+def test_average_hash_of_near_duplicates(validate_cwd):
+    img = open_image(INPUT_DATA["image"])
+    image_hash = average_hash(img)
+    assert image_hash.shape == (32,)
+
+    rescan = cv2.resize(img, None, fx=0.7, fy=0.7, interpolation=cv2.INTER_AREA)
+    rescan = cv2.imdecode(cv2.imencode('.jpg', rescan, [cv2.IMWRITE_JPEG_QUALITY, 60])[1], cv2.IMREAD_GRAYSCALE)
+    noisy = np.clip(img + np.random.default_rng(0).normal(0, 10, img.shape), 0, 255).astype(np.uint8)
+    hashes = np.array([average_hash(rescan), average_hash(noisy)])
+    assert (hamming_distance(image_hash, hashes) <= DEFAULT_DEDUP_THRESHOLD).all()
+
+    other_hashes = np.array([average_hash(open_image(INPUT_DATA["other_image"])), average_hash(cv2.rotate(img, 1))])
+    assert (hamming_distance(image_hash, other_hashes) > 5 * DEFAULT_DEDUP_THRESHOLD).all()
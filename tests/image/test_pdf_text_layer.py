@@ -0,0 +1,41 @@
+from mim_ocr.data_model.box import BoxType
+from mim_ocr.image.pdf_text_layer import parse_pdftotext_bbox_layout, has_usable_text_layer
+
+BBOX_LAYOUT_XHTML = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+  "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title></title></head>
+<body>
+<doc>
+  <page width="72.000000" height="144.000000">
+    <flow><block xMin="9.0" yMin="18.0" xMax="36.0" yMax="27.0">
+      <line xMin="9.000000" yMin="18.000000" xMax="36.000000" yMax="27.000000">
+        <word xMin="9.000000" yMin="18.000000" xMax="20.000000" yMax="27.000000">Zażółć</word>
+        <word xMin="22.000000" yMin="18.000000" xMax="36.000000" yMax="27.000000">jaźń</word>
+      </line>
+    </block></flow>
+  </page>
+  <page width="72.000000" height="144.000000">
+  </page>
+</doc>
+</body>
+</html>
+"""
+
+
+def test_parse_pdftotext_bbox_layout():
+    root_box = parse_pdftotext_bbox_layout(BBOX_LAYOUT_XHTML, dpi=144, first_page_number=2)
+
+    pages = root_box.children
+    assert [p.box_type for p in pages] == [BoxType.PREDICTED_PAGE] * 2
+    assert [p.additional_data['page_number'] for p in pages] == [2, 3]
+    assert pages[0].additional_data['page_size'] == (144, 288)
+
+    words = pages[0].get_subboxes(BoxType.PDF_TEXT_WORD)
+    assert [w.text for w in words] == ["Zażółć", "jaźń"]
+    assert (words[0].left, words[0].top, words[0].right, words[0].bottom) == (18, 36, 40, 54)
+    assert [line.get_full_text() for line in pages[0].get_subboxes(BoxType.PDF_TEXT_LINE)] == ["Zażółć jaźń"]
+
+    assert has_usable_text_layer(pages[0], min_letters=10)
+    assert not has_usable_text_layer(pages[1], min_letters=10)
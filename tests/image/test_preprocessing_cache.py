@@ -0,0 +1,68 @@
+import functools
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+
+from mim_ocr.backends import OCRCacheStore
+from mim_ocr.image.preprocessing_cache import CachingTransformations
+from mim_ocr.image.preprocessing_context import PreprocessingContext
+from mim_ocr.image.transformations import add_box_mapping
+
+CALLS = []
+
+
+def flip(img: np.ndarray, path: Path, metadata: Dict[str, Any], axis: int = 0) -> np.ndarray:
+    CALLS.append('flip')
+    metadata['flipped'] = axis
+    return np.flip(img, axis=axis)
+
+
+def half_size(img: np.ndarray, path: Path, metadata: Dict[str, Any]) -> np.ndarray:
+    CALLS.append('half_size')
+    add_box_mapping(metadata, img, lambda box: box.scale(2))
+    return img[::2, ::2]
+
+
+@pytest.fixture(params=["cache_dir", "cache.sqlite"])
+def store(request, tmp_path):
+    CALLS.clear()
+    return OCRCacheStore.from_path(tmp_path / request.param)
+
+
+def _image(value: int = 0) -> np.ndarray:
+    img = np.zeros((40, 60, 3), dtype=np.uint8)
+    img[:20] = 255
+    img[0, 0] = value
+    return img
+
+
+def test_caching_transformations(store):
+    transformations = CachingTransformations([flip, functools.partial(flip, axis=1)], store)
+    img = transformations(_image(), Path("a.png"), PreprocessingContext(Path("a.png")))
+
+    metadata = PreprocessingContext(Path("b.png"))
+    cached_img = transformations(_image(), Path("b.png"), metadata)
+    assert np.array_equal(cached_img, img)
+    assert metadata == {'path': Path("b.png"), 'flipped': 1}
+    assert CALLS == ['flip', 'flip']
+    assert (transformations.hits, transformations.misses) == (1, 1)
+
+    # other image or other parameters of transformations
+    transformations(_image(1), Path("a.png"), {})
+    CachingTransformations([flip, functools.partial(flip, axis=0)], store)(_image(), Path("a.png"), {})
+    assert CALLS == ['flip'] * 6
+
+
+def test_caching_transformations_with_box_mappings(store):
+    transformations = CachingTransformations([flip, half_size], store)
+    img = transformations(_image(), Path("a.png"), {})
+
+    metadata = PreprocessingContext(Path("a.png"))
+    cached_img = transformations(_image(), Path("a.png"), metadata)
+    # result of flip is restored from cache, half_size registering box mapping is run again
+    assert CALLS == ['flip', 'half_size', 'half_size']
+    assert np.array_equal(cached_img, img)
+    assert metadata['flipped'] == 0 and len(metadata['box_mappings']) == 1
+    assert np.array_equal(metadata['reference_image'], np.flip(_image(), axis=0))
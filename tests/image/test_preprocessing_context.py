@@ -0,0 +1,45 @@
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+from mim_ocr.image import open_image, preprocessing_context
+from mim_ocr.image.preprocessing_context import PreprocessingContext
+from mim_ocr.image.transformations import reorient, deskew, rescale
+
+input_image_path = Path("tests/input_data/example_report1.png")
+
+
+def test_preprocessing_context_caches_products():
+    context = PreprocessingContext(Path("image.png"))
+    img = np.full((20, 30, 3), 255, dtype=np.uint8)
+
+    gray = context.gray(img)
+    assert gray.shape == (20, 30)
+    assert context.gray(img) is gray
+    assert context.downscaled_gray(img, 0.5).shape == (10, 15)
+
+    new_img = img.copy()
+    assert context.gray(new_img) is not gray
+    assert context.path == Path("image.png") and context['path'] == Path("image.png")
+
+
+def test_chained_transformations_share_products(validate_cwd, mocker):
+    estimate_text_height = mocker.spy(preprocessing_context, "estimate_text_height")
+    binarize = mocker.spy(preprocessing_context, "binarize")
+    img = open_image(input_image_path)
+    context = PreprocessingContext(input_image_path)
+
+    img = reorient(img, input_image_path, context, method="heuristic")
+    img = rescale(img, input_image_path, context, target_text_height=1000)  # upscaling is disabled, no change
+    img = deskew(img, input_image_path, context)
+
+    assert context['orientation'] == 0 and context['scale'] == 1.0
+    assert estimate_text_height.call_count == 1
+    assert binarize.call_count == 1
+
+
+def test_transformations_with_plain_dict(validate_cwd):
+    metadata = {'path': input_image_path}
+    partial(reorient, method="heuristic")(open_image(input_image_path), input_image_path, metadata)
+    assert metadata['orientation'] == 0
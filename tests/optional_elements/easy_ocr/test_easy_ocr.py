@@ -9,3 +9,15 @@ INPUT_DATA = {
 def test_simple_easy_ocr(validate_cwd):
     img = open_image(INPUT_DATA["example_image_path"])
     assert EasyOCRBackend().run_ocr_to_box(img)
+
+
+def test_easy_ocr_batch(validate_cwd):
+    img = open_image(INPUT_DATA["example_image_path"])
+    crops = [img[:200, :400], img[200:400, :400], img[:100, :300]]
+    backend = EasyOCRBackend(n_threads=1)
+    backend.init_worker()
+
+    boxes = backend.run_ocr_to_boxes(crops)
+
+    assert EasyOCRBackend().reader is backend.reader
+    assert [b.get_full_text() for b in boxes] == [backend.run_ocr_to_box(crop).get_full_text() for crop in crops]
@@ -0,0 +1,29 @@
+import shutil
+from pathlib import Path
+
+import cv2
+
+from mim_ocr.image import open_image
+from mim_ocr.pipeline.deduplication import find_duplicates
+
+INPUT_DATA = {
+    "image": Path("tests/input_data/example_report1.png"),
+    "other_image": Path("tests/input_data/example_report1-reorient180.png"),
+}
+
+
+def test_find_duplicates(validate_cwd, tmp_path):
+    paths = [tmp_path / name for name in ("a.png", "b.png", "a_copy.png", "a_rescan.jpg", "missing.png")]
+    shutil.copyfile(INPUT_DATA["image"], paths[0])
+    shutil.copyfile(INPUT_DATA["other_image"], paths[1])
+    shutil.copyfile(INPUT_DATA["image"], paths[2])
+    rescan = cv2.resize(open_image(INPUT_DATA["image"]), None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+    cv2.imwrite(str(paths[3]), rescan, [cv2.IMWRITE_JPEG_QUALITY, 70])
+
+    duplicates = find_duplicates(paths + [None])
+    assert duplicates.keys() == {2, 3}
+    assert duplicates[2] == (0, 0)
+    assert duplicates[3][0] == 0
+
+    assert find_duplicates(paths, exact_only=True) == {2: (0, 0)}
+    assert find_duplicates(paths, threshold=-1) == {2: (0, 0)}
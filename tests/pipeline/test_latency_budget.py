@@ -0,0 +1,180 @@
+import functools
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from mim_ocr.backends import OCRBackend, OCRCacheStore
+from mim_ocr.data_model import Box
+from mim_ocr.data_model.box import BoxType
+from mim_ocr.heuristics import Feature, Occurrence, NUMBER_FEATURE
+from mim_ocr.image.preprocessing_cache import CachingTransformations
+from mim_ocr.image.transformations import deskew, reorient, rescale
+from mim_ocr.pipeline.latency_budget import LatencyBudget, LATENCY_BUDGET_KEY, CHEAPENED, SKIPPED, \
+    DEGRADED_DESKEW_DELTA
+from mim_ocr.pipeline.batch_processing import RunPipelineAndSaveDataframeInput, \
+    batch_run_pipeline_and_save_dataframe_for_dirs
+from mim_ocr.pipeline.pipeline import run_ocr_pipeline_on_image, run_pipeline_and_save_results_to_file, \
+    RunPipelineAndSaveResultToFileInput, run_pipeline_on_document_page, save_document_pages
+
+input_image_path = Path("tests/input_data/example_report1.png")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class NERFeature(Feature):
+    def __init__(self):
+        super().__init__(name="NERFeature")
+
+    def find_occurrences(self, text: str) -> List[Occurrence]:
+        raise AssertionError("Slow feature run after the budget was exhausted")
+
+
+class LineBackend(OCRBackend):
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        box = Box.create_root_box()
+        line = Box(text="", box_type=BoxType.TESSERACT_LINE, right=img.shape[1], bottom=img.shape[0])
+        Box.add_child(box, line)
+        Box.add_child(line, Box(text="123", box_type=BoxType.TESSERACT_WORD, right=img.shape[1],
+                                bottom=img.shape[0]))
+        return box
+
+
+def slow_stage(img: np.ndarray, path: Path, metadata: Dict[str, Any], clock: FakeClock,
+               seconds: float) -> np.ndarray:
+    clock.now += seconds
+    return img
+
+
+def test_latency_budget():
+    clock = FakeClock()
+    budget = LatencyBudget(10.0, clock=clock)
+    accurate_deskew = functools.partial(deskew, method="projection_profile", projection_delta=0.25)
+    assert budget.get_transformation(accurate_deskew) is accurate_deskew
+
+    clock.now += 5.0
+    assert budget.get_transformation(rescale) is rescale
+    cheap_deskew = budget.get_transformation(accurate_deskew)
+    assert cheap_deskew.func is deskew
+    assert cheap_deskew.keywords == {'method': 'fast_projection_profile', 'projection_delta': DEGRADED_DESKEW_DELTA}
+    assert budget.get_transformation(reorient).keywords == {'method': 'heuristic'}
+    assert budget.degraded_stages == {'deskew': CHEAPENED, 'reorient': CHEAPENED}
+    features = [NUMBER_FEATURE, NERFeature()]
+    assert budget.select_features(features) == features
+
+    clock.now += 6.0
+    assert budget.select_features(features) == [NUMBER_FEATURE]
+    assert budget.get_transformation(reorient) is None
+    assert budget.get_transformation(accurate_deskew) is None
+    assert budget.degraded_stages == {'deskew': SKIPPED, 'reorient': SKIPPED, 'NERFeature': SKIPPED}
+    assert budget.get_report() == {'seconds': 10.0, 'elapsed': 11.0, 'degraded_stages': budget.degraded_stages}
+
+    assert LatencyBudget(10.0, clock=clock, start=95.0).elapsed() == clock.now - 95.0
+    with pytest.raises(ValueError):
+        LatencyBudget(0)
+
+
+def test_pipeline_degrades_stages_after_slow_stages():
+    img = np.full((100, 100, 3), 255, dtype=np.uint8)
+    clock = FakeClock()
+    budget = LatencyBudget(10.0, clock=clock)
+    deskew_stage = functools.partial(deskew, method="projection_profile")
+    transformations = [deskew_stage, functools.partial(slow_stage, clock=clock, seconds=4.0), deskew_stage]
+    _, box = run_ocr_pipeline_on_image(img, Path("image.png"), transformations, LineBackend(), budget=budget)
+    assert budget.degraded_stages == {'deskew': CHEAPENED}
+    assert box.get_full_text() == "123"
+
+    transformations = [functools.partial(slow_stage, clock=clock, seconds=10.0), deskew_stage]
+    _, box = run_ocr_pipeline_on_image(img, Path("image.png"), transformations, LineBackend(), budget=budget)
+    assert budget.degraded_stages == {'deskew': SKIPPED}
+    assert box.get_full_text() == "123"
+
+
+def test_pipeline_degrades_cached_transformations(tmp_path):
+    img = np.full((100, 100, 3), 255, dtype=np.uint8)
+    clock = FakeClock()
+    store = OCRCacheStore.from_path(tmp_path / "cache")
+    deskew_stage = functools.partial(deskew, method="projection_profile")
+    transformations = CachingTransformations([functools.partial(slow_stage, clock=clock, seconds=4.0),
+                                              deskew_stage], store)
+    keys = transformations.get_cache_keys(img)
+
+    budget = LatencyBudget(10.0, clock=clock)
+    run_ocr_pipeline_on_image(img, Path("image.png"), [transformations], LineBackend(), budget=budget)
+    assert budget.degraded_stages == {'deskew': CHEAPENED}
+    # only the result of the transformation run in full is stored
+    assert store.get(keys[0]) is not None and store.get(keys[1]) is None
+
+    budget = LatencyBudget(10.0, clock=clock)
+    run_ocr_pipeline_on_image(img, Path("image.png"), [transformations], LineBackend(), budget=budget)
+    assert budget.degraded_stages == {}
+    assert store.get(keys[1]) is not None
+
+
+def test_run_pipeline_records_degraded_stages(validate_cwd, tmp_path):
+    def sleeping_stage(img: np.ndarray, path: Path, metadata: Dict[str, Any]) -> np.ndarray:
+        time.sleep(0.3)
+        return img
+
+    output_path = tmp_path / "result.json"
+    run_pipeline_and_save_results_to_file([RunPipelineAndSaveResultToFileInput(
+        output_path=output_path,
+        image_input_path=input_image_path,
+        preprocessing_transformations=[sleeping_stage, deskew],
+        backend=LineBackend(),
+        features=[NUMBER_FEATURE, NERFeature()],
+        time_budget=0.2,
+    )])
+    report = Box.from_json_file(output_path).additional_data[LATENCY_BUDGET_KEY]
+    assert report['seconds'] == 0.2
+    assert report['elapsed'] >= 0.2
+    assert report['degraded_stages'] == {'deskew': SKIPPED, 'NERFeature': SKIPPED}
+
+    run_pipeline_and_save_results_to_file([RunPipelineAndSaveResultToFileInput(
+        output_path=output_path, image_input_path=input_image_path, backend=LineBackend(),
+        features=[NUMBER_FEATURE])])
+    assert LATENCY_BUDGET_KEY not in Box.from_json_file(output_path).additional_data
+
+
+def _save_multi_frame_tiff(path: Path, n_frames: int) -> None:
+    frames = [Image.new("RGB", (100, 100), color="white") for _ in range(n_frames)]
+    frames[0].save(path, save_all=True, append_images=frames[1:])
+
+
+def test_document_pages_share_budget(tmp_path):
+    _save_multi_frame_tiff(tmp_path / "document.tif", 2)
+    args = RunPipelineAndSaveResultToFileInput(
+        output_path=tmp_path / "document.json", image_input_path=tmp_path / "document.tif",
+        preprocessing_transformations=[deskew], backend=LineBackend(), features=[NUMBER_FEATURE, NERFeature()],
+        time_budget=10.0, budget_start=time.monotonic() - 20.0)
+
+    page_boxes = [run_pipeline_on_document_page(args, page_number) for page_number in range(2)]
+    report = save_document_pages(args, page_boxes).additional_data[LATENCY_BUDGET_KEY]
+    assert report['seconds'] == 10.0
+    assert report['elapsed'] >= 20.0
+    assert report['degraded_stages'] == {'deskew': SKIPPED, 'NERFeature': SKIPPED}
+
+
+def test_batch_run_records_budget_of_multi_page_documents(tmp_path):
+    input_dir, out_dir = tmp_path / "input", tmp_path / "out"
+    input_dir.mkdir()
+    out_dir.mkdir()
+    _save_multi_frame_tiff(input_dir / "document.tif", 2)
+
+    batch_run_pipeline_and_save_dataframe_for_dirs(RunPipelineAndSaveDataframeInput(
+        image_input_path=str(input_dir), out_dir=str(out_dir), prep_dir=None, nr_proc=2,
+        backend=LineBackend(), input_box_path=None, time_budget=60.0))
+
+    report = Box.from_json_file(out_dir / "document.tif.json").additional_data[LATENCY_BUDGET_KEY]
+    assert report['seconds'] == 60.0
+    assert 0.0 < report['elapsed'] < 60.0
+    assert report['degraded_stages'] == {}
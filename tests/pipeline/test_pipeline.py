@@ -1,21 +1,33 @@
+import csv
 import os
+import shutil
 import string
 import tempfile
 from pathlib import Path
 import random
 from typing import Any, Dict
 
+import cv2
 import numpy as np
+from loguru import logger
+from PIL import Image
+import pytest
 from pytest import raises
 
-from mim_ocr.backends import TesseractBackend
+from mim_ocr.backends import TesseractBackend, OCRBackend, SkewCorrectingBackend
+from mim_ocr.backends.skew import SKEW_ANGLE_KEY
 from mim_ocr.data_model import Box
+from mim_ocr.data_model.box import BoxType
 from mim_ocr.exceptions.smooth_job_context import SmoothOCRJobRunContext
 from mim_ocr.heuristics import NUMBER_FEATURE, PHONE_NUMBER_FEATURE, DATE_FEATURE
 from mim_ocr.image import open_image
-from mim_ocr.image.transformations import reorient, deskew
+from mim_ocr.image.transformations import reorient, deskew, add_box_mapping, skip_blank_page, \
+    crop_margins
+from mim_ocr.pipeline.batch_processing import RunPipelineAndSaveDataframeInput, \
+    batch_run_pipeline_and_save_dataframe_for_dirs
 from mim_ocr.pipeline.pipeline import run_ocr_pipeline_on_file, run_pipeline_and_save_results_to_file, \
-    RunPipelineAndSaveResultToFileInput
+    RunPipelineAndSaveResultToFileInput, run_ocr_pipeline_on_document
+from fixtures.boxes import skewed_words_box
 
 input_image_path = "tests/input_data/example_report1-reorient90.png"
 box_path = "tests/input_data/example_box_dataframe.csv"
@@ -25,6 +37,48 @@ def fail_transform(img: np.ndarray, path: Path, metadata: Dict[str, Any]) -> np.
     raise ValueError("Some error")
 
 
+class WholeImageBackend(OCRBackend):
+    """Returns single box covering the whole image."""
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        box = Box.create_root_box()
+        Box.add_child(box, Box(text="image", box_type=BoxType.CUSTOM, right=img.shape[1], bottom=img.shape[0]))
+        return box
+
+
+class FailingBackend(OCRBackend):
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        raise ValueError("Some error")
+
+
+class DiagnosticsBackend(WholeImageBackend):
+    """Like WholeImageBackend, with diagnostics in additional_data of the root box."""
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        box = super().run_ocr_to_box(img, *args, **kwargs)
+        box.additional_data.update({'image_height': img.shape[0], 'page_number': -1})
+        return box
+
+
+class SkewedContentBackend(OCRBackend):
+    """Returns lines of skewed words (see skewed_words_box) placed at the top left corner of dark pixels."""
+
+    def __init__(self, angle: float, content_shape=(700, 650)):
+        self.angle = angle
+        self.content_shape = content_shape
+
+    def run_ocr_to_box(self, img: np.ndarray, *args, **kwargs) -> Box:
+        ys, xs = np.nonzero(img[:, :, 0] < 128)
+        box = skewed_words_box(self.angle, img_shape=self.content_shape, n_words=3)
+        box.translate(xs.min(), ys.min())
+        return box
+
+
+def half_size_transform(img: np.ndarray, path: Path, metadata: Dict[str, Any]) -> np.ndarray:
+    add_box_mapping(metadata, img, lambda box: box.scale(2))
+    return img[::2, ::2]
+
+
 def test_fail_pipeline(validate_cwd):
     with raises(ValueError):
         run_ocr_pipeline_on_file(input_path=Path(input_image_path), preprocessing_transformations=[fail_transform],
@@ -73,3 +127,156 @@ def test_run_pipeline_and_save_results_to_file_box(validate_cwd):
     assert Box.from_json_file(output_path)
 
     os.remove(output_path)
+
+
+def test_pipeline_maps_boxes_to_reference_image(validate_cwd):
+    img, box = run_ocr_pipeline_on_file(input_path=Path(input_image_path),
+                                        preprocessing_transformations=[half_size_transform],
+                                        backend=WholeImageBackend())
+    assert img.shape == open_image(input_image_path).shape
+    assert box.children[0].size() == (img.shape[1], img.shape[0])
+
+
+def _save_multi_frame_tiff(path: Path, sizes) -> None:
+    frames = [Image.new("RGB", size, color="white") for size in sizes]
+    frames[0].save(path, save_all=True, append_images=frames[1:])
+
+
+def test_run_ocr_pipeline_on_multi_frame_tiff(tmp_path):
+    sizes = [(30, 40), (50, 20), (10, 10)]
+    _save_multi_frame_tiff(tmp_path / "document.tif", sizes)
+
+    box = run_ocr_pipeline_on_document(tmp_path / "document.tif", [], WholeImageBackend())
+
+    assert [page.box_type for page in box.children] == [BoxType.PREDICTED_PAGE] * 3
+    assert [page.additional_data['page_number'] for page in box.children] == [0, 1, 2]
+    assert [page.children[0].size() for page in box.children] == sizes
+
+    # additional_data of OCR results is kept, except keys of the page box
+    box = run_ocr_pipeline_on_document(tmp_path / "document.tif", [], DiagnosticsBackend())
+    assert [(page.additional_data['page_number'], page.additional_data['image_height'])
+            for page in box.children] == [(0, 40), (1, 20), (2, 10)]
+
+
+def test_batch_run_pipeline_on_multi_page_documents(tmp_path):
+    input_dir, out_dir = tmp_path / "input", tmp_path / "out"
+    input_dir.mkdir()
+    out_dir.mkdir()
+    _save_multi_frame_tiff(input_dir / "document.tif", [(30, 40), (50, 20)])
+    _save_multi_frame_tiff(input_dir / "image.tif", [(10, 10)])
+
+    batch_run_pipeline_and_save_dataframe_for_dirs(RunPipelineAndSaveDataframeInput(
+        image_input_path=str(input_dir), out_dir=str(out_dir), prep_dir=None, nr_proc=2,
+        backend=WholeImageBackend(), input_box_path=None))
+
+    document_box = Box.from_json_file(out_dir / "document.tif.json")
+    assert [page.additional_data['page_number'] for page in document_box.children] == [0, 1]
+    assert [page.children[0].size() for page in document_box.children] == [(30, 40), (50, 20)]
+    assert Box.from_json_file(out_dir / "image.tif.json").children[0].size() == (10, 10)
+
+
+def test_batch_run_pipeline_reports_cache_stats_of_workers(tmp_path):
+    input_dir, out_dir = tmp_path / "input", tmp_path / "out"
+    input_dir.mkdir()
+    out_dir.mkdir()
+    _save_multi_frame_tiff(input_dir / "document.tif", [(30, 40), (50, 20)])
+    _save_multi_frame_tiff(input_dir / "image.tif", [(10, 10)])
+    messages = []
+    handler_id = logger.add(messages.append, format="{message}", level="INFO")
+    try:
+        for _ in range(2):
+            batch_run_pipeline_and_save_dataframe_for_dirs(RunPipelineAndSaveDataframeInput(
+                image_input_path=str(input_dir), out_dir=str(out_dir), prep_dir=None, nr_proc=2,
+                backend=WholeImageBackend(), input_box_path=None, ocr_cache_path=str(tmp_path / "cache")))
+    finally:
+        logger.remove(handler_id)
+    cache_messages = [message.strip() for message in messages if "cache hits" in message]
+    assert cache_messages == ["OCR cache hits: 0, misses: 3.", "OCR cache hits: 3, misses: 0."]
+
+
+def test_run_ocr_pipeline_skips_blank_pages(validate_cwd):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        blank_path = Path(tmp_dir, "blank.png")
+        Image.new('L', (1200, 1700), color=240).save(blank_path)
+
+        img, box = run_ocr_pipeline_on_file(blank_path, [skip_blank_page, fail_transform], WholeImageBackend())
+        assert box.additional_data['blank_page'] is True
+        assert len(box.children) == 0
+        assert img.shape[:2] == (1700, 1200)
+
+        img, box = run_ocr_pipeline_on_file(Path(input_image_path), [skip_blank_page], WholeImageBackend())
+        assert 'blank_page' not in box.additional_data
+        assert len(box.children) == 1
+
+        tiff_path = Path(tmp_dir, "document.tiff")
+        pages = [Image.open(input_image_path), Image.new('RGB', (1200, 1700), color=(240, 240, 240))]
+        pages[0].save(tiff_path, save_all=True, append_images=pages[1:])
+        root_box = run_ocr_pipeline_on_document(tiff_path, [skip_blank_page], WholeImageBackend())
+        assert [page_box.additional_data.get('blank_page', False) for page_box in root_box.children] == [False, True]
+        assert [len(page_box.children) for page_box in root_box.children] == [1, 0]
+
+
+def test_run_ocr_pipeline_crop_margins(validate_cwd):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir, "page.png")
+        page = np.full((1700, 1200, 3), 255, dtype=np.uint8)
+        page[400:1000, 300:700] = open_image(Path(input_image_path))[400:1000, 300:700]
+        Image.fromarray(page).save(path)
+
+        img, box = run_ocr_pipeline_on_file(path, [crop_margins], WholeImageBackend())
+        assert img.shape == page.shape
+        image_box = box.children[0]
+        assert image_box.right - image_box.left < 600 and image_box.bottom - image_box.top < 800
+        assert 250 <= image_box.left <= 400 and 350 <= image_box.top <= 500
+
+
+def test_run_ocr_pipeline_crop_margins_with_skew_correction(tmp_path):
+    path = tmp_path / "page.png"
+    page = np.full((1700, 1200, 3), 255, dtype=np.uint8)
+    for top, left in [(900, 500), (900, 1130), (1580, 500), (1580, 1130)]:
+        page[top:top + 20, left:left + 20] = 0
+    Image.fromarray(page).save(path)
+    backend = SkewCorrectingBackend(SkewedContentBackend(1.5))
+
+    img, box = run_ocr_pipeline_on_file(path, [crop_margins], backend)
+    expected_img, expected_box = run_ocr_pipeline_on_file(path, [], backend)
+
+    assert box.additional_data[SKEW_ANGLE_KEY] == pytest.approx(1.5, abs=0.2)
+    assert img.shape == expected_img.shape
+    words = box.get_subboxes(BoxType.TESSERACT_WORD)
+    expected_words = expected_box.get_subboxes(BoxType.TESSERACT_WORD)
+    for word, expected_word in zip(words, expected_words):
+        assert (word.left, word.top, word.right, word.bottom) == pytest.approx(
+            (expected_word.left, expected_word.top, expected_word.right, expected_word.bottom), abs=2)
+
+
+def test_batch_run_pipeline_deduplicates_inputs(validate_cwd, tmp_path):
+    input_dir, out_dir = tmp_path / "input", tmp_path / "out"
+    input_dir.mkdir()
+    out_dir.mkdir()
+    img = open_image(Path(input_image_path))
+    cv2.imwrite(str(input_dir / "a.png"), img)
+    cv2.imwrite(str(input_dir / "b.png"), img)
+    cv2.imwrite(str(input_dir / "c.jpg"), cv2.resize(img, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA))
+    _save_multi_frame_tiff(input_dir / "d.tif", [(30, 40), (50, 20)])
+    shutil.copyfile(input_dir / "d.tif", input_dir / "e.tif")
+
+    batch_run_pipeline_and_save_dataframe_for_dirs(RunPipelineAndSaveDataframeInput(
+        image_input_path=str(input_dir), out_dir=str(out_dir), prep_dir=None, nr_proc=1,
+        backend=WholeImageBackend(), input_box_path=None, deduplicate=True))
+
+    sizes = {name: Box.from_json_file(out_dir / f"{name}.json").children[0].size() for name in ("a.png", "b.png")}
+    assert sizes["a.png"] == sizes["b.png"] == (img.shape[1], img.shape[0])
+    assert Box.from_json_file(out_dir / "c.jpg.json").children[0].size() == (img.shape[1] // 2, img.shape[0] // 2)
+    assert (out_dir / "d.tif.json").read_text() == (out_dir / "e.tif.json").read_text()
+
+    with open(out_dir / "duplicates.csv") as f:
+        report = list(csv.DictReader(f))
+    assert sorted(Path(row['skipped_file']).name for row in report) == ["b.png", "c.jpg", "e.tif"]
+
+    # results of an earlier run are not copied when the representative fails
+    (out_dir / "b.png.json").unlink()
+    batch_run_pipeline_and_save_dataframe_for_dirs(RunPipelineAndSaveDataframeInput(
+        image_input_path=str(input_dir), out_dir=str(out_dir), prep_dir=None, nr_proc=1,
+        backend=FailingBackend(), input_box_path=None, deduplicate=True))
+    assert not (out_dir / "a.png.json").exists() and not (out_dir / "b.png.json").exists()
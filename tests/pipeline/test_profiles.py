@@ -0,0 +1,64 @@
+import functools
+import os
+from typing import List
+
+import pytest
+
+from mim_ocr.heuristics import Feature, Occurrence, NUMBER_FEATURE
+from mim_ocr.image.transformations import skip_blank_page, reorient, deskew, crop_margins, rescale
+from mim_ocr.pipeline.batch_processing import OcrBatchProcessingArgumentParser
+from mim_ocr.pipeline.profiles import PROFILES, PipelineProfile, get_profile
+
+
+class NERFeature(Feature):
+    def __init__(self):
+        super().__init__(name="NERFeature")
+
+    def find_occurrences(self, text: str) -> List[Occurrence]:
+        return []
+
+
+def _get_functions(transformations):
+    return [t.func if isinstance(t, functools.partial) else t for t in transformations]
+
+
+def test_profiles():
+    assert list(PROFILES) == ['fast', 'balanced', 'accurate']
+    assert PipelineProfile().get_preprocessing_transformations() == []
+    assert PipelineProfile().get_tesseract_config() == "--oem 1 --psm 3 -l pol"
+
+    fast = get_profile('fast')
+    assert _get_functions(fast.get_preprocessing_transformations()) == [skip_blank_page, deskew, crop_margins, rescale]
+    assert fast.get_tesseract_config("tessdata") == \
+        f"--oem 1 --psm 3 -l pol --tessdata-dir {os.path.join('tessdata', 'fast')}"
+    assert fast.get_backend().config == "--oem 1 --psm 3 -l pol"
+
+    accurate_transformations = get_profile('accurate').get_preprocessing_transformations()
+    assert _get_functions(accurate_transformations) == [reorient, deskew, rescale]
+    assert accurate_transformations[1].keywords == {'method': 'projection_profile', 'projection_delta': 0.25}
+
+    with pytest.raises(ValueError):
+        get_profile('fastest')
+
+
+def test_profile_features():
+    features = [NUMBER_FEATURE, NERFeature()]
+    assert get_profile('accurate').filter_features(features) == features
+    assert get_profile('fast').filter_features(features) == [NUMBER_FEATURE]
+
+
+def test_profile_from_arguments():
+    parser = OcrBatchProcessingArgumentParser()
+    args = parser.parse_args(['--out_dir', 'out', '--profile', 'fast', '--no-crop', '--reorient', '--pdf_dpi', '100',
+                              '--multi_resolution_scale', '0.5'])
+    profile = parser.get_profile(args)
+    assert profile.name == 'fast'
+    assert not profile.crop and profile.reorient and profile.deskew
+    assert profile.pdf_dpi == 100
+    assert profile.multi_resolution_scale == 0.5
+
+    args = parser.parse_args(['--out_dir', 'out', '--backend', 'TesseractBackend', '--deskew'])
+    assert parser.get_profile(args) == PipelineProfile(deskew=True)
+
+    with pytest.raises(ValueError):
+        parser.parse_args(['--out_dir', 'out'])
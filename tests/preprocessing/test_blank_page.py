@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from mim_ocr.image import open_image
+from mim_ocr.preprocessing.blank_page import is_blank_page
+
+input_image_path = Path("tests/input_data/example_report1.png")
+
+
+def scanned_blank_page() -> np.ndarray:
+    """Gray paper with scanner noise, dust and dark border at the edge."""
+    rng = np.random.default_rng(0)
+    img = np.clip(rng.normal(235, 8, (3500, 2480)), 0, 255).astype(np.uint8)
+    img[rng.integers(0, 3500, 300), rng.integers(0, 2480, 300)] = 0
+    img[:, :60] = 20
+    return img
+
+
+def test_blank_page():
+    img = scanned_blank_page()
+    assert is_blank_page(img)
+    assert is_blank_page(cv2.cvtColor(img, cv2.COLOR_GRAY2BGR))
+
+    # bleed-through of the other side of the sheet
+    cv2.putText(img, "other side", (300, 1000), cv2.FONT_HERSHEY_SIMPLEX, 4, 200, 8)
+    assert is_blank_page(img)
+
+
+def test_not_blank_page(validate_cwd):
+    assert not is_blank_page(open_image(input_image_path))
+
+    img = scanned_blank_page()
+    for i in range(5):
+        cv2.putText(img, "Some text on the page", (300, 500 + 150 * i), cv2.FONT_HERSHEY_SIMPLEX, 3, 30, 6)
+    assert not is_blank_page(img)
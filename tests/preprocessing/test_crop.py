@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from mim_ocr.image import open_image
+from mim_ocr.preprocessing import crop_cv2
+
+input_image_path = Path("tests/input_data/example_report1.png")
+
+
+def scan_with_margins_and_borders() -> np.ndarray:
+    img = np.full((3500, 2480), 245, np.uint8)
+    for i in range(20):
+        cv2.putText(img, "Lorem ipsum dolor sit amet", (600, 900 + 60 * i), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 20, 3)
+    img[:, :80] = 10
+    img[:120, :] = 15
+    img[:, -50:] = 30
+    return img
+
+
+def test_crop_margins_and_borders():
+    img = scan_with_margins_and_borders()
+    cropped_img, (left, top, right, bottom) = crop_cv2(img)
+
+    assert cropped_img.shape == (bottom - top, right - left)
+    text_width, text_height = cv2.getTextSize("Lorem ipsum dolor sit amet", cv2.FONT_HERSHEY_SIMPLEX, 1.5, 3)[0]
+    assert 550 <= left < 600 and 800 <= top < 900 - text_height
+    assert 600 + text_width < right <= 1250 and 2040 < bottom <= 2100
+    # all text is kept and no dark borders are left at the edges
+    assert (cropped_img < 128).sum() == (img[120:, 80:-50] < 128).sum()
+    assert cropped_img[:, 0].min() > 200 and cropped_img[0, :].min() > 200
+
+    color_img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    assert crop_cv2(color_img)[1] == (left, top, right, bottom)
+
+
+def test_crop_keeps_content(validate_cwd):
+    img = open_image(input_image_path)
+    cropped_img, (left, top, right, bottom) = crop_cv2(img)
+    assert cropped_img.shape == (bottom - top, right - left, 3)
+
+    not_cropped_img, crop_box = crop_cv2(img, min_reduction=0.5)
+    assert not_cropped_img is img
+    assert crop_box == (0, 0, img.shape[1], img.shape[0])
+
+    blank_img = np.full((1000, 800, 3), 255, np.uint8)
+    assert crop_cv2(blank_img)[0] is blank_img
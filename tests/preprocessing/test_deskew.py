@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import pytest
+
+from mim_ocr.image import open_image
+from mim_ocr.preprocessing import deskew_cv2, rotate_cv2
+from mim_ocr.preprocessing.deskew import _determine_best_angle_projection_profile
+
+input_image_path = Path("tests/input_data/example_report1.png")
+
+
+@pytest.mark.parametrize("rotation", [0.0, 2.5, -6.0])
+def test_fast_projection_profile_matches_projection_profile(validate_cwd, rotation):
+    img = rotate_cv2(open_image(input_image_path), rotation, (255, 255, 255))
+
+    _, angle = deskew_cv2(img, method="fast_projection_profile")
+
+    assert angle == pytest.approx(-rotation, abs=0.5)
+    assert angle == pytest.approx(_determine_best_angle_projection_profile(img), abs=0.5)
+
+
+def test_fast_projection_profile_grayscale_and_blank_images(validate_cwd):
+    img = open_image(input_image_path)[:, :, 0]
+    assert deskew_cv2(img)[1] == 0.0
+    assert deskew_cv2(img * 0 + 255)[1] == 0.0
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from mim_ocr.preprocessing import reorient
 import cv2
@@ -16,3 +17,19 @@ def test_reorient(angle, validate_cwd):
     expected_reorient_angle = (360 - angle) % 360
 
     assert determined_reorient_angle == expected_reorient_angle
+
+
+@pytest.mark.parametrize("angle", [0, 90, 180, 270])
+def test_reorient_heuristic(angle, validate_cwd, mocker):
+    osd = mocker.patch("mim_ocr.preprocessing.reorient.pytesseract.image_to_osd")
+    input_image = cv2.imread(f"tests/input_data/example_report1-reorient{angle}.png")
+
+    reoriented_image, determined_reorient_angle = reorient.reorient_cv2(input_image, method="heuristic")
+
+    assert determined_reorient_angle == (360 - angle) % 360
+    assert reoriented_image.shape == cv2.imread("tests/input_data/example_report1.png").shape
+    osd.assert_not_called()
+
+
+def test_reorient_heuristic_ambiguous():
+    assert reorient.detect_orientation_heuristic(np.full((100, 100), 255, dtype=np.uint8)) is None
@@ -0,0 +1,31 @@
+import cv2
+import numpy as np
+import pytest
+
+from mim_ocr.preprocessing.rescale import estimate_text_height, rescale_cv2
+
+
+def _text_image(font_scale: float) -> np.ndarray:
+    img = np.full((int(400 * font_scale), int(900 * font_scale), 3), 255, dtype=np.uint8)
+    for i in range(5):
+        cv2.putText(img, "mama ma kota 12345", (10, int((60 + 70 * i) * font_scale)),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 0, 0), thickness=max(1, int(2 * font_scale)))
+    return img
+
+
+@pytest.mark.parametrize("font_scale", [1, 2, 4])
+def test_estimate_text_height(font_scale):
+    assert estimate_text_height(_text_image(1)) * font_scale == pytest.approx(
+        estimate_text_height(_text_image(font_scale)), rel=0.2)
+
+
+def test_rescale_cv2():
+    img = _text_image(4)
+    rescaled_img, scale = rescale_cv2(img, target_text_height=estimate_text_height(img) / 2)
+    assert scale == pytest.approx(0.5)
+    assert rescaled_img.shape == (800, 1800, 3)
+
+    # only downscaling by default
+    assert rescale_cv2(img, target_text_height=estimate_text_height(img) * 2)[1] == 1.0
+    # too little text
+    assert rescale_cv2(np.full((100, 100), 255, dtype=np.uint8))[1] == 1.0